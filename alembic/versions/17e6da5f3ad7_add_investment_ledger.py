@@ -0,0 +1,108 @@
+"""Add investment ledger
+
+Revision ID: 17e6da5f3ad7
+Revises: 1903825e889d
+Create Date: 2026-10-18 10:12:41.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '17e6da5f3ad7'
+down_revision = '1903825e889d'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def _invested_rows(bind, table_name):
+    table = sa.table(
+        table_name,
+        sa.column('id', sa.Integer),
+        sa.column('create_date', sa.DateTime),
+        sa.column('invested_amount', sa.Integer),
+    )
+    return bind.execute(
+        sa.select(table.c.id, table.c.create_date, table.c.invested_amount)
+        .where(table.c.invested_amount > 0)
+        .order_by(table.c.create_date, table.c.id)
+    ).all()
+
+
+def _backfill_ledger(bind):
+    """
+    Восстанавливает журнал по уже распределённым суммам.
+
+    Распределение идёт в порядке создания, поэтому переводы
+    получаются слиянием вложенных сумм проектов и пожертвований
+    в порядке (create_date, id). Если суммы в БД расходятся
+    с порядком распределения, verify-allocation покажет это,
+    а rebuild-allocation исправит.
+    """
+    investment = sa.table(
+        'investment',
+        sa.column('donation_id', sa.Integer),
+        sa.column('project_id', sa.Integer),
+        sa.column('amount', sa.Integer),
+        sa.column('create_date', sa.DateTime(timezone=True)),
+    )
+    projects = _invested_rows(bind, 'charityproject')
+    donations = _invested_rows(bind, 'donation')
+    rows = []
+    project_index = donation_index = 0
+    project_left = projects[0].invested_amount if projects else 0
+    donation_left = donations[0].invested_amount if donations else 0
+    while project_index < len(projects) and donation_index < len(donations):
+        project = projects[project_index]
+        donation = donations[donation_index]
+        amount = min(project_left, donation_left)
+        rows.append({
+            'donation_id': donation.id,
+            'project_id': project.id,
+            'amount': amount,
+            'create_date': max(project.create_date, donation.create_date),
+        })
+        project_left -= amount
+        donation_left -= amount
+        if project_left == 0:
+            project_index += 1
+            if project_index < len(projects):
+                project_left = projects[project_index].invested_amount
+        if donation_left == 0:
+            donation_index += 1
+            if donation_index < len(donations):
+                donation_left = donations[donation_index].invested_amount
+        if len(rows) == BACKFILL_BATCH_SIZE:
+            bind.execute(investment.insert(), rows)
+            rows = []
+    if rows:
+        bind.execute(investment.insert(), rows)
+
+
+def upgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.create_table('investment',
+    sa.Column('donation_id', sa.Integer(), nullable=False, comment='id пожертвования'),
+    sa.Column('project_id', sa.Integer(), nullable=False, comment='id проекта'),
+    sa.Column('amount', sa.Integer(), nullable=False, comment='Распределённая сумма'),
+    sa.Column('create_date', sa.DateTime(timezone=True), nullable=False, comment='Дата распределения'),
+    sa.Column('id', sa.Integer(), nullable=False, comment='Уникальный идентификатор записи'),
+    sa.ForeignKeyConstraint(['donation_id'], ['donation.id'], name='fk_investment_donation_id_donation'),
+    sa.ForeignKeyConstraint(['project_id'], ['charityproject.id'], name='fk_investment_project_id_charityproject'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_investment_donation_id'), 'investment', ['donation_id'], unique=False)
+    op.create_index(op.f('ix_investment_project_id'), 'investment', ['project_id'], unique=False)
+    # ### end Alembic commands ###
+    _backfill_ledger(op.get_bind())
+
+
+def downgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.drop_index(op.f('ix_investment_project_id'), table_name='investment')
+    op.drop_index(op.f('ix_investment_donation_id'), table_name='investment')
+    op.drop_table('investment')
+    # ### end Alembic commands ###
@@ -1,11 +1,15 @@
+from app.api.endpoints.allocation import router as allocation_router
 from app.api.endpoints.charity_project import router as charity_project_router
+from app.api.endpoints.diagnostics import router as diagnostics_router
 from app.api.endpoints.donation import router as donation_router
 from app.api.endpoints.google_api import router as google_api_router
 from app.api.endpoints.user import router as user_router
 
 __all__ = [
+    "allocation_router",
     "google_api_router",
     "charity_project_router",
+    "diagnostics_router",
     "donation_router",
     "user_router",
 ]
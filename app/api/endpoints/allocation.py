@@ -0,0 +1,128 @@
+from dataclasses import asdict
+from http import HTTPStatus
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import PositiveInt
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.routing import UnitOfWorkRoute
+from app.core.config import settings
+from app.core.db import get_async_session
+from app.core.user import current_superuser, current_user
+from app.crud.fund_summary import fund_summary_crud
+from app.schemas.allocation import (
+    AllocationSimulationRequest,
+    AllocationSimulationResponse,
+    AllocationStatus,
+    CacheVerifyResponse,
+    FundStatus,
+)
+from app.services.allocation_cache import allocation_cache
+from app.services.allocation_simulator import simulate_allocation
+from app.services.allocation_worker import (
+    STATUS_APPLIED,
+    STATUS_PENDING,
+    allocation_worker,
+)
+from app.services.locking import process_lock
+
+router = APIRouter(route_class=UnitOfWorkRoute)
+
+
+@router.get(
+    "/status",
+    response_model=AllocationStatus,
+    response_model_exclude_none=True,
+    dependencies=[Depends(current_user)],
+)
+async def get_allocation_status(
+    ticket: Optional[PositiveInt] = None,
+) -> AllocationStatus:
+    """
+    Состояние фонового распределения.
+    С параметром ticket показывает, выполнена ли заявка.
+    """
+    status = None
+    if ticket is not None:
+        status = (
+            STATUS_APPLIED
+            if allocation_worker.is_applied(ticket)
+            else STATUS_PENDING
+        )
+    return AllocationStatus(
+        requested=allocation_worker.requested,
+        applied=allocation_worker.applied,
+        status=status,
+    )
+
+
+@router.get(
+    "/fund",
+    response_model=FundStatus,
+    dependencies=[Depends(current_user)],
+)
+async def get_fund_status(
+    session: AsyncSession = Depends(get_async_session),
+) -> FundStatus:
+    """
+    Сводное состояние фонда: сколько не хватает открытым
+    проектам и сколько пожертвований ещё не распределено.
+    Читается из счётчиков одним запросом.
+    """
+    counters = await fund_summary_crud.get(session)
+    if counters is None:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND,
+            detail="Сводные счётчики фонда не созданы.",
+        )
+    return FundStatus(**counters._mapping)
+
+
+@router.post(
+    "/cache/verify",
+    response_model=CacheVerifyResponse,
+    dependencies=[Depends(current_superuser)],
+)
+async def verify_allocation_cache(
+    session: AsyncSession = Depends(get_async_session),
+) -> CacheVerifyResponse:
+    """
+    Сверить очереди открытых записей в памяти с БД
+    и перестроить их.
+    Только для суперюзеров.
+    """
+    if not settings.allocation_cache:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail="Кэш распределения отключён.",
+        )
+    async with process_lock():
+        consistent = await allocation_cache.verify(session)
+    return CacheVerifyResponse(
+        consistent=consistent,
+        projects=len(allocation_cache.projects),
+        donations=len(allocation_cache.donations),
+    )
+
+
+@router.post(
+    "/simulate",
+    response_model=AllocationSimulationResponse,
+    response_model_exclude_none=True,
+    dependencies=[Depends(current_superuser)],
+)
+async def simulate(
+    changes: AllocationSimulationRequest,
+    session: AsyncSession = Depends(get_async_session),
+) -> AllocationSimulationResponse:
+    """
+    Пробное распределение: какие проекты закроются и какие
+    пожертвования будут израсходованы, если добавить
+    указанные проекты и пожертвования. В БД ничего не пишется.
+    Только для суперюзеров.
+    """
+    result = await simulate_allocation(
+        session, changes.projects, changes.donations
+    )
+    return AllocationSimulationResponse(**asdict(result))
@@ -1,24 +1,45 @@
-from fastapi import APIRouter, Depends
+from dataclasses import asdict
+
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.etags import (
+    ETAG_HEADER,
+    make_etag,
+    not_modified,
+    page_tag,
+    set_etag,
+)
+from app.api.fieldsets import Fields, fieldset
+from app.api.pagination import Page, get_page
+from app.api.responses import pack_response, rows_response, unpack_response
+from app.api.routing import UnitOfWorkRoute
 from app.api.validators import (
+    NDJSON_MEDIA_TYPE,
     check_charity_project_id_exists,
     check_closed_project,
     check_full_amount_not_less_than_invested,
     check_name_duplicate,
     check_project_has_no_investments,
 )
-from app.core.db import get_async_session
+from app.core.db import get_async_session, get_read_session
 from app.core.user import current_superuser
 from app.crud.charity_project import project_crud
+from app.crud.table_version import table_version_crud
+from app.models import CharityProject
 from app.schemas.charity_project import (
     CharityProjectCreate,
     CharityProjectDB,
+    CharityProjectImportResponse,
     CharityProjectUpdate,
 )
-from app.services.investment import invest_donations_in_projects
+from app.services.allocation_cache import allocation_cache
+from app.services.allocation_worker import run_allocation
+from app.services.locking import allocation_lock
+from app.services.project_import import import_projects, iter_lines, spool
+from app.services.project_list_cache import project_list_cache
 
-router = APIRouter()
+router = APIRouter(route_class=UnitOfWorkRoute)
 
 
 @router.get(
@@ -27,12 +48,62 @@ router = APIRouter()
     response_model_exclude_none=True,
 )
 async def get_all_charity_projects(
-    session: AsyncSession = Depends(get_async_session),
+    request: Request,
+    page: Page = Depends(get_page),
+    fields: Fields = Depends(fieldset(CharityProjectDB)),
+    session: AsyncSession = Depends(get_read_session),
 ) -> list[CharityProjectDB]:
     """
-    Просмотреть список всех целевых проектов
+    Просмотреть список всех целевых проектов.
+
+    Список отдаётся страницами по limit записей; курсор следующей
+    страницы приходит в заголовке X-Next-Cursor.
+
+    С параметром fields (например, fields=name,invested_amount)
+    из БД читаются и отдаются только эти поля и id.
+
+    ETag ответа - версия таблицы проектов и параметры страницы:
+    с заголовком If-None-Match и неизменившимися проектами
+    ответ 304 отдаётся без чтения списка.
+
+    При PROJECTS_CACHE=true страницы вместе с ETag отдаются
+    из кэша без обращения к БД. Кэш сбрасывается после коммита
+    изменений проектов и распределения средств.
     """
-    return await project_crud.get_all(session)
+    params = f"{page.limit}:{page.after_id}:{','.join(fields)}"
+    generation = None
+    if project_list_cache.enabled:
+        cached, generation = await project_list_cache.get(params)
+        if cached is not None:
+            response = unpack_response(cached)
+            unchanged = not_modified(
+                request, response.headers.get(ETAG_HEADER)
+            )
+            return response if unchanged is None else unchanged
+
+    # Версия читается до списка: ETag не может оказаться новее данных
+    version = await table_version_crud.get(CharityProject, session)
+    etag = (
+        make_etag(
+            CharityProject.__tablename__, version, page_tag(page, fields)
+        )
+        if version is not None else None
+    )
+    unchanged = not_modified(request, etag)
+    if unchanged is not None:
+        return unchanged
+
+    projects, next_id = await project_crud.get_page(
+        session, page.limit, page.after_id, columns=fields
+    )
+    response = set_etag(
+        rows_response(projects, next_id, exclude_none=True), etag
+    )
+    if generation is not None:
+        await project_list_cache.put(
+            params, generation, pack_response(response)
+        )
+    return response
 
 
 @router.post(
@@ -43,22 +114,64 @@ async def get_all_charity_projects(
 )
 async def create_charity_project(
     charity_project: CharityProjectCreate,
+    response: Response,
     session: AsyncSession = Depends(get_async_session),
 ) -> CharityProjectDB:
     """
     Создать целевой проект.
     Только для суперюзеров.
+
+    В фоновом режиме распределения ответ содержит заголовки
+    X-Allocation-Ticket и X-Allocation-Status: pending.
     """
     await check_name_duplicate(charity_project.name, session)
-    new_db_entry = await project_crud.create(charity_project, session)
-    session.expunge_all()
+    async with allocation_lock(session):
+        new_db_entry = await project_crud.create(charity_project, session)
+        allocation_cache.put(new_db_entry)
 
-    # Пересчет донатов в проекты
-    await invest_donations_in_projects(new_db_entry, session)
+        # Распределение свободных донатов в проекты
+        await run_allocation(session, response)
+    await project_list_cache.invalidate_after_commit()
+    await session.refresh(new_db_entry)
 
     return new_db_entry
 
 
+@router.post(
+    "/import",
+    response_model=CharityProjectImportResponse,
+    dependencies=[Depends(current_superuser)],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {NDJSON_MEDIA_TYPE: {"schema": {"type": "string"}}},
+        },
+    },
+)
+async def import_charity_projects(
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_async_session),
+) -> CharityProjectImportResponse:
+    """
+    Импортировать проекты из NDJSON (по проекту в строке).
+    Только для суперюзеров.
+
+    Тело сначала целиком принимается во временный файл, затем
+    импортируется под блокировкой распределения. Строки с ошибками
+    и с уже занятыми именами пропускаются; распределение средств
+    выполняется один раз после импорта.
+    """
+    async with spool(request.stream()) as chunks:
+        async with allocation_lock(session):
+            summary = await import_projects(iter_lines(chunks), session)
+            if summary.created:
+                await run_allocation(session, response, bulk=True)
+    if summary.created:
+        await project_list_cache.invalidate_after_commit()
+    return CharityProjectImportResponse(**asdict(summary))
+
+
 @router.patch(
     "/{project_id}",
     response_model=CharityProjectDB,
@@ -77,14 +190,22 @@ async def update_charity_project(
     Закрытый проект нельзя редактировать;
     нельзя установить требуемую сумму меньше уже вложенной.
     """
-    db_record = await check_charity_project_id_exists(project_id, session)
-    await check_closed_project(db_record)
-    await check_full_amount_not_less_than_invested(
-        obj_in.full_amount, db_record
-    )
-    if obj_in.name is not None:
-        await check_name_duplicate(obj_in.name, session)
-    return await project_crud.update(db_record, obj_in, session)
+    # Под блокировкой распределение не изменит проект между
+    # проверками и записью, а очередь кэша - между записью и коммитом
+    async with allocation_lock(session):
+        db_record = await check_charity_project_id_exists(
+            project_id, session
+        )
+        await check_closed_project(db_record)
+        await check_full_amount_not_less_than_invested(
+            obj_in.full_amount, db_record
+        )
+        if obj_in.name is not None:
+            await check_name_duplicate(obj_in.name, session)
+        db_record = await project_crud.update(db_record, obj_in, session)
+        allocation_cache.put(db_record)
+    await project_list_cache.invalidate_after_commit()
+    return db_record
 
 
 @router.delete(
@@ -103,6 +224,12 @@ async def delete_charity_project(
 
     Нельзя удалить проект, в который уже были инвестированы средства.
     """
-    db_record = await check_charity_project_id_exists(project_id, session)
-    await check_project_has_no_investments(db_record)
-    return await project_crud.delete(db_record, session)
+    async with allocation_lock(session):
+        db_record = await check_charity_project_id_exists(
+            project_id, session
+        )
+        await check_project_has_no_investments(db_record)
+        db_record = await project_crud.delete(db_record, session)
+        allocation_cache.discard(db_record)
+    await project_list_cache.invalidate_after_commit()
+    return db_record
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends
+
+from app.core import db
+from app.core.user import current_superuser
+from app.schemas.diagnostics import CacheStatus, PoolStatus
+from app.services.project_list_cache import project_list_cache
+
+router = APIRouter()
+
+
+@router.get(
+    "/pool",
+    response_model=list[PoolStatus],
+    dependencies=[Depends(current_superuser)],
+)
+async def get_pool_status() -> list[PoolStatus]:
+    """
+    Состояние пулов соединений с БД: занятые, свободные
+    и сверхлимитные соединения, время ожидания соединения.
+    Только для суперюзеров.
+    """
+    engines = {
+        "primary": db.engine,
+        "writer": db.writer_engine,
+        "replica": db.replica_engine,
+    }
+    return [
+        PoolStatus(name=name, **engine.pool.snapshot())
+        for name, engine in engines.items()
+        if engine is not None
+    ]
+
+
+@router.get(
+    "/cache",
+    response_model=CacheStatus,
+    dependencies=[Depends(current_superuser)],
+)
+async def get_cache_status() -> CacheStatus:
+    """
+    Кэш списка проектов: попадания, промахи и сбросы.
+    Только для суперюзеров.
+    """
+    return CacheStatus(**project_list_cache.snapshot())
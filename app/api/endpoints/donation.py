@@ -1,20 +1,45 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.db import get_async_session
+from app.api.etags import make_etag, not_modified, page_tag, set_etag
+from app.api.fieldsets import Fields, fieldset
+from app.api.pagination import Page, get_page
+from app.api.responses import rows_response
+from app.api.routing import UnitOfWorkRoute
+from app.api.streaming import ndjson_response, wants_ndjson
+from app.api.validators import NDJSON_MEDIA_TYPE, parse_bulk_items
+from app.core.db import get_async_session, get_read_session
 from app.core.user import current_superuser, current_user
-from app.crud.charity_project import project_crud
 from app.crud.donation import donation_crud
-from app.models import User
+from app.crud.investment import investment_crud
+from app.crud.table_version import table_version_crud
+from app.models import Donation, User
 from app.schemas.donation import (
+    DonationBulkResponse,
     DonationCreate,
     DonationCreateResponse,
     DonationDB,
     DonationUserResponse,
 )
-from app.services.investment import invest_donations_in_projects
+from app.schemas.investment import InvestmentDB
+from app.services.allocation_cache import allocation_cache
+from app.services.allocation_worker import run_allocation
+from app.services.locking import allocation_lock
 
-router = APIRouter()
+router = APIRouter(route_class=UnitOfWorkRoute)
+
+BULK_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "application/json": {
+            "schema": {
+                "type": "array",
+                "items": {"$ref": "#/components/schemas/DonationCreate"},
+            },
+        },
+        NDJSON_MEDIA_TYPE: {"schema": {"type": "string"}},
+    },
+}
 
 
 @router.get(
@@ -22,15 +47,37 @@ router = APIRouter()
     response_model=list[DonationDB],
     response_model_exclude_none=True,
     dependencies=[Depends(current_superuser)],
+    responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}}},
 )
 async def get_all_donations(
-    session: AsyncSession = Depends(get_async_session),
+    request: Request,
+    page: Page = Depends(get_page),
+    fields: Fields = Depends(fieldset(DonationDB)),
+    session: AsyncSession = Depends(get_read_session),
 ) -> list[DonationDB]:
     """
     Просмотреть список всех пожертвований.
     Только для суперюзеров.
+
+    Список отдаётся страницами, курсор следующей страницы
+    приходит в заголовке X-Next-Cursor.
+
+    С заголовком Accept: application/x-ndjson все пожертвования
+    (после cursor, если он передан) выгружаются потоком
+    по записи в строке, limit не учитывается.
+
+    С параметром fields из БД читаются и отдаются только
+    эти поля и id.
     """
-    return await donation_crud.get_all(session)
+    if wants_ndjson(request):
+        return ndjson_response(
+            donation_crud.stream_all(session, page.after_id, columns=fields),
+            exclude_none=True,
+        )
+    donations, next_id = await donation_crud.get_page(
+        session, page.limit, page.after_id, columns=fields
+    )
+    return rows_response(donations, next_id, exclude_none=True)
 
 
 @router.get(
@@ -39,15 +86,62 @@ async def get_all_donations(
     response_model_exclude={"user_id"},
 )
 async def get_user_donations(
-    session: AsyncSession = Depends(get_async_session),
+    request: Request,
+    page: Page = Depends(get_page),
+    fields: Fields = Depends(fieldset(DonationUserResponse)),
+    session: AsyncSession = Depends(get_read_session),
     user: User = Depends(current_user),
 ) -> list[DonationUserResponse]:
     """
     Просмотреть список пожертвований пользователя,
     выполняющего запрос.
     Только для зарегистрированных пользователей.
+
+    Список отдаётся страницами, курсор следующей страницы
+    приходит в заголовке X-Next-Cursor; параметр fields
+    ограничивает поля ответа.
+
+    ETag ответа - версия таблицы пожертвований, id пользователя
+    и параметры страницы: с заголовком If-None-Match
+    и неизменившимися пожертвованиями ответ 304 отдаётся
+    без чтения списка.
+    """
+    # Версия читается до списка: ETag не может оказаться новее данных
+    version = await table_version_crud.get(Donation, session)
+    etag = (
+        make_etag(
+            Donation.__tablename__, version, user.id, page_tag(page, fields)
+        )
+        if version is not None
+        else None
+    )
+    unchanged = not_modified(request, etag)
+    if unchanged is not None:
+        return unchanged
+    donations, next_id = await donation_crud.get_page(
+        session,
+        page.limit,
+        page.after_id,
+        filters=[Donation.user_id == user.id],
+        columns=fields,
+    )
+    return set_etag(rows_response(donations, next_id), etag)
+
+
+@router.get(
+    "/my/investments",
+    response_model=list[InvestmentDB],
+)
+async def get_user_investments(
+    session: AsyncSession = Depends(get_read_session),
+    user: User = Depends(current_user),
+) -> list[InvestmentDB]:
+    """
+    Просмотреть, в какие проекты распределены
+    пожертвования пользователя.
+    Только для зарегистрированных пользователей.
     """
-    return await donation_crud.get_by_user(session=session, user=user)
+    return await investment_crud.get_by_user(session=session, user=user)
 
 
 @router.post(
@@ -57,21 +151,66 @@ async def get_user_donations(
 )
 async def create_donation(
     donation: DonationCreate,
+    response: Response,
     session: AsyncSession = Depends(get_async_session),
     user: User = Depends(current_user),
 ) -> DonationCreateResponse:
     """
     Создать пожертвование и привязать к пользователю.
+
+    В фоновом режиме распределения ответ содержит заголовки
+    X-Allocation-Ticket и X-Allocation-Status: pending.
     """
-    # Создаём запись в БД
-    new_db_entry = await donation_crud.create(donation, session, user)
+    async with allocation_lock(session):
+        # Создаём запись в БД
+        new_db_entry = await donation_crud.create(donation, session, user)
+        allocation_cache.put(new_db_entry)
 
-    # Получаем все открытые проекты
-    projects = await project_crud.get_all(session)
-    session.expunge_all()
+        session.expunge_all()
 
-    # Распределяем новый донат по проектам
-    for project in projects:
-        await invest_donations_in_projects(project, session)
+        # Распределяем новый донат по открытым проектам
+        await run_allocation(session, response)
 
     return new_db_entry
+
+
+@router.post(
+    "/bulk",
+    response_model=DonationBulkResponse,
+    openapi_extra={"requestBody": BULK_REQUEST_BODY},
+)
+async def create_donations_bulk(
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_user),
+) -> DonationBulkResponse:
+    """
+    Создать пакет пожертвований и привязать к пользователю.
+
+    Принимает JSON-массив или NDJSON
+    (Content-Type: application/x-ndjson).
+    Пожертвования добавляются многострочными INSERT,
+    распределение выполняется одним проходом на весь пакет.
+    """
+    donations = parse_bulk_items(
+        await request.body(),
+        request.headers.get("content-type"),
+        DonationCreate,
+    )
+    async with allocation_lock(session):
+        new_db_entries = await donation_crud.create_many(
+            donations, session, user
+        )
+        for new_db_entry in new_db_entries:
+            allocation_cache.put(new_db_entry)
+
+        await run_allocation(session, response, bulk=True)
+
+    ids = [new_db_entry.id for new_db_entry in new_db_entries]
+    return DonationBulkResponse(
+        ids=ids,
+        count=len(ids),
+        full_amount=sum(donation.full_amount for donation in donations),
+        invested_amount=await donation_crud.get_invested_total(ids, session),
+    )
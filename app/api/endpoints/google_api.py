@@ -3,7 +3,7 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.core.db import get_async_session
+from app.core.db import get_read_session
 from app.core.google_client import get_service
 from app.core.user import current_superuser
 from app.crud.charity_project import project_crud
@@ -17,7 +17,7 @@ router = APIRouter()
     dependencies=[Depends(current_superuser)],
 )
 async def get_report(
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_read_session),
     wrapper_services: Aiogoogle = Depends(get_service),
 ):
     """
@@ -0,0 +1,68 @@
+import hashlib
+from http import HTTPStatus
+from typing import Optional
+
+from fastapi import Request, Response
+
+from app.api.fieldsets import Fields
+from app.api.pagination import Page
+
+ETAG_HEADER = "ETag"
+
+
+def make_etag(*parts) -> str:
+    """
+    Сильный ETag из частей версии ответа.
+
+    :param parts: например, имя таблицы, её версия, id пользователя
+        и page_tag
+    :return: значение заголовка ETag в кавычках
+    """
+    return '"' + "-".join(map(str, parts)) + '"'
+
+
+def page_tag(page: Page, fields: Fields) -> str:
+    """
+    Часть ETag от параметров страницы: ответы с разными limit,
+    cursor и fields при той же версии таблицы - разные тела.
+
+    :param page: размер страницы и курсор
+    :param fields: поля ответа в порядке схемы
+    :return: короткий хеш параметров
+    """
+    params = f"{page.limit}:{page.after_id}:{','.join(fields)}"
+    return hashlib.blake2b(params.encode(), digest_size=8).hexdigest()
+
+
+def not_modified(request: Request, etag: Optional[str]) -> Optional[Response]:
+    """
+    Ответ 304 Not Modified, если ETag из If-None-Match
+    совпадает с текущим.
+
+    :param request: запрос
+    :param etag: текущий ETag или None, если версии нет
+    :return: ответ 304 или None, если нужен полный ответ
+    """
+    header = request.headers.get("if-none-match")
+    if etag is None or header is None:
+        return None
+    # If-None-Match сравнивается без учёта признака слабого ETag
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    if etag not in tags and "*" not in tags:
+        return None
+    return Response(
+        status_code=HTTPStatus.NOT_MODIFIED, headers={ETAG_HEADER: etag}
+    )
+
+
+def set_etag(response: Response, etag: Optional[str]) -> Response:
+    """
+    Добавляет ETag к полному ответу.
+
+    :param response: ответ эндпоинта
+    :param etag: текущий ETag или None
+    :return: тот же ответ
+    """
+    if etag is not None:
+        response.headers[ETAG_HEADER] = etag
+    return response
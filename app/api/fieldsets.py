@@ -0,0 +1,43 @@
+from http import HTTPStatus
+from typing import Callable, Optional, Type
+
+from fastapi import HTTPException, Query
+from pydantic import BaseModel
+
+# id нужен для курсора следующей страницы и всегда входит в ответ
+KEY_FIELD = "id"
+UNKNOWN_FIELDS = "Неизвестные поля: {fields}."
+
+Fields = tuple[str, ...]
+
+
+def fieldset(schema: Type[BaseModel]) -> Callable:
+    """
+    Зависимость списковых эндпоинтов: параметр fields
+    со списком полей ответа через запятую.
+
+    :param schema: полная схема записи ответа
+    :return: зависимость, возвращающая поля в порядке схемы;
+        без параметра - все поля схемы
+    """
+    allowed = tuple(schema.__fields__)
+
+    async def get_fields(
+        fields: Optional[str] = Query(
+            None,
+            description="Поля ответа через запятую: " + ", ".join(allowed),
+        ),
+    ) -> Fields:
+        if fields is None:
+            return allowed
+        requested = {name.strip() for name in fields.split(",")} - {""}
+        unknown = ", ".join(sorted(requested.difference(allowed)))
+        if unknown:
+            raise HTTPException(
+                status_code=HTTPStatus.BAD_REQUEST,
+                detail=UNKNOWN_FIELDS.format(fields=unknown),
+            )
+        requested.add(KEY_FIELD)
+        return tuple(name for name in allowed if name in requested)
+
+    return get_fields
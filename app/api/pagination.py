@@ -0,0 +1,86 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import Optional
+
+from fastapi import HTTPException, Query, Response
+
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+INVALID_CURSOR = "Некорректный курсор страницы."
+
+
+@dataclass
+class Page:
+    """
+    Параметры страницы: размер и id последней записи
+    предыдущей страницы.
+    """
+
+    limit: int
+    after_id: Optional[int] = None
+
+
+def encode_cursor(last_id: int) -> str:
+    """
+    Непрозрачный курсор следующей страницы.
+
+    :param last_id: id последней записи страницы
+    :return: курсор для параметра cursor
+    """
+    data = json.dumps({"id": last_id}).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Разбирает курсор, выданный encode_cursor.
+
+    :param cursor: курсор из запроса
+    :return: id последней записи предыдущей страницы
+    """
+    try:
+        data = json.loads(
+            base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        )
+        last_id = data["id"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        last_id = None
+    if not isinstance(last_id, int) or isinstance(last_id, bool):
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST, detail=INVALID_CURSOR
+        )
+    return last_id
+
+
+async def get_page(
+    limit: int = Query(
+        PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Размер страницы"
+    ),
+    cursor: Optional[str] = Query(
+        None, description=f"Курсор из заголовка {NEXT_CURSOR_HEADER}"
+    ),
+) -> Page:
+    """
+    Зависимость списковых эндпоинтов: параметры limit и cursor.
+    """
+    return Page(
+        limit=limit,
+        after_id=decode_cursor(cursor) if cursor is not None else None,
+    )
+
+
+def set_next_cursor(response: Response, next_id: Optional[int]) -> None:
+    """
+    Отдаёт курсор следующей страницы в заголовке ответа.
+    Тело ответа остаётся списком записей.
+
+    :param response: ответ эндпоинта
+    :param next_id: id последней записи, если есть следующая страница
+    :return: None
+    """
+    if next_id is not None:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(next_id)
@@ -0,0 +1,80 @@
+from typing import Optional, Sequence
+
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+
+from app.api.etags import ETAG_HEADER
+from app.api.pagination import NEXT_CURSOR_HEADER, set_next_cursor
+
+# Заголовки ответа списка, которые сохраняются в кэше вместе с телом
+PACKED_HEADERS = (NEXT_CURSOR_HEADER, ETAG_HEADER)
+
+
+def row_dict(row, exclude_none: bool = False) -> dict:
+    """
+    Строка результата запроса в виде словаря для ответа.
+
+    :param row: строка или словарь колонка -> значение
+    :param exclude_none: не включать поля со значением None
+    :return: словарь поле -> значение
+    """
+    mapping = getattr(row, "_mapping", row)
+    if exclude_none:
+        return {
+            key: value for key, value in mapping.items() if value is not None
+        }
+    return dict(mapping)
+
+
+def rows_response(
+    rows: Sequence,
+    next_id: Optional[int],
+    exclude_none: bool = False,
+) -> ORJSONResponse:
+    """
+    Быстрый ответ списка: строки БД сразу кодируются orjson,
+    без построения и валидации моделей pydantic на каждую запись.
+
+    Колонки строк должны совпадать с полями схемы ответа
+    эндпоинта (response_model описывает ответ в документации,
+    соответствие схеме проверяется тестами).
+
+    :param rows: строки страницы
+    :param next_id: id последней записи, если есть следующая страница
+    :param exclude_none: не отдавать поля со значением None
+    :return: ORJSONResponse с курсором следующей страницы
+    """
+    response = ORJSONResponse([row_dict(row, exclude_none) for row in rows])
+    set_next_cursor(response, next_id)
+    return response
+
+
+def pack_response(response: Response) -> bytes:
+    """
+    Ответ списка в байтах для кэша: по строке на каждый
+    заголовок из PACKED_HEADERS (курсор следующей страницы
+    и ETag, строка может быть пустой), затем тело.
+
+    :param response: ответ rows_response
+    :return: байты для unpack_response
+    """
+    headers = [
+        response.headers.get(name, "").encode() for name in PACKED_HEADERS
+    ]
+    return b"\n".join((*headers, response.body))
+
+
+def unpack_response(value: bytes) -> Response:
+    """
+    Восстанавливает ответ, сохранённый pack_response,
+    без повторной сериализации.
+
+    :param value: байты из кэша
+    :return: ответ с тем же телом, курсором и ETag
+    """
+    *headers, body = value.split(b"\n", len(PACKED_HEADERS))
+    response = Response(body, media_type=ORJSONResponse.media_type)
+    for name, header in zip(PACKED_HEADERS, headers):
+        if header:
+            response.headers[name] = header.decode()
+    return response
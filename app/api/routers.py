@@ -1,7 +1,9 @@
 from fastapi import APIRouter
 
 from app.api.endpoints import (
+    allocation_router,
     charity_project_router,
+    diagnostics_router,
     donation_router,
     google_api_router,
     user_router,
@@ -19,6 +21,16 @@ main_router.include_router(
     prefix="/donation",
     tags=["donations"],
 )
+main_router.include_router(
+    allocation_router,
+    prefix="/allocation",
+    tags=["allocation"],
+)
+main_router.include_router(
+    diagnostics_router,
+    prefix="/diagnostics",
+    tags=["diagnostics"],
+)
 
 main_router.include_router(
     google_api_router, prefix="/google", tags=["Google"]
@@ -0,0 +1,32 @@
+from typing import Callable
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from app.core.db import recent_writers
+from app.core.unit_of_work import unit_of_work
+
+
+class UnitOfWorkRoute(APIRoute):
+    """
+    Маршрут, выполняющий запрос в одной единице работы.
+
+    Изменения, сделанные эндпоинтом, коммитятся один раз после
+    того, как ответ сформирован, но до отправки клиенту: ответ
+    об успехе не уходит, если коммит не удался, а при ошибке
+    в эндпоинте все изменения запроса откатываются.
+    После записи клиент какое-то время читает из основной БД,
+    а не из реплики.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            async with unit_of_work() as unit:
+                response = await handler(request)
+            if unit.sessions:
+                recent_writers.mark(request)
+            return response
+
+        return route_handler
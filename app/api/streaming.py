@@ -0,0 +1,44 @@
+from typing import AsyncIterator, Sequence
+
+import orjson
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+from app.api.responses import row_dict
+from app.api.validators import NDJSON_MEDIA_TYPE
+
+
+def wants_ndjson(request: Request) -> bool:
+    """
+    Клиент просит потоковый ответ (Accept: application/x-ndjson).
+
+    :param request: запрос
+    :return: True, если нужен NDJSON
+    """
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def ndjson_response(
+    partitions: AsyncIterator[Sequence],
+    exclude_none: bool = False,
+) -> StreamingResponse:
+    """
+    Потоковый ответ NDJSON: по записи в строке, пачка строк
+    на каждую пачку курсора.
+
+    Колонки строк должны совпадать с полями схемы ответа,
+    записи кодируются orjson без построения моделей.
+
+    :param partitions: пачки строк из BaseCRUD.stream_all
+    :param exclude_none: не отдавать поля со значением None
+    :return: StreamingResponse
+    """
+
+    async def body() -> AsyncIterator[bytes]:
+        async for partition in partitions:
+            yield b"".join(
+                orjson.dumps(row_dict(row, exclude_none)) + b"\n"
+                for row in partition
+            )
+
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE)
@@ -1,12 +1,17 @@
+import json
 from http import HTTPStatus
 from typing import Optional
 
 from fastapi import HTTPException
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError, parse_obj_as
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud.charity_project import project_crud
 from app.models.charity_project import CharityProject
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
 
 async def check_name_duplicate(
     input_name: str,
@@ -100,3 +105,40 @@ async def check_full_amount_not_less_than_invested(
                 f"({project.invested_amount})."
             ),
         )
+
+
+def parse_bulk_items(
+    body: bytes,
+    content_type: Optional[str],
+    schema,
+) -> list:
+    """
+    Разбирает тело пакетного запроса: JSON-массив
+    или NDJSON (по объекту в строке)
+
+    :param body: тело запроса
+    :param content_type: заголовок Content-Type
+    :param schema: схема одного элемента
+    :return: список провалидированных элементов
+    """
+    try:
+        if content_type and content_type.startswith(NDJSON_MEDIA_TYPE):
+            items = [
+                json.loads(line) for line in body.splitlines() if line.strip()
+            ]
+        else:
+            items = json.loads(body)
+    except ValueError:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail="Некорректный JSON в теле запроса.",
+        )
+    if not isinstance(items, list) or not items:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail="Ожидается непустой список объектов.",
+        )
+    try:
+        return parse_obj_as(list[schema], items)
+    except ValidationError as error:
+        raise RequestValidationError(error.raw_errors)
@@ -0,0 +1,101 @@
+"""
+Команды обслуживания.
+
+Запуск: python -m app.cli <команда> [параметры]
+"""
+import argparse
+import asyncio
+import json
+from dataclasses import asdict
+from typing import AsyncIterator
+
+import aiofiles
+
+from app.core.db import AsyncSessionLocal
+from app.services.allocation_replay import AllocationReplay
+from app.services.investment import invest_donations_in_projects
+from app.services.locking import allocation_lock
+from app.services.project_import import import_projects, iter_lines
+
+FILE_CHUNK_SIZE = 64 * 1024
+
+
+async def read_file(path: str) -> AsyncIterator[bytes]:
+    """
+    Читает файл фрагментами по FILE_CHUNK_SIZE байт.
+
+    :param path: путь к файлу
+    :return: фрагменты файла
+    """
+    async with aiofiles.open(path, "rb") as file:
+        while True:
+            chunk = await file.read(FILE_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def print_json(data) -> None:
+    print(json.dumps(data, ensure_ascii=False, indent=2, default=str))
+
+
+async def import_projects_command(args: argparse.Namespace) -> None:
+    """
+    Импорт проектов из NDJSON-файла с распределением в конце.
+    """
+    async with AsyncSessionLocal() as session:
+        async with allocation_lock(session):
+            summary = await import_projects(
+                iter_lines(read_file(args.path)), session
+            )
+            if summary.created:
+                await invest_donations_in_projects(session, bulk=True)
+    print_json(asdict(summary))
+
+
+async def replay_allocation_command(args: argparse.Namespace) -> None:
+    """
+    Пересчёт распределения с нуля и сверка с БД;
+    rebuild-allocation также записывает исправления.
+    """
+    async with AsyncSessionLocal() as session:
+        report = await AllocationReplay(session, args.apply).run()
+    print_json(asdict(report))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.cli",
+        description="Команды обслуживания QRKot",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser(
+        "import-projects",
+        help="импортировать проекты из NDJSON-файла",
+    )
+    import_parser.add_argument("path", help="путь к NDJSON-файлу")
+    import_parser.set_defaults(handler=import_projects_command)
+
+    verify_parser = commands.add_parser(
+        "verify-allocation",
+        help="пересчитать распределение и показать расхождения с БД",
+    )
+    verify_parser.set_defaults(handler=replay_allocation_command, apply=False)
+
+    rebuild_parser = commands.add_parser(
+        "rebuild-allocation",
+        help="пересчитать распределение и исправить расхождения в БД",
+    )
+    rebuild_parser.set_defaults(handler=replay_allocation_command, apply=True)
+
+    return parser
+
+
+def main(argv=None) -> None:
+    args = build_parser().parse_args(argv)
+    asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,7 @@
 from app.core.db import Base  # noqa: F401
 from app.models.charity_project import CharityProject  # noqa: F401
 from app.models.donation import Donation  # noqa: F401
+from app.models.fund_summary import FundSummary  # noqa: F401
+from app.models.investment import Investment  # noqa: F401
+from app.models.table_version import TableVersion  # noqa: F401
 from app.models.user import User  # noqa: F401
@@ -7,6 +7,17 @@ class Settings(BaseSettings):
     app_title: str = "API QRKot"
     app_description: str = "Фонд собирает пожертвования"
     database_url: str = "sqlite+aiosqlite:///./fastapi.db"
+    read_replica_url: Optional[str] = None
+    read_your_writes_seconds: float = 5.0
+    pool_size: int = 5
+    pool_max_overflow: int = 10
+    pool_timeout: float = 30.0
+    pool_recycle: int = -1
+    pool_pre_ping: bool = False
+    sqlite_wal: bool = False
+    sqlite_busy_timeout: int = 5000
+    sqlite_mmap_size: int = 268_435_456
+    sqlite_cache_size: int = -65_536
     secret: str = "SECRET"
     first_superuser_email: Optional[EmailStr] = None
     first_superuser_password: Optional[str] = None
@@ -22,6 +33,12 @@ class Settings(BaseSettings):
     client_x509_cert_url: Optional[str] = None
     email: Optional[str] = None
     spreadsheet_id: Optional[str] = None
+    allocation_cache: bool = False
+    allocation_locking: bool = True
+    allocation_background: bool = False
+    projects_cache: bool = False
+    projects_cache_ttl: int = 5
+    projects_cache_size: int = 1024
 
     class Config:
         env_file = ".env"
@@ -1,15 +1,60 @@
 from datetime import datetime, timezone
+from hashlib import sha256
 from typing import Optional
 
-from sqlalchemy import Boolean, Column, Integer
+from cachetools import TTLCache
+from fastapi import Depends, Request
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Index,
+    Integer,
+    TypeDecorator,
+    column,
+    event,
+)
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import Mapped, declarative_base, sessionmaker
+from sqlalchemy.orm import (
+    Mapped,
+    declarative_base,
+    declared_attr,
+    sessionmaker,
+)
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.sql.sqltypes import DateTime
 
 from app.core.config import settings
+from app.core.pool import pool_options
+from app.core.sqlite import apply_pragmas, writer_options
 
 Base = declarative_base()
 
+# Условие частичных индексов открытых записей. Совпадает с тем,
+# как SQLAlchemy выводит fully_invested.is_(False) в запросах,
+# иначе SQLite не использует частичный индекс.
+OPEN_ROWS = column("fully_invested").is_(False)
+
+
+class UTCDateTime(TypeDecorator):
+    """
+    Дата с часовым поясом, которая на любой СУБД читается
+    как наивное время UTC - так, как её возвращает SQLite,
+    не хранящий часовой пояс. Наивные даты записываются как UTC.
+    """
+
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value
+
+    def process_result_value(self, value, dialect):
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
 
 class CommonMixin:
     id: Mapped[int] = Column(
@@ -21,6 +66,22 @@ class CommonMixin:
 
 class InvestmentBase(CommonMixin, Base):
     __abstract__ = True
+    # Значения, вычисляемые БД при записи, читаются в том же
+    # INSERT/UPDATE через RETURNING там, где он поддерживается
+    __mapper_args__ = {"eager_defaults": True}
+
+    @declared_attr
+    def __table_args__(cls):
+        # Очередь открытых записей для распределения (get_opened)
+        return (
+            Index(
+                f"ix_{cls.__tablename__}_open",
+                "create_date",
+                "id",
+                sqlite_where=OPEN_ROWS,
+                postgresql_where=OPEN_ROWS,
+            ),
+        )
 
     invested_amount: Mapped[int] = Column(
         Integer,
@@ -35,27 +96,161 @@ class InvestmentBase(CommonMixin, Base):
         comment="Флаг закрытия проекта",
     )
     create_date: Mapped[datetime] = Column(
-        DateTime(timezone=True),
+        UTCDateTime,
         nullable=False,
         default=lambda: datetime.now(timezone.utc),
         comment="Дата создания проекта",
     )
     close_date: Mapped[Optional[datetime]] = Column(
-        DateTime(timezone=True),
+        UTCDateTime,
         nullable=True,
         comment="Дата закрытия проекта",
     )
 
 
-engine = create_async_engine(settings.database_url)
+def stored_date(value: Optional[datetime], dialect) -> Optional[datetime]:
+    """
+    Дата в том виде, в каком её вернёт БД (см. UTCDateTime):
+    наивное время UTC, а на SQLite, хранящем время без пояса
+    как есть, - то же время без пояса.
+
+    :param value: записываемая дата
+    :param dialect: диалект соединения
+    :return: дата без часового пояса или None
+    """
+    if value is None or value.tzinfo is None:
+        return value
+    if dialect.name != "sqlite":
+        value = value.astimezone(timezone.utc)
+    return value.replace(tzinfo=None)
+
+
+@event.listens_for(InvestmentBase, "after_insert", propagate=True)
+@event.listens_for(InvestmentBase, "after_update", propagate=True)
+def _dates_as_stored(mapper, connection, target) -> None:
+    """
+    Объект после записи не перечитывается из БД, поэтому его даты
+    приводятся к тому, что вернёт БД, иначе они не сравнимы
+    с прочитанными записями.
+    """
+    for key in ("create_date", "close_date"):
+        value = target.__dict__.get(key)
+        if value is not None and value.tzinfo is not None:
+            set_committed_value(
+                target, key, stored_date(value, connection.dialect)
+            )
+
+
+# Запросы этих методов только читают данные
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+engine = create_async_engine(settings.database_url, **pool_options())
+
+# В режиме SQLITE_WAL engine - пул соединений для чтения,
+# а все записи идут через единственное соединение writer_engine
+writer_engine = None
+if settings.sqlite_wal and engine.dialect.name == "sqlite":
+    writer_engine = create_async_engine(
+        settings.database_url, **writer_options()
+    )
+    apply_pragmas(engine)
+    apply_pragmas(writer_engine)
 
 AsyncSessionLocal = sessionmaker(
+    writer_engine or engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
+
+ReadSessionLocal = sessionmaker(
     engine,
     class_=AsyncSession,
     expire_on_commit=False,
 )
 
 
-async def get_async_session():
-    async with AsyncSessionLocal() as session:
+replica_engine = (
+    create_async_engine(settings.read_replica_url, **pool_options())
+    if settings.read_replica_url
+    else None
+)
+
+ReplicaSessionLocal = (
+    sessionmaker(
+        replica_engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+    )
+    if replica_engine is not None
+    else None
+)
+
+
+class RecentWriters:
+    """
+    Клиенты, недавно записавшие данные в основную БД.
+
+    Пока реплика может отставать, их чтения идут в основную БД
+    (read-your-writes). Клиент определяется по заголовку
+    Authorization, учёт ведётся в памяти процесса.
+    """
+
+    def __init__(self, window: float, maxsize: int = 100_000) -> None:
+        self._writers = TTLCache(maxsize=maxsize, ttl=window)
+
+    @staticmethod
+    def _key(request: Request) -> Optional[str]:
+        credentials = request.headers.get("authorization")
+        if not credentials:
+            return None
+        return sha256(credentials.encode()).hexdigest()
+
+    def mark(self, request: Request) -> None:
+        key = self._key(request)
+        if key is not None:
+            self._writers[key] = True
+
+    def recent(self, request: Request) -> bool:
+        key = self._key(request)
+        return key is not None and key in self._writers
+
+    def clear(self) -> None:
+        self._writers.clear()
+
+
+recent_writers = RecentWriters(settings.read_your_writes_seconds)
+
+
+async def get_async_session(request: Request):
+    """
+    Сессия основной БД на время запроса.
+
+    Запросы на чтение (GET, HEAD, OPTIONS) получают соединение
+    из общего пула, остальные - соединение для записи.
+    Без режима SQLITE_WAL это один и тот же пул.
+    """
+    session_factory = (
+        ReadSessionLocal
+        if request.method in READ_METHODS
+        else AsyncSessionLocal
+    )
+    async with session_factory() as session:
+        yield session
+
+
+async def get_read_session(
+    request: Request,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Сессия для запросов только на чтение.
+
+    Если задан READ_REPLICA_URL, чтение идёт из реплики.
+    Клиент, недавно записавший данные, и все запросы без реплики
+    читают через сессию основной БД этого же запроса.
+    """
+    if ReplicaSessionLocal is None or recent_writers.recent(request):
         yield session
+        return
+    async with ReplicaSessionLocal() as replica_session:
+        yield replica_session
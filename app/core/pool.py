@@ -0,0 +1,101 @@
+import time
+from collections import deque
+from typing import Optional
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.config import settings
+
+# Сколько последних ожиданий соединения учитывать в процентилях
+WAIT_SAMPLES = 1_000
+
+
+class PoolStats:
+    """
+    Время ожидания соединения из пула.
+    """
+
+    def __init__(self) -> None:
+        self.waits = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.recent: deque = deque(maxlen=WAIT_SAMPLES)
+
+    def record(self, wait: float) -> None:
+        self.waits += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.recent.append(wait)
+
+    def percentile(self, rank: float) -> Optional[float]:
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        return ordered[min(int(rank / 100 * len(ordered)), len(ordered) - 1)]
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Очередь соединений, замеряющая ожидание свободного
+    соединения и число отказов по pool_timeout.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def snapshot(self) -> dict:
+        """
+        Текущее состояние пула и ожидания соединений.
+
+        :return: словарь для схемы PoolStatus
+        """
+        stats = self.stats
+
+        def milliseconds(value: Optional[float]) -> Optional[float]:
+            return None if value is None else round(value * 1000, 3)
+
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "idle": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow,
+            "timeout": self.timeout(),
+            "waits": stats.waits,
+            "timeouts": stats.timeouts,
+            "wait_avg_ms": milliseconds(
+                stats.total_wait / stats.waits if stats.waits else None
+            ),
+            "wait_p50_ms": milliseconds(stats.percentile(50)),
+            "wait_p99_ms": milliseconds(stats.percentile(99)),
+            "wait_max_ms": milliseconds(stats.max_wait),
+        }
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.timeouts += 1
+            raise
+        self.stats.record(time.perf_counter() - started)
+        return connection
+
+
+def pool_options() -> dict:
+    """
+    Параметры пула соединений движка из настроек.
+
+    :return: аргументы create_async_engine
+    """
+    return {
+        "poolclass": InstrumentedPool,
+        "pool_size": settings.pool_size,
+        "max_overflow": settings.pool_max_overflow,
+        "pool_timeout": settings.pool_timeout,
+        "pool_recycle": settings.pool_recycle,
+        "pool_pre_ping": settings.pool_pre_ping,
+    }
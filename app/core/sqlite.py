@@ -0,0 +1,57 @@
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.core.pool import pool_options
+
+
+def sqlite_pragmas() -> tuple[str, ...]:
+    """
+    PRAGMA режима SQLITE_WAL, выполняемые на каждом новом соединении.
+
+    WAL позволяет читать параллельно с записью, synchronous=NORMAL
+    в режиме WAL не теряет целостность БД при сбое, busy_timeout
+    заставляет ждать блокировку вместо ошибки database is locked.
+
+    :return: PRAGMA в порядке выполнения
+    """
+    return (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA busy_timeout={settings.sqlite_busy_timeout}",
+        f"PRAGMA mmap_size={settings.sqlite_mmap_size}",
+        f"PRAGMA cache_size={settings.sqlite_cache_size}",
+    )
+
+
+def apply_pragmas(engine: AsyncEngine) -> None:
+    """
+    Подключает выполнение sqlite_pragmas к каждому новому
+    соединению движка.
+
+    :param engine: движок SQLite
+    :return: None
+    """
+    pragmas = sqlite_pragmas()
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def writer_options() -> dict:
+    """
+    Параметры движка записи: одно соединение.
+
+    Очередь пула (asyncio) выдаёт его транзакциям записи по одной,
+    поэтому записи внутри процесса не конкурируют за блокировку
+    SQLite, а ждут своей очереди до POOL_TIMEOUT.
+
+    :return: аргументы create_async_engine
+    """
+    return {**pool_options(), "pool_size": 1, "max_overflow": 0}
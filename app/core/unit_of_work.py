@@ -0,0 +1,163 @@
+from contextlib import AsyncExitStack, asynccontextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+_current: ContextVar[Optional["UnitOfWork"]] = ContextVar(
+    "unit_of_work", default=None
+)
+
+
+class UnitOfWork:
+    """
+    Единица работы запроса.
+
+    Сессии, изменения которых отложены через commit(),
+    коммитятся один раз в конце блока unit_of_work или
+    откатываются, если блок завершился исключением.
+    Ресурсы из exit_stack (например, блокировка распределения)
+    освобождаются после коммита или отката, а after_commit
+    выполняются только после успешного коммита.
+    after_rollback выполняются после отката, но до освобождения
+    exit_stack, то есть ещё под блокировкой распределения.
+    """
+
+    def __init__(self) -> None:
+        self.sessions: list[AsyncSession] = []
+        self.exit_stack = AsyncExitStack()
+        self.after_commit: list[Callable[[], Awaitable[None]]] = []
+        self.after_rollback: list[Callable[[], None]] = []
+        self.closed = False
+
+    def enlist(self, session: AsyncSession) -> None:
+        if session not in self.sessions:
+            self.sessions.append(session)
+
+    async def commit(self) -> None:
+        for session in self.sessions:
+            await session.commit()
+
+    async def rollback(self) -> None:
+        for session in self.sessions:
+            await session.rollback()
+        for callback in self.after_rollback:
+            callback()
+
+    async def close(self) -> None:
+        self.closed = True
+        await self.exit_stack.aclose()
+
+
+def current_unit_of_work() -> Optional[UnitOfWork]:
+    """
+    Открытая единица работы текущей задачи или None.
+    """
+    unit = _current.get()
+    if unit is None or unit.closed:
+        return None
+    return unit
+
+
+@asynccontextmanager
+async def unit_of_work():
+    """
+    Открывает единицу работы: все изменения внутри блока
+    сохраняются одним коммитом в конце.
+
+    Сессии, отложившие коммит, должны оставаться открытыми
+    до выхода из блока: закрытие сессии откатывает
+    незакоммиченные изменения.
+    """
+    unit = UnitOfWork()
+    token = _current.set(unit)
+    try:
+        yield unit
+        await unit.commit()
+    except BaseException:
+        await unit.rollback()
+        raise
+    finally:
+        await unit.close()
+        _current.reset(token)
+    for callback in unit.after_commit:
+        await callback()
+
+
+async def commit(session: AsyncSession) -> None:
+    """
+    Завершает изменения сессии.
+
+    Внутри единицы работы изменения только отправляются
+    в БД (flush), а коммит выполнит сама единица работы.
+    Вне её (CLI, фоновые задачи) - обычный коммит.
+
+    :param session: сессия
+    :return: None
+    """
+    unit = current_unit_of_work()
+    if unit is None:
+        await session.commit()
+        return
+    unit.enlist(session)
+    await session.flush()
+
+
+async def commit_now(session: AsyncSession) -> None:
+    """
+    Промежуточный коммит, в том числе внутри единицы работы.
+
+    Нужен, только если изменения должны стать видны другим
+    соединениям до конца запроса. Нельзя вызывать под
+    allocation_lock в режиме SQLITE_WAL: коммит отдаёт
+    единственное соединение для записи, а блокировка процесса
+    остаётся у запроса, и фоновое распределение, получившее
+    это соединение, будет ждать блокировку, а запрос - соединение.
+
+    Переданные до него callback из on_commit выполняются сразу
+    после коммита: если единица работы затем откатится, они
+    уже не выполнились бы, а изменения уже видны.
+
+    :param session: сессия
+    :return: None
+    """
+    await session.commit()
+    unit = current_unit_of_work()
+    if unit is None:
+        return
+    callbacks, unit.after_commit = unit.after_commit, []
+    for callback in callbacks:
+        await callback()
+
+
+async def on_commit(callback: Callable[[], Awaitable[None]]) -> None:
+    """
+    Выполняет callback, когда изменения станут видны другим
+    соединениям: внутри единицы работы - после её коммита,
+    вне её - сразу (изменения уже закоммичены через commit()).
+    Повторно переданный callback выполняется один раз.
+
+    :param callback: корутинная функция без аргументов
+    :return: None
+    """
+    unit = current_unit_of_work()
+    if unit is None:
+        await callback()
+        return
+    if callback not in unit.after_commit:
+        unit.after_commit.append(callback)
+
+
+def on_rollback(callback: Callable[[], None]) -> None:
+    """
+    Выполняет callback, если изменения текущей единицы работы
+    будут откачены. Вне единицы работы изменения коммитятся
+    сразу, и callback не нужен. Повторно переданный callback
+    выполняется один раз.
+
+    :param callback: функция без аргументов
+    :return: None
+    """
+    unit = current_unit_of_work()
+    if unit is not None and callback not in unit.after_rollback:
+        unit.after_rollback.append(callback)
@@ -1,20 +1,49 @@
-from typing import Optional, Sequence
+from typing import AsyncIterator, Optional, Sequence
 
 from fastapi.encoders import jsonable_encoder
-from sqlalchemy import select
+from sqlalchemy import insert, inspect, select, text, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 
+from app.core.db import InvestmentBase, stored_date
+from app.core.unit_of_work import commit
 from app.models import User
+from app.models.fund_summary import open_remaining, summary_delta_for
+from app.models.table_version import mark_changed
+
+INSERT_CHUNK_SIZE = 100
+STREAM_CHUNK_SIZE = 1000
+# Не больше id в одном IN (...): у asyncpg и SQLite есть предел
+# числа параметров запроса
+IN_CHUNK_SIZE = 1000
 
 
 class BaseCRUD:
     """
     Базовые CRUD-методы
+
+    Методы записи завершаются через unit_of_work.commit:
+    внутри запроса изменения только отправляются в БД,
+    коммит выполняется один раз в конце запроса.
     """
 
     def __init__(self, model) -> None:
         self.model = model
 
+    @staticmethod
+    async def _loaded(db_obj, session: AsyncSession) -> object:
+        """
+        Возвращает записанный объект, перечитывая его только если
+        commit сбросил его состояние (expire_on_commit=True).
+
+        Значения по умолчанию вычисляются на стороне Python и
+        уходят в INSERT, id приходит из RETURNING или lastrowid,
+        поэтому после commit без сброса объект уже актуален.
+        """
+        if inspect(db_obj).expired_attributes:
+            await session.refresh(db_obj)
+        return db_obj
+
     async def get(
         self,
         object_id: int,
@@ -56,6 +85,95 @@ class BaseCRUD:
         db_objects = await session.execute(query)
         return db_objects.scalars().all()
 
+    async def get_page(
+        self,
+        session: AsyncSession,
+        limit: int,
+        after_id: Optional[int] = None,
+        filters: Optional[list] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> tuple[list, Optional[int]]:
+        """
+        Метод для постраничного получения объектов по возрастанию id.
+
+        Страница начинается сразу после after_id (keyset по первичному
+        ключу), поэтому время запроса не зависит от номера страницы.
+
+        :param session: сессия
+        :param limit: размер страницы
+        :param after_id: id последней записи предыдущей страницы
+        :param filters: список условий WHERE
+        :param columns: читать только эти колонки (должны включать id);
+            тогда вместо объектов модели возвращаются строки
+        :return: записи страницы и id последней из них,
+            если есть следующая страница
+        """
+        if columns:
+            query = select(*(getattr(self.model, name) for name in columns))
+        else:
+            query = select(self.model)
+        query = query.order_by(self.model.id).limit(limit + 1)
+        if after_id is not None:
+            query = query.where(self.model.id > after_id)
+        if filters:
+            query = query.where(*filters)
+
+        result = await session.execute(query)
+        db_objects = result.all() if columns else result.scalars().all()
+        if len(db_objects) <= limit:
+            return db_objects, None
+        db_objects = db_objects[:limit]
+        return db_objects, db_objects[-1].id
+
+    async def stream_all(
+        self,
+        session: AsyncSession,
+        after_id: Optional[int] = None,
+        filters: Optional[list] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> AsyncIterator[Sequence]:
+        """
+        Метод для потокового чтения всех строк по возрастанию id.
+
+        Строки читаются серверным курсором пачками по
+        STREAM_CHUNK_SIZE и не попадают в identity map сессии,
+        поэтому память не растёт с размером таблицы.
+
+        :param session: сессия
+        :param after_id: начать после записи с этим id
+        :param filters: список условий WHERE
+        :param columns: читать только эти колонки
+        :return: пачки строк (словари колонка -> значение)
+        """
+        table = self.model.__table__
+        query = (
+            select(*(table.c[name] for name in columns or table.c.keys()))
+            .order_by(table.c.id)
+            .execution_options(yield_per=STREAM_CHUNK_SIZE)
+        )
+        if after_id is not None:
+            query = query.where(table.c.id > after_id)
+        if filters:
+            query = query.where(*filters)
+
+        result = await session.stream(query)
+        async for partition in result.mappings().partitions(STREAM_CHUNK_SIZE):
+            yield partition
+
+    async def get_opened(self, session: AsyncSession) -> Sequence:
+        """
+        Метод для получения незакрытых объектов
+        в порядке их создания.
+
+        :param session: сессия
+        :return: записи из БД
+        """
+        return await self.get_all(
+            session,
+            filters=[self.model.fully_invested.is_(False)],
+            order_by=[self.model.create_date, self.model.id],
+        )
+
     async def create(
         self, input_obj, session: AsyncSession, user: Optional[User] = None
     ) -> object:
@@ -74,9 +192,137 @@ class BaseCRUD:
 
         db_obj = self.model(**input_obj_data)
         session.add(db_obj)
-        await session.commit()
-        await session.refresh(db_obj)
-        return db_obj
+        await commit(session)
+        return await self._loaded(db_obj, session)
+
+    def _with_defaults(self, data: dict) -> dict:
+        """
+        Дополняет данные строки значениями по умолчанию
+        из описания колонок модели.
+        """
+        for column in self.model.__table__.columns:
+            if column.key in data or column.default is None:
+                continue
+            default = column.default
+            data[column.key] = (
+                default.arg(None) if default.is_callable else default.arg
+            )
+        return data
+
+    async def _insert_rows(
+        self, rows: list[dict], session: AsyncSession
+    ) -> list[int]:
+        """
+        Вставляет строки многострочными INSERT
+        по INSERT_CHUNK_SIZE строк.
+
+        Id новых строк берутся из RETURNING, если диалект его
+        поддерживает. Иначе (SQLite) - из lastrowid: строки одного
+        INSERT под блокировкой записи получают подряд идущие rowid.
+        """
+        table = self.model.__table__
+        returning = session.get_bind().dialect.full_returning
+        ids = []
+        for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+            chunk = rows[start : start + INSERT_CHUNK_SIZE]
+            query = insert(table).values(chunk)
+            if returning:
+                result = await session.execute(query.returning(table.c.id))
+                ids.extend(result.scalars().all())
+            else:
+                result = await session.execute(query)
+                ids.extend(
+                    range(
+                        result.lastrowid - len(chunk) + 1, result.lastrowid + 1
+                    )
+                )
+        return ids
+
+    async def _copy_rows(
+        self, rows: list[dict], session: AsyncSession
+    ) -> list[int]:
+        """
+        Загружает строки одной командой COPY (PostgreSQL, asyncpg).
+
+        COPY не возвращает значений, поэтому id выделяются заранее
+        из последовательности таблицы. Этот запрос идёт через сессию
+        и открывает транзакцию, так что COPY выполняется в ней же.
+        """
+        table = self.model.__table__
+        result = await session.execute(
+            text(
+                "SELECT nextval(pg_get_serial_sequence(:table, 'id')) "
+                "FROM generate_series(1, :count)"
+            ),
+            {"table": table.fullname, "count": len(rows)},
+        )
+        ids = result.scalars().all()
+        columns = list(rows[0])
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            table.name,
+            schema_name=table.schema,
+            columns=["id", *columns],
+            records=[
+                (id_, *(row[column] for column in columns))
+                for id_, row in zip(ids, rows)
+            ],
+        )
+        mark_changed(session.sync_session, table.name)
+        return ids
+
+    async def create_many(
+        self,
+        input_objs: Sequence,
+        session: AsyncSession,
+        user: Optional[User] = None,
+    ) -> list:
+        """
+        Метод для добавления множества записей в БД
+        одним коммитом.
+
+        На PostgreSQL (asyncpg) строки загружаются командой COPY,
+        на остальных СУБД - многострочными INSERT.
+        Вставка идёт мимо ORM, поэтому сводные счётчики фонда
+        сдвигаются здесь же, в той же транзакции.
+
+        :param input_objs: входящие объекты
+        :param session: сессия
+        :param user: пользователь
+        :return: созданные объекты (не привязаны к сессии)
+        """
+        rows = []
+        for input_obj in input_objs:
+            data = input_obj.dict()
+            if user is not None:
+                data["user_id"] = user.id
+            rows.append(self._with_defaults(data))
+
+        if rows and session.get_bind().dialect.driver == "asyncpg":
+            ids = await self._copy_rows(rows, session)
+        else:
+            ids = await self._insert_rows(rows, session)
+        if issubclass(self.model, InvestmentBase):
+            await session.execute(
+                summary_delta_for(
+                    self.model,
+                    sum(
+                        row["full_amount"] - row["invested_amount"]
+                        for row in rows
+                        if not row["fully_invested"]
+                    ),
+                )
+            )
+        await commit(session)
+
+        # Даты - как их вернёт БД, иначе они не сравнимы с прочитанными
+        dialect = session.get_bind().dialect
+        for row in rows:
+            for key in ("create_date", "close_date"):
+                if key in row:
+                    row[key] = stored_date(row[key], dialect)
+        return [self.model(id=id_, **row) for id_, row in zip(ids, rows)]
 
     async def update(
         self,
@@ -100,9 +346,62 @@ class BaseCRUD:
                 setattr(db_obj, field, update_data[field])
 
         session.add(db_obj)
-        await session.commit()
-        await session.refresh(db_obj)
-        return db_obj
+        await commit(session)
+        return await self._loaded(db_obj, session)
+
+    async def update_many(
+        self,
+        db_objs: Sequence,
+        input_obj,
+        session: AsyncSession,
+    ) -> Sequence:
+        """
+        Метод для обновления нескольких записей одинаковыми
+        значениями: UPDATE ... WHERE id IN (...) на каждые
+        IN_CHUNK_SIZE записей и один коммит.
+
+        UPDATE идёт мимо ORM, поэтому новые значения сразу
+        записываются в объекты (они должны быть загружены),
+        а сводные счётчики фонда сдвигаются здесь же
+        по прежним значениям объектов.
+
+        :param db_objs: объекты из БД
+        :param input_obj: входящий объект
+        :param session: сессия
+        :return: обновленные объекты
+        """
+        update_data = input_obj.dict(exclude_unset=True)
+        if not db_objs or not update_data:
+            return db_objs
+
+        table = self.model.__table__
+        tracked = issubclass(self.model, InvestmentBase)
+        before = self._open_total(db_objs) if tracked else 0
+        ids = [obj.id for obj in db_objs]
+        for start in range(0, len(ids), IN_CHUNK_SIZE):
+            await session.execute(
+                update(table)
+                .where(table.c.id.in_(ids[start : start + IN_CHUNK_SIZE]))
+                .values(**update_data)
+            )
+        for obj in db_objs:
+            for field, value in update_data.items():
+                set_committed_value(obj, field, value)
+        if tracked:
+            delta = self._open_total(db_objs) - before
+            if delta:
+                await session.execute(summary_delta_for(self.model, delta))
+        await commit(session)
+        return db_objs
+
+    @staticmethod
+    def _open_total(db_objs: Sequence) -> int:
+        return sum(
+            open_remaining(
+                obj.full_amount, obj.invested_amount, obj.fully_invested
+            )
+            for obj in db_objs
+        )
 
     async def delete(
         self,
@@ -117,7 +416,7 @@ class BaseCRUD:
         :return: удаленный объект из БД
         """
         await session.delete(db_obj)
-        await session.commit()
+        await commit(session)
         return db_obj
 
     async def save(self, db_obj, session: AsyncSession) -> object:
@@ -129,9 +428,8 @@ class BaseCRUD:
         :return: сохранённый объект из БД
         """
         session.add(db_obj)
-        await session.commit()
-        await session.refresh(db_obj)
-        return db_obj
+        await commit(session)
+        return await self._loaded(db_obj, session)
 
     async def save_many(self, session: AsyncSession, *db_objs) -> None:
         """
@@ -144,4 +442,4 @@ class BaseCRUD:
         """
         for obj in db_objs:
             session.add(obj)
-        await session.commit()
+        await commit(session)
@@ -2,9 +2,11 @@ from datetime import datetime, timezone
 from typing import Optional
 
 from fastapi.encoders import jsonable_encoder
-from sqlalchemy import extract, select
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.sql import days_between
+from app.core.unit_of_work import commit
 from app.crud.base import BaseCRUD
 from app.models.charity_project import CharityProject
 
@@ -32,6 +34,17 @@ class ProjectCRUD(BaseCRUD):
         )
         return db_id.scalars().first()
 
+    async def get_names(self, session: AsyncSession) -> set[str]:
+        """
+        Метод для получения имён всех проектов
+        одним запросом.
+
+        :param session: сессия
+        :return: множество имён
+        """
+        names = await session.execute(select(CharityProject.name))
+        return set(names.scalars().all())
+
     async def update(
             self, db_obj, input_obj, session: AsyncSession
     ) -> Optional[int]:
@@ -62,9 +75,8 @@ class ProjectCRUD(BaseCRUD):
             db_obj.close_date = datetime.now(timezone.utc)
 
         session.add(db_obj)
-        await session.commit()
-        await session.refresh(db_obj)
-        return db_obj
+        await commit(session)
+        return await self._loaded(db_obj, session)
 
     async def get_projects_by_completion_rate(
         self,
@@ -79,11 +91,7 @@ class ProjectCRUD(BaseCRUD):
         :return: список словарей с данными
         """
         cp = CharityProject
-
-        y = extract("year", cp.close_date) - extract("year", cp.create_date)
-        m = extract("month", cp.close_date) - extract("month", cp.create_date)
-        d = extract("day", cp.close_date) - extract("day", cp.create_date)
-        duration = y * 365 + m * 30 + d
+        duration = days_between(cp.create_date, cp.close_date)
 
         query = (
             select(cp, duration)
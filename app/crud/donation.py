@@ -1,9 +1,10 @@
 from typing import Sequence
 
+from sqlalchemy import func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from app.crud.base import BaseCRUD
+from app.crud.base import IN_CHUNK_SIZE, BaseCRUD
 from app.models import Donation, User
 
 
@@ -26,5 +27,27 @@ class DonationCRUD(BaseCRUD):
         )
         return donations.scalars().all()
 
+    async def get_invested_total(
+        self, donation_ids: Sequence[int], session: AsyncSession
+    ) -> int:
+        """
+        Метод возвращает распределённую сумму
+        по списку пожертвований, читая её по IN_CHUNK_SIZE id.
+
+        :param donation_ids: id пожертвований
+        :param session: сессия
+        :return: сумма invested_amount
+        """
+        total = 0
+        for start in range(0, len(donation_ids), IN_CHUNK_SIZE):
+            chunk = donation_ids[start : start + IN_CHUNK_SIZE]
+            result = await session.execute(
+                select(
+                    func.coalesce(func.sum(Donation.invested_amount), 0)
+                ).where(Donation.id.in_(chunk))
+            )
+            total += result.scalar_one()
+        return total
+
 
 donation_crud = DonationCRUD(Donation)
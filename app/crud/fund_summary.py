@@ -0,0 +1,67 @@
+from typing import Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import CharityProject, Donation, FundSummary
+from app.models.fund_summary import SUMMARY_ID
+
+
+class FundSummaryCRUD:
+    """
+    CRUD-методы для сводных счётчиков фонда
+    """
+
+    async def get(self, session: AsyncSession) -> Optional[Row]:
+        """
+        Метод возвращает текущие значения счётчиков.
+
+        Счётчики читаются запросом к таблице, а не через объект
+        сессии: их меняют UPDATE без участия ORM.
+
+        :param session: сессия
+        :return: строка с open_project_deficit
+            и unspent_donation_balance
+        """
+        table = FundSummary.__table__
+        counters = await session.execute(
+            select(
+                table.c.open_project_deficit,
+                table.c.unspent_donation_balance,
+            ).where(table.c.id == SUMMARY_ID)
+        )
+        return counters.first()
+
+    async def recount(self, session: AsyncSession) -> None:
+        """
+        Метод пересчитывает счётчики по таблицам проектов
+        и пожертвований без коммита.
+
+        :param session: сессия
+        :return: None
+        """
+        table = FundSummary.__table__
+        await session.execute(
+            update(table)
+            .where(table.c.id == SUMMARY_ID)
+            .values(
+                open_project_deficit=self._open_total(CharityProject),
+                unspent_donation_balance=self._open_total(Donation),
+            )
+        )
+
+    @staticmethod
+    def _open_total(model):
+        return (
+            select(
+                func.coalesce(
+                    func.sum(model.full_amount - model.invested_amount), 0
+                )
+            )
+            .where(model.fully_invested.is_(False))
+            .scalar_subquery()
+        )
+
+
+fund_summary_crud = FundSummaryCRUD()
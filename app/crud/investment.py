@@ -0,0 +1,79 @@
+from typing import AsyncIterator, Sequence
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.base import BaseCRUD
+from app.models import CharityProject, Donation, Investment, User
+
+
+class InvestmentCRUD(BaseCRUD):
+    """
+    CRUD-методы для журнала распределений
+    """
+
+    async def append(self, session: AsyncSession, rows: list[dict]) -> None:
+        """
+        Метод добавляет записи в журнал одним INSERT без коммита.
+
+        :param session: сессия
+        :param rows: словари с полями donation_id, project_id,
+            amount, create_date
+        :return: None
+        """
+        if rows:
+            await session.execute(insert(Investment.__table__), rows)
+
+    async def get_by_user(self, session: AsyncSession, user: User) -> Sequence:
+        """
+        Метод возвращает распределения всех донатов пользователя.
+
+        :param session: сессия
+        :param user: пользователь
+        :return: записи из БД
+        """
+        investments = await session.execute(
+            select(Investment)
+            .join(Donation, Investment.donation_id == Donation.id)
+            .where(Donation.user_id == user.id)
+            .order_by(Investment.id)
+        )
+        return investments.scalars().all()
+
+    async def stream_ledger_drift(
+        self, session: AsyncSession, model
+    ) -> AsyncIterator:
+        """
+        Метод сверяет invested_amount записей модели с суммами
+        по журналу и возвращает расхождения потоком.
+
+        :param session: сессия
+        :param model: CharityProject или Donation
+        :return: строки (id, invested_amount, сумма по журналу)
+        """
+        table = model.__table__
+        column = (
+            Investment.project_id
+            if model is CharityProject
+            else Investment.donation_id
+        )
+        ledger = (
+            select(
+                column.label("id"),
+                func.sum(Investment.amount).label("total"),
+            )
+            .group_by(column)
+            .subquery()
+        )
+        total = func.coalesce(ledger.c.total, 0)
+        result = await session.stream(
+            select(table.c.id, table.c.invested_amount, total)
+            .outerjoin(ledger, ledger.c.id == table.c.id)
+            .where(table.c.invested_amount != total)
+            .order_by(table.c.id)
+        )
+        async for row in result:
+            yield row
+
+
+investment_crud = InvestmentCRUD(Investment)
@@ -0,0 +1,31 @@
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import TableVersion
+
+
+class TableVersionCRUD:
+    """
+    CRUD-методы для счётчиков изменений таблиц
+    """
+
+    async def get(self, model, session: AsyncSession) -> Optional[int]:
+        """
+        Метод возвращает версию таблицы модели.
+
+        Версия читается запросом к таблице: её меняют UPDATE
+        без участия ORM.
+
+        :param model: модель из VERSIONED_TABLES
+        :param session: сессия
+        :return: номер версии или None, если строки нет
+        """
+        table = TableVersion.__table__
+        return await session.scalar(
+            select(table.c.version).where(table.c.name == model.__tablename__)
+        )
+
+
+table_version_crud = TableVersionCRUD()
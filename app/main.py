@@ -2,6 +2,9 @@ from fastapi import FastAPI
 
 from app.api.routers import main_router
 from app.core.config import settings
+from app.core.db import AsyncSessionLocal
+from app.services.allocation_cache import allocation_cache
+from app.services.allocation_worker import allocation_worker
 
 app = FastAPI(
     title=settings.app_title,
@@ -9,3 +12,17 @@ app = FastAPI(
 )
 
 app.include_router(main_router)
+
+
+@app.on_event("startup")
+async def start_allocation():
+    if settings.allocation_cache:
+        async with AsyncSessionLocal() as session:
+            await allocation_cache.rebuild(session)
+    if settings.allocation_background:
+        allocation_worker.start()
+
+
+@app.on_event("shutdown")
+async def stop_allocation():
+    await allocation_worker.stop()
@@ -1,9 +1,15 @@
 from app.models.charity_project import CharityProject
 from app.models.donation import Donation
+from app.models.fund_summary import FundSummary
+from app.models.investment import Investment
+from app.models.table_version import TableVersion
 from app.models.user import User
 
 __all__ = [
     "CharityProject",
     "Donation",
+    "FundSummary",
+    "Investment",
+    "TableVersion",
     "User",
 ]
@@ -29,5 +29,6 @@ class Donation(InvestmentBase):
         Integer,
         ForeignKey("user.id", name="fk_donation_user_id_user"),
         nullable=True,
+        index=True,
         comment="id пользователя",
     )
@@ -0,0 +1,168 @@
+from typing import Optional
+
+from sqlalchemy import DDL, BigInteger, Column, event, inspect, select, update
+from sqlalchemy.orm import Mapped, Session
+
+from app.core.db import Base, CommonMixin, InvestmentBase
+from app.models.charity_project import CharityProject
+
+SUMMARY_ID = 1
+_TRACKED = ("full_amount", "invested_amount", "fully_invested")
+
+
+class FundSummary(CommonMixin, Base):
+    """
+    Модель, описывающая сводные счётчики фонда.
+
+    Единственная строка (id=1) хранит суммарную недостачу открытых
+    проектов и суммарный нераспределённый остаток пожертвований.
+    Счётчики меняются в той же транзакции, что и сами записи.
+    """
+
+    __tablename__ = "fundsummary"
+
+    open_project_deficit: Mapped[int] = Column(
+        BigInteger,
+        nullable=False,
+        default=0,
+        comment="Сумма, недостающая открытым проектам",
+    )
+    unspent_donation_balance: Mapped[int] = Column(
+        BigInteger,
+        nullable=False,
+        default=0,
+        comment="Нераспределённый остаток пожертвований",
+    )
+
+
+event.listen(
+    FundSummary.__table__,
+    "after_create",
+    DDL(
+        "INSERT INTO fundsummary "
+        "(id, open_project_deficit, unspent_donation_balance) "
+        f"VALUES ({SUMMARY_ID}, 0, 0)"
+    ),
+)
+
+
+def summary_delta(projects: int = 0, donations: int = 0):
+    """
+    UPDATE, сдвигающий счётчики на заданные суммы.
+
+    :param projects: изменение недостачи открытых проектов
+    :param donations: изменение остатка пожертвований
+    :return: UPDATE для fundsummary
+    """
+    table = FundSummary.__table__
+    return (
+        update(table)
+        .where(table.c.id == SUMMARY_ID)
+        .values(
+            open_project_deficit=table.c.open_project_deficit + projects,
+            unspent_donation_balance=(
+                table.c.unspent_donation_balance + donations
+            ),
+        )
+    )
+
+
+def summary_delta_for(model, amount: int):
+    """
+    UPDATE, сдвигающий счётчик модели (проекты или пожертвования).
+    """
+    if model is CharityProject:
+        return summary_delta(projects=amount)
+    return summary_delta(donations=amount)
+
+
+def open_remaining(full_amount, invested_amount, fully_invested) -> int:
+    """
+    Недостача открытого проекта или остаток открытого пожертвования.
+    """
+    if fully_invested or full_amount is None:
+        return 0
+    return full_amount - (invested_amount or 0)
+
+
+def _tracked_histories(obj: InvestmentBase) -> list:
+    state = inspect(obj)
+    return [state.attrs[key].history for key in _TRACKED]
+
+
+def _old_values(obj: InvestmentBase) -> Optional[tuple]:
+    """
+    Значения отслеживаемых полей до flush или None,
+    если они не загружены (истёкший объект).
+    """
+    state = inspect(obj)
+    values = []
+    for key, history in zip(_TRACKED, _tracked_histories(obj)):
+        if history.deleted:
+            values.append(history.deleted[0])
+        elif history.unchanged:
+            values.append(history.unchanged[0])
+        elif key not in state.unloaded and not history.added:
+            values.append(getattr(obj, key))
+        else:
+            return None
+    return tuple(values)
+
+
+def _changed(session: Session):
+    """
+    Изменённые и удаляемые проекты и пожертвования сессии.
+    Изменения без отслеживаемых полей пропускаются.
+    """
+    for obj in session.dirty:
+        if isinstance(obj, InvestmentBase) and any(
+            history.has_changes() for history in _tracked_histories(obj)
+        ):
+            yield obj
+    for obj in session.deleted:
+        if isinstance(obj, InvestmentBase):
+            yield obj
+
+
+@event.listens_for(Session, "before_flush")
+def _remember_old_values(session, flush_context, instances) -> None:
+    """
+    Запоминает изменяемые записи и их прежние значения;
+    незагруженные значения (истёкший объект) читаются из БД.
+    """
+    changed = session.info["fund_summary_changed"] = []
+    with session.no_autoflush:
+        for obj in _changed(session):
+            values = _old_values(obj)
+            if values is None:
+                table = obj.__table__
+                values = session.execute(
+                    select(*(table.c[key] for key in _TRACKED)).where(
+                        table.c.id == inspect(obj).identity[0]
+                    )
+                ).one()
+            changed.append((obj, tuple(values)))
+
+
+@event.listens_for(Session, "after_flush")
+def _update_summary(session, flush_context) -> None:
+    """
+    Сдвигает счётчики на изменения записей, сохранённых этим flush.
+    """
+    changed = session.info.pop("fund_summary_changed", [])
+    changed.extend(
+        (obj, None) for obj in session.new if isinstance(obj, InvestmentBase)
+    )
+    projects = donations = 0
+    for obj, old_values in changed:
+        delta = 0
+        if obj not in session.deleted:
+            delta += open_remaining(*(getattr(obj, key) for key in _TRACKED))
+        if old_values is not None:
+            delta -= open_remaining(*old_values)
+        if isinstance(obj, CharityProject):
+            projects += delta
+        else:
+            donations += delta
+    if projects or donations:
+        session.execute(summary_delta(projects, donations))
@@ -0,0 +1,45 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, ForeignKey, Integer
+from sqlalchemy.orm import Mapped
+
+from app.core.db import Base, CommonMixin, UTCDateTime
+
+
+class Investment(CommonMixin, Base):
+    """
+    Модель, описывающая перевод средств пожертвования в проект.
+
+    Записи только добавляются: одна строка на каждую сумму,
+    распределённую из пожертвования в проект.
+    """
+
+    __tablename__ = "investment"
+
+    donation_id: Mapped[int] = Column(
+        Integer,
+        ForeignKey("donation.id", name="fk_investment_donation_id_donation"),
+        nullable=False,
+        index=True,
+        comment="id пожертвования",
+    )
+    project_id: Mapped[int] = Column(
+        Integer,
+        ForeignKey(
+            "charityproject.id", name="fk_investment_project_id_charityproject"
+        ),
+        nullable=False,
+        index=True,
+        comment="id проекта",
+    )
+    amount: Mapped[int] = Column(
+        Integer,
+        nullable=False,
+        comment="Распределённая сумма",
+    )
+    create_date: Mapped[datetime] = Column(
+        UTCDateTime,
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+        comment="Дата распределения",
+    )
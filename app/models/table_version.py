@@ -0,0 +1,112 @@
+from sqlalchemy import DDL, BigInteger, Column, String, event, update
+from sqlalchemy.orm import Mapped, Session
+from sqlalchemy.sql.dml import UpdateBase
+
+from app.core.db import Base
+
+# Таблицы, версии которых отдаются в ETag списков
+VERSIONED_TABLES = ("charityproject", "donation")
+
+
+class TableVersion(Base):
+    """
+    Модель, описывающая счётчики изменений таблиц.
+
+    Строка таблицы из VERSIONED_TABLES увеличивает версию
+    на единицу при коммите каждой транзакции, изменившей эту
+    таблицу, поэтому версия дешёво отвечает на вопрос
+    "изменилось ли что-нибудь" без чтения самих записей.
+    """
+
+    __tablename__ = "tableversion"
+
+    name: Mapped[str] = Column(
+        String(64),
+        primary_key=True,
+        comment="Имя таблицы",
+    )
+    version: Mapped[int] = Column(
+        BigInteger,
+        nullable=False,
+        default=0,
+        comment="Число транзакций, изменивших таблицу",
+    )
+
+
+event.listen(
+    TableVersion.__table__,
+    "after_create",
+    DDL(
+        "INSERT INTO tableversion (name, version) VALUES {}".format(
+            ", ".join(f"('{name}', 0)" for name in VERSIONED_TABLES)
+        )
+    ),
+)
+
+
+def mark_changed(session: Session, *tables: str) -> None:
+    """
+    Отмечает таблицы, изменённые текущей транзакцией сессии
+    в обход ORM и SQLAlchemy (например, командой COPY).
+
+    :param session: синхронная сессия (AsyncSession.sync_session)
+    :param tables: имена таблиц
+    :return: None
+    """
+    session.info.setdefault("changed_tables", set()).update(
+        name for name in tables if name in VERSIONED_TABLES
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _flushed_tables(session, flush_context) -> None:
+    """
+    Запоминает таблицы записей, добавленных, изменённых
+    и удалённых этим flush.
+    """
+    modified = (obj for obj in session.dirty if session.is_modified(obj))
+    mark_changed(
+        session,
+        *(
+            obj.__table__.name
+            for obj in (*session.new, *session.deleted, *modified)
+        ),
+    )
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _executed_tables(orm_execute_state) -> None:
+    """
+    Запоминает таблицу INSERT, UPDATE или DELETE,
+    выполненного через session.execute.
+    """
+    statement = orm_execute_state.statement
+    if isinstance(statement, UpdateBase):
+        mark_changed(orm_execute_state.session, statement.table.name)
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_versions(session) -> None:
+    """
+    Увеличивает версии изменённых таблиц одним UPDATE
+    в той же транзакции перед коммитом.
+    """
+    session.flush()
+    changed = session.info.pop("changed_tables", None)
+    if not changed:
+        return
+    table = TableVersion.__table__
+    session.execute(
+        update(table)
+        .where(table.c.name.in_(sorted(changed)))
+        .values(version=table.c.version + 1)
+    )
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _forget_tables(session, transaction) -> None:
+    """
+    Откаченные изменения не меняют версий.
+    """
+    if transaction.parent is None:
+        session.info.pop("changed_tables", None)
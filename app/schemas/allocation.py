@@ -0,0 +1,187 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field, NonNegativeInt, PositiveInt
+
+DESC_CONSISTENT = "Совпадали ли очереди в памяти с БД"
+DESC_PROJECTS = "Число открытых проектов в очереди"
+DESC_DONATIONS = "Число открытых пожертвований в очереди"
+DESC_REQUESTED = "Номер последней заявки на распределение"
+DESC_APPLIED = "Номер последней выполненной заявки"
+DESC_STATUS = "Статус заявки: pending или applied"
+DESC_NEW_PROJECTS = "Суммы гипотетических новых проектов"
+DESC_NEW_DONATIONS = "Суммы гипотетических новых пожертвований"
+DESC_ALLOCATED = "Сумма, которая будет распределена"
+DESC_ROW_AMOUNT = "Сумма, которую получит проект или отдаст пожертвование"
+DESC_ROW_CLOSED = "Будет ли запись закрыта"
+DESC_ROW_ID = "Id существующей записи"
+DESC_REQUEST_INDEX = "Номер гипотетической записи в запросе"
+DESC_SIMULATED_PROJECTS = "Проекты, которые получат средства"
+DESC_SIMULATED_DONATIONS = "Пожертвования, средства которых будут распределены"
+DESC_OPEN_DEFICIT = "Сумма, недостающая открытым проектам"
+DESC_UNSPENT_BALANCE = "Нераспределённый остаток пожертвований"
+EXAMPLE_COUNT = "3"
+EXAMPLE_STATUS = "applied"
+EXAMPLE_AMOUNTS = [5000]
+EXAMPLE_AMOUNT = "1000"
+EXAMPLE_ID = "1"
+EXAMPLE_INDEX = "0"
+
+
+class CacheVerifyResponse(BaseModel):
+    """
+    Схема ответа сверки очередей распределения с БД
+    """
+
+    consistent: bool = Field(
+        ...,
+        json_schema_extra={"description": DESC_CONSISTENT},
+    )
+
+    projects: NonNegativeInt = Field(
+        ...,
+        json_schema_extra={
+            "description": DESC_PROJECTS,
+            "example": EXAMPLE_COUNT,
+        },
+    )
+
+    donations: NonNegativeInt = Field(
+        ...,
+        json_schema_extra={
+            "description": DESC_DONATIONS,
+            "example": EXAMPLE_COUNT,
+        },
+    )
+
+
+class AllocationStatus(BaseModel):
+    """
+    Схема ответа о состоянии фонового распределения
+    """
+
+    requested: NonNegativeInt = Field(
+        ...,
+        json_schema_extra={
+            "description": DESC_REQUESTED,
+            "example": EXAMPLE_COUNT,
+        },
+    )
+
+    applied: NonNegativeInt = Field(
+        ...,
+        json_schema_extra={
+            "description": DESC_APPLIED,
+            "example": EXAMPLE_COUNT,
+        },
+    )
+
+    status: Optional[str] = Field(
+        None,
+        json_schema_extra={
+            "description": DESC_STATUS,
+            "example": EXAMPLE_STATUS,
+        },
+    )
+
+
+class AllocationSimulationRequest(BaseModel):
+    """
+    Схема гипотетических изменений для пробного распределения
+    """
+
+    projects: list[PositiveInt] = Field(
+        [],
+        json_schema_extra={
+            "description": DESC_NEW_PROJECTS,
+            "example": EXAMPLE_AMOUNTS,
+        },
+    )
+
+    donations: list[PositiveInt] = Field(
+        [],
+        json_schema_extra={
+            "description": DESC_NEW_DONATIONS,
+            "example": EXAMPLE_AMOUNTS,
+        },
+    )
+
+
+class SimulatedAllocation(BaseModel):
+    """
+    Схема записи, участвующей в пробном распределении
+    """
+
+    amount: PositiveInt = Field(
+        ...,
+        json_schema_extra={
+            "description": DESC_ROW_AMOUNT,
+            "example": EXAMPLE_AMOUNT,
+        },
+    )
+
+    fully_invested: bool = Field(
+        ...,
+        json_schema_extra={"description": DESC_ROW_CLOSED},
+    )
+
+    id: Optional[int] = Field(
+        None,
+        json_schema_extra={
+            "description": DESC_ROW_ID,
+            "example": EXAMPLE_ID,
+        },
+    )
+
+    request_index: Optional[int] = Field(
+        None,
+        json_schema_extra={
+            "description": DESC_REQUEST_INDEX,
+            "example": EXAMPLE_INDEX,
+        },
+    )
+
+
+class AllocationSimulationResponse(BaseModel):
+    """
+    Схема ответа пробного распределения
+    """
+
+    allocated: NonNegativeInt = Field(
+        ...,
+        json_schema_extra={
+            "description": DESC_ALLOCATED,
+            "example": EXAMPLE_AMOUNT,
+        },
+    )
+
+    projects: list[SimulatedAllocation] = Field(
+        ...,
+        json_schema_extra={"description": DESC_SIMULATED_PROJECTS},
+    )
+
+    donations: list[SimulatedAllocation] = Field(
+        ...,
+        json_schema_extra={"description": DESC_SIMULATED_DONATIONS},
+    )
+
+
+class FundStatus(BaseModel):
+    """
+    Схема ответа о сводном состоянии фонда
+    """
+
+    open_project_deficit: int = Field(
+        ...,
+        json_schema_extra={
+            "description": DESC_OPEN_DEFICIT,
+            "example": EXAMPLE_AMOUNT,
+        },
+    )
+
+    unspent_donation_balance: int = Field(
+        ...,
+        json_schema_extra={
+            "description": DESC_UNSPENT_BALANCE,
+            "example": EXAMPLE_AMOUNT,
+        },
+    )
@@ -1,6 +1,6 @@
-from typing import Optional
+from typing import Any, Optional
 
-from pydantic import BaseModel, Field, PositiveInt
+from pydantic import BaseModel, Field, NonNegativeInt, PositiveInt
 
 from app.schemas.base import DBInfo
 
@@ -14,6 +14,11 @@ EXAMPLE_NAME = "Помощь котикам"
 EXAMPLE_DESCRIPTION = "На корм для котиков"
 EXAMPLE_FULL_AMOUNT_CREATE = "1000"
 EXAMPLE_FULL_AMOUNT_UPDATE = "2000"
+DESC_CREATED = "Число созданных проектов"
+DESC_SKIPPED = "Число пропущенных строк"
+DESC_ERRORS = "Первые ошибки импорта с номерами строк"
+EXAMPLE_CREATED = "1000"
+EXAMPLE_SKIPPED = "2"
 
 
 class CharityProjectBase(BaseModel):
@@ -97,3 +102,39 @@ class CharityProjectUpdate(BaseModel):
 
     class Config:
         extra = "forbid"
+
+
+class ProjectImportError(BaseModel):
+    """
+    Ошибка в строке импорта
+    """
+
+    line: PositiveInt
+    detail: Any
+
+
+class CharityProjectImportResponse(BaseModel):
+    """
+    Схема ответа для импорта проектов
+    """
+
+    created: NonNegativeInt = Field(
+        ...,
+        json_schema_extra={
+            "description": DESC_CREATED,
+            "example": EXAMPLE_CREATED,
+        },
+    )
+
+    skipped: NonNegativeInt = Field(
+        ...,
+        json_schema_extra={
+            "description": DESC_SKIPPED,
+            "example": EXAMPLE_SKIPPED,
+        },
+    )
+
+    errors: list[ProjectImportError] = Field(
+        ...,
+        json_schema_extra={"description": DESC_ERRORS},
+    )
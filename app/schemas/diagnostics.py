@@ -0,0 +1,157 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field, NonNegativeFloat, NonNegativeInt
+
+DESC_NAME = "Пул: primary, writer (запись в режиме SQLite WAL) или replica"
+DESC_SIZE = "Постоянный размер пула"
+DESC_CHECKED_OUT = "Соединения, занятые запросами"
+DESC_IDLE = "Свободные соединения в пуле"
+DESC_OVERFLOW = "Соединения сверх размера пула"
+DESC_MAX_OVERFLOW = "Допустимое число соединений сверх размера пула"
+DESC_TIMEOUT = "Сколько секунд запрос ждёт свободное соединение"
+DESC_WAITS = "Число выдач соединения с запуска"
+DESC_TIMEOUTS = "Число отказов по истечении ожидания"
+DESC_WAIT_AVG = "Среднее ожидание соединения, мс"
+DESC_WAIT_P50 = "Медиана ожидания по последним выдачам, мс"
+DESC_WAIT_P99 = "99-й процентиль ожидания по последним выдачам, мс"
+DESC_WAIT_MAX = "Наибольшее ожидание соединения, мс"
+DESC_CACHE_ENABLED = "Включён ли кэш (PROJECTS_CACHE)"
+DESC_CACHE_TTL = "Срок жизни страницы в кэше, секунды"
+DESC_CACHE_HITS = "Ответов из кэша с запуска"
+DESC_CACHE_MISSES = "Ответов, прочитанных из БД, с запуска"
+DESC_CACHE_HIT_RATIO = "Доля ответов из кэша"
+DESC_CACHE_INVALIDATIONS = "Сбросов кэша после записи и распределения"
+EXAMPLE_NAME = "primary"
+EXAMPLE_COUNT = "5"
+EXAMPLE_MS = "0.05"
+
+
+class PoolStatus(BaseModel):
+    """
+    Схема ответа о состоянии пула соединений
+    """
+
+    name: str = Field(
+        ...,
+        json_schema_extra={
+            "description": DESC_NAME,
+            "example": EXAMPLE_NAME,
+        },
+    )
+
+    size: NonNegativeInt = Field(
+        ...,
+        json_schema_extra={
+            "description": DESC_SIZE,
+            "example": EXAMPLE_COUNT,
+        },
+    )
+
+    checked_out: NonNegativeInt = Field(
+        ...,
+        json_schema_extra={"description": DESC_CHECKED_OUT},
+    )
+
+    idle: NonNegativeInt = Field(
+        ...,
+        json_schema_extra={"description": DESC_IDLE},
+    )
+
+    overflow: NonNegativeInt = Field(
+        ...,
+        json_schema_extra={"description": DESC_OVERFLOW},
+    )
+
+    max_overflow: int = Field(
+        ...,
+        json_schema_extra={"description": DESC_MAX_OVERFLOW},
+    )
+
+    timeout: NonNegativeFloat = Field(
+        ...,
+        json_schema_extra={"description": DESC_TIMEOUT},
+    )
+
+    waits: NonNegativeInt = Field(
+        ...,
+        json_schema_extra={"description": DESC_WAITS},
+    )
+
+    timeouts: NonNegativeInt = Field(
+        ...,
+        json_schema_extra={"description": DESC_TIMEOUTS},
+    )
+
+    wait_avg_ms: Optional[NonNegativeFloat] = Field(
+        None,
+        json_schema_extra={
+            "description": DESC_WAIT_AVG,
+            "example": EXAMPLE_MS,
+        },
+    )
+
+    wait_p50_ms: Optional[NonNegativeFloat] = Field(
+        None,
+        json_schema_extra={
+            "description": DESC_WAIT_P50,
+            "example": EXAMPLE_MS,
+        },
+    )
+
+    wait_p99_ms: Optional[NonNegativeFloat] = Field(
+        None,
+        json_schema_extra={
+            "description": DESC_WAIT_P99,
+            "example": EXAMPLE_MS,
+        },
+    )
+
+    wait_max_ms: Optional[NonNegativeFloat] = Field(
+        None,
+        json_schema_extra={
+            "description": DESC_WAIT_MAX,
+            "example": EXAMPLE_MS,
+        },
+    )
+
+
+class CacheStatus(BaseModel):
+    """
+    Схема ответа о кэше списка проектов
+    """
+
+    enabled: bool = Field(
+        ...,
+        json_schema_extra={"description": DESC_CACHE_ENABLED},
+    )
+
+    ttl: NonNegativeInt = Field(
+        ...,
+        json_schema_extra={
+            "description": DESC_CACHE_TTL,
+            "example": EXAMPLE_COUNT,
+        },
+    )
+
+    hits: NonNegativeInt = Field(
+        ...,
+        json_schema_extra={"description": DESC_CACHE_HITS},
+    )
+
+    misses: NonNegativeInt = Field(
+        ...,
+        json_schema_extra={"description": DESC_CACHE_MISSES},
+    )
+
+    hit_ratio: Optional[NonNegativeFloat] = Field(
+        None,
+        json_schema_extra={
+            "description": DESC_CACHE_HIT_RATIO,
+            "example": "0.95",
+        },
+    )
+
+    invalidations: NonNegativeInt = Field(
+        ...,
+        json_schema_extra={"description": DESC_CACHE_INVALIDATIONS},
+    )
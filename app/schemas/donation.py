@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel, Field, PositiveInt
+from pydantic import BaseModel, Field, NonNegativeInt, PositiveInt
 
 from app.schemas.base import DBInfo
 
@@ -10,11 +10,17 @@ DESC_COMMENT = "Комментарий пользователя"
 DESC_USER_ID = "Уникальный идентификатор пользователя"
 DESC_ID = "Уникальный идентификатор записи"
 DESC_CREATE_DATE = "Дата создания проекта"
+DESC_IDS = "Id созданных пожертвований в порядке запроса"
+DESC_COUNT = "Число созданных пожертвований"
+DESC_TOTAL_AMOUNT = "Общая сумма пакета"
+DESC_TOTAL_INVESTED = "Распределённая на текущий момент сумма пакета"
 EXAMPLE_FULL_AMOUNT = 500
 EXAMPLE_COMMENT = "На помощь котикам"
 EXAMPLE_USER_ID = "1"
 EXAMPLE_ID = "1"
 EXAMPLE_CREATE_DATE = "2025-11-15 15:42:19"
+EXAMPLE_COUNT = "2"
+EXAMPLE_TOTAL_AMOUNT = "1000"
 
 
 class DonationBase(BaseModel):
@@ -94,3 +100,38 @@ class DonationUserResponse(DonationCreateResponse):
 
     class Config:
         from_attributes = True
+
+
+class DonationBulkResponse(BaseModel):
+    """
+    Схема ответа для пакетного создания пожертвований
+    """
+
+    ids: list[PositiveInt] = Field(
+        ...,
+        json_schema_extra={"description": DESC_IDS},
+    )
+
+    count: NonNegativeInt = Field(
+        ...,
+        json_schema_extra={
+            "description": DESC_COUNT,
+            "example": EXAMPLE_COUNT,
+        },
+    )
+
+    full_amount: NonNegativeInt = Field(
+        ...,
+        json_schema_extra={
+            "description": DESC_TOTAL_AMOUNT,
+            "example": EXAMPLE_TOTAL_AMOUNT,
+        },
+    )
+
+    invested_amount: NonNegativeInt = Field(
+        ...,
+        json_schema_extra={
+            "description": DESC_TOTAL_INVESTED,
+            "example": EXAMPLE_TOTAL_AMOUNT,
+        },
+    )
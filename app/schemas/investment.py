@@ -0,0 +1,53 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field, PositiveInt
+
+DESC_DONATION_ID = "id пожертвования"
+DESC_PROJECT_ID = "id проекта"
+DESC_AMOUNT = "Распределённая сумма"
+DESC_CREATE_DATE = "Дата распределения"
+EXAMPLE_DONATION_ID = "1"
+EXAMPLE_PROJECT_ID = "1"
+EXAMPLE_AMOUNT = "500"
+EXAMPLE_CREATE_DATE = "2025-11-15 15:42:19"
+
+
+class InvestmentDB(BaseModel):
+    """
+    Схема ответа, описывает запись журнала распределений
+    """
+
+    donation_id: PositiveInt = Field(
+        ...,
+        json_schema_extra={
+            "description": DESC_DONATION_ID,
+            "example": EXAMPLE_DONATION_ID,
+        },
+    )
+
+    project_id: PositiveInt = Field(
+        ...,
+        json_schema_extra={
+            "description": DESC_PROJECT_ID,
+            "example": EXAMPLE_PROJECT_ID,
+        },
+    )
+
+    amount: PositiveInt = Field(
+        ...,
+        json_schema_extra={
+            "description": DESC_AMOUNT,
+            "example": EXAMPLE_AMOUNT,
+        },
+    )
+
+    create_date: datetime = Field(
+        ...,
+        json_schema_extra={
+            "description": DESC_CREATE_DATE,
+            "example": EXAMPLE_CREATE_DATE,
+        },
+    )
+
+    class Config:
+        orm_mode = True
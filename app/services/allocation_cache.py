@@ -0,0 +1,175 @@
+from bisect import insort
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db import InvestmentBase
+from app.core.unit_of_work import on_rollback
+from app.crud.charity_project import project_crud
+from app.crud.donation import donation_crud
+from app.models import CharityProject
+
+
+@dataclass(order=True)
+class OpenEntry:
+    """
+    Открытый проект или пожертвование с нераспределённым остатком.
+    """
+
+    create_date: datetime
+    id: int
+    remaining: int = field(compare=False)
+
+    @classmethod
+    def from_obj(cls, obj: InvestmentBase) -> "OpenEntry":
+        return cls(
+            create_date=obj.create_date,
+            id=obj.id,
+            remaining=obj.full_amount - obj.invested_amount,
+        )
+
+
+class OpenQueue:
+    """
+    Очередь открытых объектов в порядке создания.
+    """
+
+    def __init__(self) -> None:
+        self.entries: list[OpenEntry] = []
+        self.by_id: dict[int, OpenEntry] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def load(self, objs: Sequence[InvestmentBase]) -> None:
+        self.entries = sorted(OpenEntry.from_obj(obj) for obj in objs)
+        self.by_id = {entry.id: entry for entry in self.entries}
+
+    def put(self, obj: InvestmentBase) -> None:
+        self.discard(obj.id)
+        if obj.fully_invested:
+            return
+        entry = OpenEntry.from_obj(obj)
+        if not self.entries or self.entries[-1] < entry:
+            self.entries.append(entry)
+        else:
+            insort(self.entries, entry)
+        self.by_id[entry.id] = entry
+
+    def discard(self, object_id: int) -> None:
+        entry = self.by_id.pop(object_id, None)
+        if entry is not None:
+            self.entries.remove(entry)
+
+    def snapshot(self) -> list[tuple[int, int]]:
+        return [(entry.id, entry.remaining) for entry in self.entries]
+
+
+class AllocationCache:
+    """
+    Хранимые в памяти процесса очереди открытых проектов
+    и пожертвований.
+
+    Очереди строятся из БД при старте приложения и обновляются
+    эндпоинтами при каждом создании, изменении и удалении записей,
+    поэтому распределению не нужно каждый раз читать открытые
+    записи из БД. Кэш корректен, только пока все записи
+    проходят через один процесс приложения.
+
+    Очереди меняются под allocation_lock сразу, вместе
+    с незакоммиченной транзакцией запроса. Если запрос откатится,
+    очереди сбрасываются, пока блокировка ещё не отпущена, и
+    следующий проход распределения перестраивает их из БД.
+    """
+
+    def __init__(self) -> None:
+        self.projects = OpenQueue()
+        self.donations = OpenQueue()
+        self.ready = False
+
+    def _queue(self, obj: InvestmentBase) -> OpenQueue:
+        if isinstance(obj, CharityProject):
+            return self.projects
+        return self.donations
+
+    def _track(self) -> None:
+        on_rollback(self.clear)
+
+    async def rebuild(self, session: AsyncSession) -> None:
+        """
+        Перестраивает очереди по текущему состоянию БД.
+
+        :param session: сессия
+        :return: None
+        """
+        self._track()
+        self.projects.load(await project_crud.get_opened(session))
+        self.donations.load(await donation_crud.get_opened(session))
+        self.ready = True
+
+    async def verify(self, session: AsyncSession) -> bool:
+        """
+        Сверяет очереди с БД и перестраивает их.
+
+        :param session: сессия
+        :return: True, если очереди совпадали с БД
+        """
+        before = (self.projects.snapshot(), self.donations.snapshot())
+        await self.rebuild(session)
+        return before == (self.projects.snapshot(), self.donations.snapshot())
+
+    def put(self, obj: InvestmentBase) -> None:
+        """
+        Добавляет или обновляет запись в очереди.
+        Закрытые записи из очереди удаляются.
+
+        :param obj: проект или пожертвование
+        :return: None
+        """
+        if self.ready:
+            self._track()
+            self._queue(obj).put(obj)
+
+    def discard(self, obj: InvestmentBase) -> None:
+        """
+        Удаляет запись из очереди.
+
+        :param obj: проект или пожертвование
+        :return: None
+        """
+        if self.ready:
+            self._track()
+            self._queue(obj).discard(obj.id)
+
+    def spend(
+        self,
+        queue: OpenQueue,
+        entries: Sequence[OpenEntry],
+        amounts: Counter,
+    ) -> None:
+        """
+        Уменьшает остатки записей очереди на распределённые суммы,
+        полностью распределённые записи удаляет.
+
+        :param queue: allocation_cache.projects или donations
+        :param entries: снимок записей очереди
+        :param amounts: суммы по индексам в entries
+        :return: None
+        """
+        self._track()
+        for index, amount in amounts.items():
+            entry = entries[index]
+            entry.remaining -= amount
+            if entry.remaining == 0:
+                queue.discard(entry.id)
+
+    def clear(self) -> None:
+        self.projects = OpenQueue()
+        self.donations = OpenQueue()
+        self.ready = False
+
+
+allocation_cache = AllocationCache()
@@ -0,0 +1,101 @@
+from typing import Sequence
+
+import numpy as np
+
+Transfer = tuple[int, int, int]
+
+
+def _cumulative(remains: Sequence[int]) -> np.ndarray:
+    # Отрицательный остаток, как и в investment.distribute, не занимает
+    # места на оси и не сдвигает соседей
+    return np.cumsum(np.maximum(np.asarray(remains, dtype=np.int64), 0))
+
+
+def allocate_arrays(
+    project_remains: Sequence[int],
+    donation_remains: Sequence[int],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Векторное FIFO-распределение через префиксные суммы.
+
+    Проект i занимает на числовой оси отрезок
+    [P[i-1], P[i]), пожертвование j - отрезок [D[j-1], D[j]),
+    где P и D - накопленные суммы остатков. Распределяется
+    min(P[-1], D[-1]), и каждая строка получает длину своего
+    отрезка, обрезанного этой суммой.
+
+    :param project_remains: недостающие суммы открытых проектов
+    :param donation_remains: остатки открытых пожертвований
+    :return: распределённые суммы и флаги закрытия для проектов
+        и пожертвований
+    """
+    projects = _cumulative(project_remains)
+    donations = _cumulative(donation_remains)
+    total = min(
+        projects[-1] if projects.size else 0,
+        donations[-1] if donations.size else 0,
+    )
+    project_invested = np.diff(np.minimum(projects, total), prepend=0)
+    donation_invested = np.diff(np.minimum(donations, total), prepend=0)
+    return (
+        project_invested,
+        project_invested == np.asarray(project_remains, dtype=np.int64),
+        donation_invested,
+        donation_invested == np.asarray(donation_remains, dtype=np.int64),
+    )
+
+
+def distribute_arrays(
+    project_remains: Sequence[int],
+    donation_remains: Sequence[int],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Переводы между проектами и пожертвованиями в виде массивов.
+
+    Границы переводов - объединение накопленных сумм обеих
+    очередей до распределяемой суммы; каждый отрезок между
+    соседними границами - один перевод, а его владельцы
+    находятся через searchsorted.
+
+    :param project_remains: недостающие суммы открытых проектов
+    :param donation_remains: остатки открытых пожертвований
+    :return: индексы проектов, индексы пожертвований, суммы
+    """
+    projects = _cumulative(project_remains)
+    donations = _cumulative(donation_remains)
+    if not projects.size or not donations.size:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty
+    total = min(projects[-1], donations[-1])
+
+    bounds = np.union1d(projects, donations)
+    bounds = np.concatenate(([0], bounds[(bounds > 0) & (bounds <= total)]))
+    starts = bounds[:-1]
+    return (
+        np.searchsorted(projects, starts, side="right"),
+        np.searchsorted(donations, starts, side="right"),
+        np.diff(bounds),
+    )
+
+
+def distribute(
+    project_remains: Sequence[int],
+    donation_remains: Sequence[int],
+) -> list[Transfer]:
+    """
+    То же, что investment.distribute, но на NumPy.
+
+    :param project_remains: недостающие суммы открытых проектов
+    :param donation_remains: остатки открытых пожертвований
+    :return: список переводов (индекс проекта, индекс пожертвования, сумма)
+    """
+    return list(
+        zip(
+            *(
+                array.tolist()
+                for array in distribute_arrays(
+                    project_remains, donation_remains
+                )
+            )
+        )
+    )
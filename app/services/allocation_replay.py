@@ -0,0 +1,384 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+import numpy as np
+from sqlalchemy import bindparam, delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.fund_summary import fund_summary_crud
+from app.crud.investment import investment_crud
+from app.models import CharityProject, Donation, Investment
+from app.services.allocation_numpy import allocate_arrays, distribute_arrays
+from app.services.locking import allocation_lock
+from app.services.project_list_cache import project_list_cache
+
+REPLAY_CHUNK_SIZE = 10_000
+UPDATE_BATCH_SIZE = 1_000
+MAX_REPORTED_DRIFT = 100
+
+
+@dataclass
+class ReplayRow:
+    """
+    Строка проекта или пожертвования: сохранённое состояние
+    и состояние, полученное повторным распределением.
+    """
+
+    id: int
+    create_date: datetime
+    full_amount: int
+    invested_amount: int
+    fully_invested: bool
+    close_date: Optional[datetime]
+    expected: int = 0
+    closed_at: Optional[datetime] = None
+
+    @property
+    def remaining(self) -> int:
+        return self.full_amount - self.expected
+
+
+@dataclass
+class ReplayReport:
+    """
+    Итог сверки: число проверенных строк, число расхождений,
+    первые расхождения, число исправленных строк, а также
+    число и первые строки, чей invested_amount не совпадает
+    с журналом investment, и число записей пересобранного журнала.
+    """
+
+    projects: int = 0
+    donations: int = 0
+    drifted: int = 0
+    corrected: int = 0
+    drift: list[dict] = field(default_factory=list)
+    ledger_drifted: int = 0
+    ledger_drift: list[dict] = field(default_factory=list)
+    ledger_rebuilt: int = 0
+
+
+class _ReplayQueue:
+    """
+    Строки одной таблицы, читаемые потоком в порядке создания.
+    В памяти держится не больше REPLAY_CHUNK_SIZE строк.
+    """
+
+    def __init__(self, model, partitions: AsyncIterator) -> None:
+        self.model = model
+        self.partitions = partitions
+        self.rows: list[ReplayRow] = []
+        self.exhausted = False
+
+    async def fill(self) -> None:
+        while len(self.rows) < REPLAY_CHUNK_SIZE and not self.exhausted:
+            try:
+                partition = await self.partitions.__anext__()
+            except StopAsyncIteration:
+                self.exhausted = True
+            else:
+                self.rows.extend(ReplayRow(*row) for row in partition)
+
+
+async def _partitions(session: AsyncSession, model) -> AsyncIterator:
+    """
+    Потоковое чтение строк модели по (create_date, id)
+    через серверный курсор.
+    """
+    table = model.__table__
+    result = await session.stream(
+        select(
+            table.c.id,
+            table.c.create_date,
+            table.c.full_amount,
+            table.c.invested_amount,
+            table.c.fully_invested,
+            table.c.close_date,
+        )
+        .order_by(table.c.create_date, table.c.id)
+        .execution_options(yield_per=REPLAY_CHUNK_SIZE)
+    )
+    async for partition in result.partitions(REPLAY_CHUNK_SIZE):
+        yield partition
+
+
+def _correction_statement(model):
+    """
+    UPDATE для пакетной записи исправлений по id.
+    """
+    table = model.__table__
+    return (
+        update(table)
+        .where(table.c.id == bindparam("row_id"))
+        .values(
+            invested_amount=bindparam("invested"),
+            fully_invested=bindparam("closed"),
+            close_date=bindparam("closed_at"),
+        )
+    )
+
+
+class AllocationReplay:
+    """
+    Пересчёт распределения с нуля.
+
+    Все проекты и пожертвования заново распределяются в порядке
+    create_date по их full_amount, результат сравнивается
+    с сохранёнными invested_amount, fully_invested и close_date.
+    Строки читаются потоком и распределяются окнами векторным
+    ядром allocation_numpy; частично распределённая строка
+    окна переносится в следующее окно.
+
+    Точный момент закрытия восстановить нельзя, поэтому
+    сохранённая close_date закрытой строки считается верной.
+    Для строк, которые должны быть закрыты, но не закрыты,
+    дата закрытия - create_date более поздней из строки
+    и закрывшей её строки другой таблицы.
+    После пересчёта invested_amount каждой строки сверяется
+    с суммой её записей в журнале investment. Если при apply=True
+    журнал расходится с исправленными строками, он пересобирается
+    из переводов повторного распределения; дата перевода -
+    create_date более поздней из двух его строк.
+    """
+
+    def __init__(self, session: AsyncSession, apply: bool = False) -> None:
+        self.session = session
+        self.apply = apply
+        self.report = ReplayReport()
+        self._corrections: dict = {CharityProject: [], Donation: []}
+
+    async def run(self) -> ReplayReport:
+        """
+        Выполняет сверку, а при apply=True и исправления
+        с пересборкой журнала и пересчётом сводных счётчиков
+        фонда одним коммитом.
+
+        Сверка тоже идёт под allocation_lock: проекты и пожертвования
+        читаются разными запросами, и распределение, закоммиченное
+        между ними, выглядело бы как расхождение.
+
+        :return: итог сверки
+        """
+        async with allocation_lock(self.session):
+            await self._replay()
+            await self._check_ledger()
+            if not self.apply:
+                # Сверка ничего не пишет: откат снимает блокировку в БД
+                await self.session.rollback()
+                return self.report
+            if self.report.ledger_drifted:
+                await self._rebuild_ledger()
+            await fund_summary_crud.recount(self.session)
+            await self.session.commit()
+        await project_list_cache.invalidate_after_commit()
+        return self.report
+
+    async def _replay(self) -> None:
+        projects = _ReplayQueue(
+            CharityProject, _partitions(self.session, CharityProject)
+        )
+        donations = _ReplayQueue(Donation, _partitions(self.session, Donation))
+
+        while True:
+            await projects.fill()
+            await donations.fill()
+            if not projects.rows or not donations.rows:
+                break
+            for queue, row in self._allocate_window(projects, donations):
+                await self._check(queue.model, row, True)
+
+        for queue in (projects, donations):
+            while queue.rows:
+                for row in queue.rows:
+                    if row.remaining == 0:
+                        row.closed_at = row.create_date
+                    await self._check(queue.model, row, row.remaining == 0)
+                queue.rows = []
+                await queue.fill()
+
+        for model in self._corrections:
+            await self._flush(model)
+
+    @staticmethod
+    def _allocate_window(
+        projects: _ReplayQueue, donations: _ReplayQueue
+    ) -> list[tuple[_ReplayQueue, ReplayRow]]:
+        """
+        Распределяет текущие окна строк. Полностью распределённые
+        строки в начале окон убираются из очередей и возвращаются
+        для сверки, остальные переходят в следующее окно.
+        """
+        project_remains = [row.remaining for row in projects.rows]
+        donation_remains = [row.remaining for row in donations.rows]
+        (
+            project_invested,
+            project_closed,
+            donation_invested,
+            donation_closed,
+        ) = allocate_arrays(project_remains, donation_remains)
+        # Строка другой таблицы, на которой закрылась строка
+        project_ends = np.cumsum(project_remains)
+        donation_ends = np.cumsum(donation_remains)
+        closed_by_donation = np.searchsorted(donation_ends, project_ends)
+        closed_by_project = np.searchsorted(project_ends, donation_ends)
+
+        settled_rows = []
+        for queue, invested, closed, closed_by, other in (
+            (
+                projects,
+                project_invested,
+                project_closed,
+                closed_by_donation,
+                donations.rows,
+            ),
+            (
+                donations,
+                donation_invested,
+                donation_closed,
+                closed_by_project,
+                projects.rows,
+            ),
+        ):
+            settled = len(closed) if closed.all() else int(np.argmin(closed))
+            for row, amount in zip(queue.rows, invested.tolist()):
+                row.expected += amount
+            for row, index in zip(queue.rows[:settled], closed_by.tolist()):
+                counterpart = other[min(index, len(other) - 1)]
+                row.closed_at = max(row.create_date, counterpart.create_date)
+            settled_rows.extend((queue, row) for row in queue.rows[:settled])
+            queue.rows = queue.rows[settled:]
+        return settled_rows
+
+    async def _check(self, model, row: ReplayRow, closed: bool) -> None:
+        """
+        Сравнивает строку с результатом пересчёта
+        и ставит исправление в очередь.
+        """
+        if model is CharityProject:
+            self.report.projects += 1
+        else:
+            self.report.donations += 1
+
+        closed_at = row.closed_at if closed else None
+        if closed and row.fully_invested and row.close_date is not None:
+            closed_at = row.close_date
+        stored = (row.invested_amount, row.fully_invested, row.close_date)
+        expected = (row.expected, closed, closed_at)
+        if stored == expected:
+            return
+
+        self.report.drifted += 1
+        if len(self.report.drift) < MAX_REPORTED_DRIFT:
+            self.report.drift.append(
+                {
+                    "table": model.__tablename__,
+                    "id": row.id,
+                    "stored": dict(
+                        zip(
+                            (
+                                "invested_amount",
+                                "fully_invested",
+                                "close_date",
+                            ),
+                            stored,
+                        )
+                    ),
+                    "expected": dict(
+                        zip(
+                            (
+                                "invested_amount",
+                                "fully_invested",
+                                "close_date",
+                            ),
+                            expected,
+                        )
+                    ),
+                }
+            )
+        if not self.apply:
+            return
+        self._corrections[model].append(
+            {
+                "row_id": row.id,
+                "invested": row.expected,
+                "closed": closed,
+                "closed_at": closed_at,
+            }
+        )
+        if len(self._corrections[model]) >= UPDATE_BATCH_SIZE:
+            await self._flush(model)
+
+    async def _check_ledger(self) -> None:
+        """
+        Сверяет invested_amount (при apply=True - уже исправленный)
+        с суммами по журналу investment.
+        """
+        for model in (CharityProject, Donation):
+            async for row_id, invested, ledger in (
+                investment_crud.stream_ledger_drift(self.session, model)
+            ):
+                self.report.ledger_drifted += 1
+                if len(self.report.ledger_drift) < MAX_REPORTED_DRIFT:
+                    self.report.ledger_drift.append(
+                        {
+                            "table": model.__tablename__,
+                            "id": row_id,
+                            "invested_amount": invested,
+                            "ledger": ledger,
+                        }
+                    )
+
+    async def _rebuild_ledger(self) -> None:
+        """
+        Заменяет журнал investment переводами, полученными
+        повторным распределением тех же окон строк.
+        """
+        await self.session.execute(delete(Investment.__table__))
+        projects = _ReplayQueue(
+            CharityProject, _partitions(self.session, CharityProject)
+        )
+        donations = _ReplayQueue(Donation, _partitions(self.session, Donation))
+        rows = []
+        while True:
+            await projects.fill()
+            await donations.fill()
+            if not projects.rows or not donations.rows:
+                break
+            for project_index, donation_index, amount in zip(
+                *(
+                    array.tolist()
+                    for array in distribute_arrays(
+                        [row.remaining for row in projects.rows],
+                        [row.remaining for row in donations.rows],
+                    )
+                )
+            ):
+                project = projects.rows[project_index]
+                donation = donations.rows[donation_index]
+                rows.append(
+                    {
+                        "donation_id": donation.id,
+                        "project_id": project.id,
+                        "amount": amount,
+                        "create_date": max(
+                            project.create_date, donation.create_date
+                        ),
+                    }
+                )
+            if len(rows) >= UPDATE_BATCH_SIZE:
+                await self._append_ledger(rows)
+                rows = []
+            self._allocate_window(projects, donations)
+        await self._append_ledger(rows)
+
+    async def _append_ledger(self, rows: list[dict]) -> None:
+        await investment_crud.append(self.session, rows)
+        self.report.ledger_rebuilt += len(rows)
+
+    async def _flush(self, model) -> None:
+        corrections = self._corrections[model]
+        if not corrections:
+            return
+        await self.session.execute(_correction_statement(model), corrections)
+        self.report.corrected += len(corrections)
+        self._corrections[model] = []
@@ -0,0 +1,108 @@
+from dataclasses import dataclass, field
+from typing import Optional, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.charity_project import project_crud
+from app.crud.donation import donation_crud
+from app.services.allocation_cache import allocation_cache
+from app.services.allocation_numpy import allocate_arrays
+
+
+@dataclass
+class SimulatedRow:
+    """
+    Запись, участвующая в пробном распределении.
+    У гипотетических записей нет id, есть номер в запросе.
+    """
+
+    amount: int
+    fully_invested: bool
+    id: Optional[int] = None
+    request_index: Optional[int] = None
+
+
+@dataclass
+class SimulationResult:
+    """
+    Итог пробного распределения.
+    """
+
+    allocated: int = 0
+    projects: list[SimulatedRow] = field(default_factory=list)
+    donations: list[SimulatedRow] = field(default_factory=list)
+
+
+async def _open_state(
+    session: AsyncSession,
+) -> tuple[list[tuple[int, int]], list[tuple[int, int]]]:
+    """
+    Пары (id, остаток) открытых проектов и пожертвований
+    в порядке создания: из allocation_cache, если он включён,
+    иначе по одному запросу к каждой таблице.
+    """
+    if allocation_cache.ready:
+        return (
+            allocation_cache.projects.snapshot(),
+            allocation_cache.donations.snapshot(),
+        )
+    projects = await project_crud.get_opened(session)
+    donations = await donation_crud.get_opened(session)
+    return (
+        [(obj.id, obj.full_amount - obj.invested_amount) for obj in projects],
+        [(obj.id, obj.full_amount - obj.invested_amount) for obj in donations],
+    )
+
+
+def _rows(
+    opened: Sequence[tuple[int, int]],
+    invested,
+    closed,
+) -> list[SimulatedRow]:
+    rows = []
+    for index, (amount, is_closed) in enumerate(
+        zip(invested.tolist(), closed.tolist())
+    ):
+        if amount == 0:
+            continue
+        row = SimulatedRow(amount=amount, fully_invested=is_closed)
+        if index < len(opened):
+            row.id = opened[index][0]
+        else:
+            row.request_index = index - len(opened)
+        rows.append(row)
+    return rows
+
+
+async def simulate_allocation(
+    session: AsyncSession,
+    new_projects: Sequence[int] = (),
+    new_donations: Sequence[int] = (),
+) -> SimulationResult:
+    """
+    Пробное распределение без записи в БД.
+
+    Открытое состояние читается один раз, гипотетические
+    проекты и пожертвования добавляются в конец очередей
+    как самые новые, распределение считает векторное ядро.
+
+    :param session: сессия
+    :param new_projects: суммы гипотетических проектов
+    :param new_donations: суммы гипотетических пожертвований
+    :return: записи, которые получат средства, и общая сумма
+    """
+    projects, donations = await _open_state(session)
+    (
+        project_invested,
+        project_closed,
+        donation_invested,
+        donation_closed,
+    ) = allocate_arrays(
+        [remaining for _, remaining in projects] + list(new_projects),
+        [remaining for _, remaining in donations] + list(new_donations),
+    )
+    return SimulationResult(
+        allocated=int(project_invested.sum()),
+        projects=_rows(projects, project_invested, project_closed),
+        donations=_rows(donations, donation_invested, donation_closed),
+    )
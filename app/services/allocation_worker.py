@@ -0,0 +1,147 @@
+import asyncio
+import logging
+from typing import Optional
+
+from fastapi import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db import AsyncSessionLocal
+from app.core.unit_of_work import commit, current_unit_of_work
+from app.services.investment import invest_donations_in_projects
+
+TICKET_HEADER = "X-Allocation-Ticket"
+STATUS_HEADER = "X-Allocation-Status"
+STATUS_PENDING = "pending"
+STATUS_APPLIED = "applied"
+
+logger = logging.getLogger(__name__)
+
+
+class AllocationWorker:
+    """
+    Фоновый обработчик распределения внутри процесса.
+
+    Эндпоинты не распределяют средства сами, а получают номер
+    заявки (ticket). Все заявки, пришедшие во время прохода,
+    обрабатываются одним следующим проходом.
+
+    Заявка запроса сначала резервируется (reserve) и передаётся
+    обработчику (submit) только после коммита или отката запроса:
+    проход не засчитывает заявку, записи которой ещё не видны
+    его сессии.
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal) -> None:
+        self.session_factory = session_factory
+        self.requested = 0
+        self.applied = 0
+        self.passes = 0
+        self._pending: set[int] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def reserve(self) -> int:
+        """
+        Резервирует номер заявки. Пока заявка не передана
+        через submit, проходы не засчитывают её и следующие.
+
+        :return: номер заявки
+        """
+        self.requested += 1
+        self._pending.add(self.requested)
+        return self.requested
+
+    def submit(self, ticket: int) -> None:
+        """
+        Передаёт зарезервированную заявку обработчику.
+
+        :param ticket: номер заявки из reserve
+        :return: None
+        """
+        self._pending.discard(ticket)
+        self._wakeup.set()
+
+    def trigger(self) -> int:
+        """
+        Ставит заявку на распределение.
+
+        :return: номер заявки
+        """
+        ticket = self.reserve()
+        self.submit(ticket)
+        return ticket
+
+    def is_applied(self, ticket: int) -> bool:
+        return ticket <= self.applied
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            target = (
+                min(self._pending) - 1 if self._pending else self.requested
+            )
+            if target <= self.applied:
+                continue
+            try:
+                async with self.session_factory() as session:
+                    await invest_donations_in_projects(session)
+            except Exception:
+                logger.exception("Фоновое распределение не выполнено")
+                self._wakeup.set()
+                await asyncio.sleep(1)
+                continue
+            self.applied = target
+            self.passes += 1
+
+
+allocation_worker = AllocationWorker()
+
+
+async def run_allocation(
+    session: AsyncSession, response: Response, bulk: bool = False
+) -> None:
+    """
+    Распределяет средства сразу или, если запущен фоновый
+    обработчик, ставит заявку и отмечает ответ как ожидающий.
+
+    :param session: сессия
+    :param response: ответ эндпоинта, получает заголовки заявки
+    :param bulk: пакетный запрос, распределять векторным ядром
+    :return: None
+    """
+    if not allocation_worker.running:
+        await invest_donations_in_projects(session, bulk)
+        return
+    ticket = allocation_worker.reserve()
+    unit = current_unit_of_work()
+    if unit is None:
+        await commit(session)
+        allocation_worker.submit(ticket)
+    else:
+        # Обработчик читает записи своей сессией, поэтому заявка
+        # передаётся ему после коммита (или отката) запроса.
+        # Промежуточный коммит здесь отдал бы соединение, не отпустив
+        # allocation_lock, и обработчик с соединением ждал бы
+        # блокировку, а запрос - соединение
+        unit.exit_stack.callback(allocation_worker.submit, ticket)
+    response.headers[TICKET_HEADER] = str(ticket)
+    response.headers[STATUS_HEADER] = STATUS_PENDING
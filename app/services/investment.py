@@ -1,69 +1,304 @@
+from collections import Counter
 from datetime import datetime, timezone
+from typing import Optional, Sequence
 
+from sqlalchemy import bindparam, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
+from app.core.db import InvestmentBase
+from app.core.unit_of_work import commit
 from app.crud.charity_project import project_crud
 from app.crud.donation import donation_crud
-from app.models.charity_project import CharityProject
-from app.models.donation import Donation
+from app.crud.fund_summary import fund_summary_crud
+from app.crud.investment import investment_crud
+from app.models import CharityProject, Donation
+from app.models.fund_summary import summary_delta
+from app.services import allocation_numpy
+from app.services.allocation_cache import OpenEntry, allocation_cache
+from app.services.allocation_numpy import Transfer
+from app.services.locking import allocation_lock
+from app.services.project_list_cache import project_list_cache
 
 
-async def invest_donations_in_projects(
-    project: CharityProject, session: AsyncSession
-) -> None:
+def distribute(
+    project_remains: Sequence[int],
+    donation_remains: Sequence[int],
+) -> list[Transfer]:
+    """
+    Распределяет свободные средства пожертвований по проектам.
+
+    Оба списка упорядочены по дате создания. Алгоритм идёт по ним
+    двумя указателями: текущий проект забирает из текущего
+    пожертвования столько, сколько может, после чего сдвигается
+    указатель того списка, чей остаток обнулился. Отрицательный
+    остаток (рассогласованные данные) пропускается как нулевой.
+
+    :param project_remains: недостающие суммы открытых проектов
+    :param donation_remains: нераспределённые остатки пожертвований
+    :return: список переводов (индекс проекта, индекс пожертвования, сумма)
+    """
+    projects = list(project_remains)
+    donations = list(donation_remains)
+    transfers = []
+    project_index = donation_index = 0
+
+    while project_index < len(projects) and donation_index < len(donations):
+        amount = min(projects[project_index], donations[donation_index])
+        if amount > 0:
+            transfers.append((project_index, donation_index, amount))
+            projects[project_index] -= amount
+            donations[donation_index] -= amount
+        if projects[project_index] <= 0:
+            project_index += 1
+        if donations[donation_index] <= 0:
+            donation_index += 1
+
+    return transfers
+
+
+def close_if_invested(
+    obj: InvestmentBase, close_date: Optional[datetime] = None
+) -> bool:
+    """
+    Закрывает объект, если его сумма полностью распределена.
+
+    :param obj: проект или пожертвование
+    :param close_date: дата закрытия, по умолчанию текущий момент
+    :return: True, если объект был закрыт
+    """
+    if obj.fully_invested or obj.invested_amount < obj.full_amount:
+        return False
+    obj.fully_invested = True
+    obj.close_date = close_date or datetime.now(timezone.utc)
+    return True
+
+
+def apply_transfers(
+    projects: Sequence[InvestmentBase],
+    donations: Sequence[InvestmentBase],
+    transfers: Sequence[Transfer],
+    now: Optional[datetime] = None,
+) -> list[InvestmentBase]:
+    """
+    Применяет переводы к объектам и закрывает заполненные.
+
+    :param projects: открытые проекты
+    :param donations: открытые пожертвования
+    :param transfers: результат distribute
+    :param now: дата закрытия, по умолчанию текущий момент
+    :return: изменённые объекты
+    """
+    now = now or datetime.now(timezone.utc)
+    changed = {}
+
+    for project_index, donation_index, amount in transfers:
+        project = projects[project_index]
+        donation = donations[donation_index]
+        project.invested_amount += amount
+        donation.invested_amount += amount
+        changed[id(project)] = project
+        changed[id(donation)] = donation
+
+    for obj in (*projects, *donations):
+        if close_if_invested(obj, now):
+            changed[id(obj)] = obj
+
+    return list(changed.values())
+
+
+def ledger_rows(
+    projects: Sequence,
+    donations: Sequence,
+    transfers: Sequence[Transfer],
+    now: datetime,
+) -> list[dict]:
+    """
+    Записи журнала распределений для переводов.
+
+    :param projects: проекты или записи очереди (нужен только id)
+    :param donations: пожертвования или записи очереди
+    :param transfers: результат distribute
+    :param now: дата распределения
+    :return: словари для investment_crud.append
+    """
+    return [
+        {
+            "donation_id": donations[donation_index].id,
+            "project_id": projects[project_index].id,
+            "amount": amount,
+            "create_date": now,
+        }
+        for project_index, donation_index, amount in transfers
+    ]
+
+
+def _increment_statement(model):
     """
-    Определяет распределение донатов и закрытие проекта.
+    UPDATE для пакетного увеличения invested_amount по id.
+    """
+    table = model.__table__
+    return (
+        update(table)
+        .where(table.c.id == bindparam("entry_id"))
+        .values(
+            invested_amount=table.c.invested_amount + bindparam("amount"),
+            fully_invested=bindparam("closed"),
+            close_date=bindparam("closed_at"),
+        )
+    )
 
-    Алгоритм:
-    1. Вычисляет оставшуюся сумму для закрытия проекта.
-    2. Берет незакрытые пожертвования по порядку создания.
-    3. Распределяет пожертвования до полной суммы проекта.
-    4. Обновляет статусы пожертвований и проекта.
-    5. Сохраняет изменения в БД.
 
-    :param project: проект, в который будем инвестировать.
+def _increments(
+    entries: Sequence[OpenEntry], amounts: Counter, now: datetime
+) -> list[dict]:
+    """
+    Параметры UPDATE для изменившихся записей очереди.
+    """
+    params = []
+    for index, amount in amounts.items():
+        entry = entries[index]
+        closed = amount == entry.remaining
+        params.append(
+            {
+                "entry_id": entry.id,
+                "amount": amount,
+                "closed": closed,
+                "closed_at": now if closed else None,
+            }
+        )
+    return params
+
+
+def _kernel(bulk: bool):
+    """
+    Функция распределения: цикл distribute для обычных запросов,
+    векторная allocation_numpy.distribute для пакетных.
+    """
+    return allocation_numpy.distribute if bulk else distribute
+
+
+async def _invest_from_cache(session: AsyncSession, bulk: bool) -> None:
+    """
+    Распределение по очередям из allocation_cache.
+
+    Открытые записи не читаются из БД: обновляются только
+    строки, получившие средства.
+
     :param session: сессия
+    :param bulk: использовать векторное ядро
     :return: None
     """
-    # Вычисляет оставшуюся сумму
-    remaining = project.full_amount - project.invested_amount
+    # Снимок очередей: spend удаляет из них закрытые записи
+    projects = list(allocation_cache.projects.entries)
+    donations = list(allocation_cache.donations.entries)
+    transfers = _kernel(bulk)(
+        [entry.remaining for entry in projects],
+        [entry.remaining for entry in donations],
+    )
+    if not transfers:
+        await commit(session)
+        return
 
-    # Берет незакрытые пожертвования
-    donations = await donation_crud.get_all(
-        session=session,
-        filters=[Donation.fully_invested.is_(False)],
-        order_by=[Donation.create_date],
+    project_amounts = Counter()
+    donation_amounts = Counter()
+    for project_index, donation_index, amount in transfers:
+        project_amounts[project_index] += amount
+        donation_amounts[donation_index] += amount
+
+    now = datetime.now(timezone.utc)
+    for model, entries, amounts in (
+        (CharityProject, projects, project_amounts),
+        (Donation, donations, donation_amounts),
+    ):
+        await session.execute(
+            _increment_statement(model),
+            _increments(entries, amounts, now),
+        )
+    allocated = sum(amount for _, _, amount in transfers)
+    await session.execute(summary_delta(-allocated, -allocated))
+    await investment_crud.append(
+        session, ledger_rows(projects, donations, transfers, now)
     )
+    await commit(session)
 
-    # Проходит по каждому пожертвованию
-    for donation in donations:
+    for queue, entries, amounts in (
+        (allocation_cache.projects, projects, project_amounts),
+        (allocation_cache.donations, donations, donation_amounts),
+    ):
+        allocation_cache.spend(queue, entries, amounts)
 
-        if remaining <= 0:
-            break  # Проект профинансирован, выходит
 
-        # Вычисляет доступную для инвестирования сумму в пожертвовании
-        donate_remaining = donation.full_amount - donation.invested_amount
+async def _invest_from_db(session: AsyncSession, bulk: bool) -> None:
+    """
+    Распределение по открытым записям, прочитанным из БД.
 
-        # Определяет сумму для инвестирования
-        invest_amount = min(remaining, donate_remaining)
+    :param session: сессия
+    :param bulk: использовать векторное ядро
+    :return: None
+    """
+    projects = await project_crud.get_opened(session)
+    donations = await donation_crud.get_opened(session)
 
-        # Обновляет суммы проинвестированных средств
-        donation.invested_amount += invest_amount
-        project.invested_amount += invest_amount
-        remaining -= invest_amount
+    transfers = _kernel(bulk)(
+        [obj.full_amount - obj.invested_amount for obj in projects],
+        [obj.full_amount - obj.invested_amount for obj in donations],
+    )
+    now = datetime.now(timezone.utc)
+    changed = apply_transfers(projects, donations, transfers, now)
+
+    await investment_crud.append(
+        session, ledger_rows(projects, donations, transfers, now)
+    )
+    await project_crud.save_many(session, *changed)
 
-        # Если пожертвование полностью использовано, закрывает
-        if donation.invested_amount == donation.full_amount:
-            donation.fully_invested = True
-            donation.close_date = datetime.now(timezone.utc)
 
-        # Сохраняет в БД
-        await donation_crud.save(donation, session)
+async def _nothing_to_allocate(session: AsyncSession) -> bool:
+    """
+    Нечего распределять: по сводным счётчикам нет открытых
+    проектов или нет нераспределённых средств.
+    """
+    counters = await fund_summary_crud.get(session)
+    return counters is not None and not (
+        counters.open_project_deficit and counters.unspent_donation_balance
+    )
 
-    # Если проект полностью профинансирован, закрывает
-    if project.invested_amount >= project.full_amount:
-        project.fully_invested = True
-        project.close_date = datetime.now(timezone.utc)
 
-    # Сохраняет в БД
-    await project_crud.save(project, session)
+async def invest_donations_in_projects(
+    session: AsyncSession, bulk: bool = False
+) -> None:
+    """
+    Распределяет все свободные пожертвования по открытым проектам.
+
+    Открытые проекты и пожертвования читаются по одному запросу
+    (или берутся из allocation_cache, если он включён),
+    распределение считается в памяти, изменения и записи
+    журнала investment сохраняются одним коммитом (внутри запроса -
+    коммитом запроса).
+    Проход выполняется под allocation_lock, поэтому параллельные
+    запросы и процессы не распределяют одни и те же средства дважды.
+
+    Если по сводным счётчикам fundsummary распределять нечего,
+    проход завершается после одного запроса к ним. Иначе после
+    коммита сбрасывается кэш списка проектов.
+
+    Пакетные пути (массовая загрузка, импорт) передают bulk=True:
+    переводы тогда считает векторное ядро allocation_numpy,
+    результат совпадает с циклом distribute.
+
+    :param session: сессия
+    :param bulk: использовать векторное ядро
+    :return: None
+    """
+    async with allocation_lock(session):
+        if await _nothing_to_allocate(session):
+            await commit(session)
+            return
+        if settings.allocation_cache and not allocation_cache.ready:
+            # Очереди сброшены откатом запроса - строятся заново
+            await allocation_cache.rebuild(session)
+        if allocation_cache.ready:
+            await _invest_from_cache(session, bulk)
+        else:
+            await _invest_from_db(session, bulk)
+    await project_list_cache.invalidate_after_commit()
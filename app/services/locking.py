@@ -0,0 +1,104 @@
+import asyncio
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.unit_of_work import current_unit_of_work
+
+ALLOCATION_LOCK_KEY = 7_170_741_150
+
+_process_locks: WeakKeyDictionary = WeakKeyDictionary()
+_lock_held: ContextVar[bool] = ContextVar(
+    "allocation_lock_held", default=False
+)
+
+
+def process_lock() -> asyncio.Lock:
+    """
+    Блокировка распределения внутри процесса.
+
+    Своя на каждый event loop: asyncio.Lock в Python 3.9
+    привязывается к циклу, в котором создан.
+
+    :return: asyncio.Lock текущего цикла
+    """
+    loop = asyncio.get_running_loop()
+    lock = _process_locks.get(loop)
+    if lock is None:
+        lock = _process_locks[loop] = asyncio.Lock()
+    return lock
+
+
+async def lock_database(session: AsyncSession) -> None:
+    """
+    Берёт в БД блокировку распределения до конца транзакции.
+
+    PostgreSQL: транзакционная advisory-блокировка.
+    SQLite: транзакция открывается через BEGIN IMMEDIATE, то есть
+    сразу с блокировкой на запись. Если транзакция уже что-то
+    записала, блокировка на запись уже у неё.
+
+    :param session: сессия
+    :return: None
+    """
+    connection = await session.connection()
+    dialect = connection.dialect.name
+
+    if dialect == "postgresql":
+        await connection.execute(
+            text("SELECT pg_advisory_xact_lock(:key)"),
+            {"key": ALLOCATION_LOCK_KEY},
+        )
+    elif dialect == "sqlite":
+        raw_connection = await connection.get_raw_connection()
+        if not raw_connection.driver_connection.in_transaction:
+            await connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+@asynccontextmanager
+async def allocation_lock(session: AsyncSession):
+    """
+    Сериализует проходы распределения между запросами
+    и процессами приложения.
+
+    Коммит транзакции должен выполняться внутри блока:
+    блокировка в БД снимается коммитом или откатом.
+    Внутри единицы работы запроса коммит выполняется в её конце,
+    поэтому и блокировка процесса держится до конца запроса.
+    Вложенный блок в той же задаче не ждёт блокировку процесса,
+    а только заново берёт блокировку в БД для новой транзакции.
+
+    Соединение сессии берётся до блокировки процесса: так
+    блокировки всегда берутся в одном порядке. Иначе при одном
+    соединении для записи (SQLITE_WAL) запрос, получивший его
+    раньше (например, при авторизации), ждал бы блокировку,
+    а фоновое распределение под блокировкой - соединение.
+
+    :param session: сессия
+    """
+    if not settings.allocation_locking:
+        yield
+        return
+    if _lock_held.get():
+        await lock_database(session)
+        yield
+        return
+    await session.connection()
+    unit = current_unit_of_work()
+    if unit is not None:
+        await unit.exit_stack.enter_async_context(process_lock())
+        unit.exit_stack.callback(_lock_held.reset, _lock_held.set(True))
+        await lock_database(session)
+        yield
+        return
+    async with process_lock():
+        token = _lock_held.set(True)
+        try:
+            await lock_database(session)
+            yield
+        finally:
+            _lock_held.reset(token)
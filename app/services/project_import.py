@@ -0,0 +1,139 @@
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator
+
+import aiofiles.tempfile
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.charity_project import project_crud
+from app.schemas.charity_project import CharityProjectCreate
+from app.services.allocation_cache import allocation_cache
+
+IMPORT_CHUNK_SIZE = 500
+SPOOL_MAX_SIZE = 1024 * 1024
+SPOOL_CHUNK_SIZE = 64 * 1024
+MAX_REPORTED_ERRORS = 100
+DUPLICATE_NAME = "Проект с таким именем уже существует!"
+
+
+@dataclass
+class ImportSummary:
+    """
+    Итог импорта: число созданных и пропущенных строк
+    и первые ошибки с номерами строк.
+    """
+
+    created: int = 0
+    skipped: int = 0
+    errors: list[dict] = field(default_factory=list)
+
+    def skip(self, line: int, detail) -> None:
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "detail": detail})
+
+
+async def iter_lines(
+    chunks: AsyncIterator[bytes],
+) -> AsyncIterator[tuple[int, bytes]]:
+    """
+    Разбивает поток байтов на строки, не накапливая его целиком.
+
+    :param chunks: поток фрагментов тела запроса или файла
+    :return: пары (номер строки, строка)
+    """
+    buffer = b""
+    line_number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            yield line_number, line
+    if buffer:
+        yield line_number + 1, buffer
+
+
+@asynccontextmanager
+async def spool(chunks: AsyncIterator[bytes]):
+    """
+    Сохраняет поток целиком во временный файл: до SPOOL_MAX_SIZE
+    байт в памяти, дальше на диске.
+
+    Импорт читает тело из файла, поэтому транзакция с записью
+    не открыта, пока клиент передаёт тело запроса.
+
+    :param chunks: поток фрагментов тела запроса
+    :return: фрагменты сохранённого потока по SPOOL_CHUNK_SIZE байт
+    """
+    async with aiofiles.tempfile.SpooledTemporaryFile(
+        max_size=SPOOL_MAX_SIZE
+    ) as file:
+        async for chunk in chunks:
+            await file.write(chunk)
+        await file.seek(0)
+        yield _read_chunks(file)
+
+
+async def _read_chunks(file) -> AsyncIterator[bytes]:
+    while True:
+        chunk = await file.read(SPOOL_CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def _create_chunk(
+    projects: list[CharityProjectCreate], session: AsyncSession
+) -> None:
+    for new_db_entry in await project_crud.create_many(projects, session):
+        allocation_cache.put(new_db_entry)
+
+
+async def import_projects(
+    lines: AsyncIterator[tuple[int, bytes]],
+    session: AsyncSession,
+) -> ImportSummary:
+    """
+    Импортирует проекты из NDJSON.
+
+    Имена существующих проектов читаются одним запросом,
+    дубликаты (в БД и внутри файла) и некорректные строки
+    пропускаются. Проекты вставляются пакетами
+    по IMPORT_CHUNK_SIZE. Распределение средств выполняет
+    вызывающий код после импорта.
+
+    Вызывается под allocation_lock: созданные проекты сразу
+    попадают в очередь кэша распределения.
+
+    :param lines: пары (номер строки, строка)
+    :param session: сессия
+    :return: итог импорта
+    """
+    summary = ImportSummary()
+    names = await project_crud.get_names(session)
+    chunk = []
+
+    async for line_number, line in lines:
+        if not line.strip():
+            continue
+        try:
+            project = CharityProjectCreate.parse_raw(line)
+        except ValidationError as error:
+            summary.skip(line_number, error.errors())
+            continue
+        if project.name in names:
+            summary.skip(line_number, DUPLICATE_NAME)
+            continue
+        names.add(project.name)
+        chunk.append(project)
+        if len(chunk) == IMPORT_CHUNK_SIZE:
+            await _create_chunk(chunk, session)
+            summary.created += len(chunk)
+            chunk = []
+
+    if chunk:
+        await _create_chunk(chunk, session)
+        summary.created += len(chunk)
+    return summary
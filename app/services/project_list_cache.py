@@ -0,0 +1,192 @@
+import logging
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Optional
+
+from cachetools import TLRUCache
+
+from app.core.config import settings
+from app.core.unit_of_work import on_commit
+
+GENERATION_KEY = "generation"
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(ABC):
+    """
+    Хранилище кэша: байты по ключу со сроком жизни и счётчики.
+
+    Набор методов совпадает с клиентом redis.asyncio.Redis,
+    поэтому общий для всех процессов кэш подключается
+    передачей такого клиента в ProjectListCache.
+    """
+
+    @abstractmethod
+    async def get(self, name: str) -> Optional[bytes]:
+        """Значение ключа или None."""
+
+    @abstractmethod
+    async def set(self, name: str, value: bytes, ex: int) -> None:
+        """Сохраняет значение на ex секунд."""
+
+    @abstractmethod
+    async def incr(self, name: str) -> int:
+        """Увеличивает счётчик на 1 и возвращает новое значение."""
+
+
+class LocalBackend(CacheBackend):
+    """
+    Хранилище в памяти процесса: не больше maxsize ключей,
+    при переполнении вытесняются давно не читавшиеся (LRU),
+    каждый ключ живёт ex секунд.
+
+    Один объект можно отдать нескольким ProjectListCache -
+    так в тестах заменяется общее хранилище.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self._values = TLRUCache(
+            maxsize=maxsize,
+            ttu=lambda name, item, now: now + item[1],
+            timer=time.monotonic,
+        )
+        # Счётчики не вытесняются и не устаревают, как INCR в Redis
+        self._counters: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    async def get(self, name: str) -> Optional[bytes]:
+        if name in self._counters:
+            return str(self._counters[name]).encode()
+        item = self._values.get(name)
+        return None if item is None else item[0]
+
+    async def set(self, name: str, value: bytes, ex: int) -> None:
+        self._values[name] = (value, ex)
+
+    async def incr(self, name: str) -> int:
+        self._counters[name] = self._counters.get(name, 0) + 1
+        return self._counters[name]
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+
+
+class ProjectListCache:
+    """
+    Кэш сериализованных страниц списка проектов.
+
+    Ключ страницы - номер поколения и параметры запроса; версия
+    таблицы в ключ не входит, и попадание в кэш не обращается к БД.
+    Актуальность обеспечивает сброс после каждого коммита,
+    меняющего проекты (invalidate_after_commit).
+
+    Инвалидация только увеличивает поколение: старые страницы
+    больше не читаются и устаревают сами. Страница, прочитанная
+    из БД до инвалидации, сохраняется под старым поколением
+    и тоже не будет прочитана.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        ttl: int,
+        prefix: str = "charity_projects",
+    ) -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self.prefix = prefix
+        self.stats = CacheStats()
+
+    @property
+    def enabled(self) -> bool:
+        return settings.projects_cache
+
+    def _key(self, *parts) -> str:
+        return ":".join((self.prefix, *map(str, parts)))
+
+    async def get(self, params: str) -> tuple[Optional[bytes], int]:
+        """
+        Ищет страницу в кэше.
+
+        :param params: параметры запроса страницы
+        :return: байты страницы или None и текущее поколение
+            для put
+        """
+        generation = int(
+            await self.backend.get(self._key(GENERATION_KEY)) or 0
+        )
+        value = await self.backend.get(self._key(generation, params))
+        if value is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return value, generation
+
+    async def put(self, params: str, generation: int, value: bytes) -> None:
+        """
+        Сохраняет страницу, прочитанную при поколении generation.
+
+        :param params: параметры запроса страницы
+        :param generation: поколение, полученное из get
+        :param value: байты страницы
+        :return: None
+        """
+        await self.backend.set(
+            self._key(generation, params), value, ex=self.ttl
+        )
+
+    async def invalidate(self) -> None:
+        """
+        Сбрасывает все страницы. Ошибка хранилища не прерывает
+        запрос: изменения уже закоммичены, а страницы в худшем
+        случае устареют через ttl секунд.
+
+        :return: None
+        """
+        try:
+            await self.backend.incr(self._key(GENERATION_KEY))
+        except Exception:
+            logger.exception("Кэш списка проектов не сброшен")
+            return
+        self.stats.invalidations += 1
+
+    async def invalidate_after_commit(self) -> None:
+        """
+        Сбрасывает кэш после коммита текущих изменений
+        (внутри запроса - после коммита запроса).
+
+        :return: None
+        """
+        if self.enabled:
+            await on_commit(self.invalidate)
+
+    def snapshot(self) -> dict:
+        """
+        Счётчики кэша для схемы CacheStatus.
+
+        :return: словарь
+        """
+        stats = self.stats
+        lookups = stats.hits + stats.misses
+        return {
+            "enabled": self.enabled,
+            "ttl": self.ttl,
+            "hits": stats.hits,
+            "misses": stats.misses,
+            "hit_ratio": (round(stats.hits / lookups, 4) if lookups else None),
+            "invalidations": stats.invalidations,
+        }
+
+
+project_list_cache = ProjectListCache(
+    LocalBackend(settings.projects_cache_size),
+    ttl=settings.projects_cache_ttl,
+)
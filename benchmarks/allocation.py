@@ -0,0 +1,333 @@
+"""
+Бенчмарк распределения пожертвований.
+
+Запуск: python -m benchmarks.allocation [параметры]
+
+БД заполняется синтетическими пользователями, открытыми
+проектами и открытыми пожертвованиями, после чего замеряются:
+- bulk_allocation: проход распределения по всем открытым
+  пожертвованиям (перед каждым замером добавляется новая партия);
+- create_donation: создание пожертвования с распределением;
+- create_project: создание проекта с распределением.
+Эндпоинты вызываются в единице работы, как в запросе.
+
+Для каждой операции выводятся p50/p99 задержки и число
+SQL-запросов и коммитов на операцию. С --save результат
+сохраняется как baseline, с --compare сравнивается с ним.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from fastapi import Response
+from sqlalchemy import event, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.endpoints.charity_project import create_charity_project
+from app.api.endpoints.donation import create_donation
+from app.core.config import settings
+from app.core.db import Base
+from app.core.unit_of_work import unit_of_work
+from app.crud.fund_summary import fund_summary_crud
+from app.models import CharityProject, Donation, User
+from app.schemas.charity_project import CharityProjectCreate
+from app.schemas.donation import DonationCreate
+from app.services.allocation_cache import allocation_cache
+from app.services.investment import invest_donations_in_projects
+
+BASELINES_DIR = Path(__file__).parent / "baselines"
+SEED_CHUNK_SIZE = 1_000
+# Допустимый рост p50 относительно baseline при --compare
+LATENCY_TOLERANCE = 0.5
+
+
+class QueryCounter:
+    """
+    Считает SQL-запросы и коммиты движка.
+    """
+
+    def __init__(self, engine) -> None:
+        self.queries = 0
+        self.commits = 0
+        event.listen(
+            engine.sync_engine, "before_cursor_execute", self._on_query
+        )
+        event.listen(engine.sync_engine, "commit", self._on_commit)
+
+    def _on_query(self, *args) -> None:
+        self.queries += 1
+
+    def _on_commit(self, *args) -> None:
+        self.commits += 1
+
+
+class Operation:
+    """
+    Замеры одной операции.
+    """
+
+    def __init__(self, counter: QueryCounter) -> None:
+        self.counter = counter
+        self.latencies: list[float] = []
+        self.queries = 0
+        self.commits = 0
+
+    @contextmanager
+    def measure(self):
+        queries, commits = self.counter.queries, self.counter.commits
+        started = time.perf_counter()
+        yield
+        self.latencies.append(time.perf_counter() - started)
+        self.queries += self.counter.queries - queries
+        self.commits += self.counter.commits - commits
+
+    def summary(self) -> dict:
+        count = len(self.latencies)
+        return {
+            "count": count,
+            "p50_ms": round(percentile(self.latencies, 50) * 1000, 3),
+            "p99_ms": round(percentile(self.latencies, 99) * 1000, 3),
+            "queries_per_op": round(self.queries / count, 2),
+            "commits_per_op": round(self.commits / count, 2),
+        }
+
+
+def percentile(values: list[float], rank: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(math.ceil(rank / 100 * len(ordered)) - 1, 0)]
+
+
+async def seed_rows(session: AsyncSession, model, rows: list[dict]) -> None:
+    for start in range(0, len(rows), SEED_CHUNK_SIZE):
+        await session.execute(
+            insert(model.__table__), rows[start:start + SEED_CHUNK_SIZE]
+        )
+
+
+async def seed(session: AsyncSession, args: argparse.Namespace) -> None:
+    """
+    Заполняет БД пользователями и открытыми проектами.
+    Потребность проектов намного больше партий пожертвований,
+    поэтому проекты остаются открытыми до конца замеров.
+    """
+    rng = random.Random(args.seed)
+    start = datetime.now(timezone.utc) - timedelta(days=365)
+
+    await seed_rows(session, User, [
+        {
+            "email": f"user{index}@example.com",
+            "hashed_password": "benchmark",
+            "is_active": True,
+            "is_superuser": False,
+            "is_verified": True,
+        }
+        for index in range(args.users)
+    ])
+    await seed_rows(session, CharityProject, [
+        {
+            "name": f"Проект {index}",
+            "description": "Синтетический проект",
+            "full_amount": rng.randint(100_000, 1_000_000),
+            "invested_amount": 0,
+            "fully_invested": False,
+            "create_date": start + timedelta(minutes=index),
+        }
+        for index in range(args.projects)
+    ])
+    await fund_summary_crud.recount(session)
+    await session.commit()
+
+
+async def seed_donations(
+    session: AsyncSession, args: argparse.Namespace, batch: int
+) -> None:
+    """
+    Добавляет партию из args.donations открытых пожертвований.
+    """
+    rng = random.Random(args.seed + batch)
+    start = datetime.now(timezone.utc) - timedelta(days=300 - batch)
+    await seed_rows(session, Donation, [
+        {
+            "user_id": index % args.users + 1,
+            "full_amount": rng.randint(100, 10_000),
+            "invested_amount": 0,
+            "fully_invested": False,
+            "create_date": start + timedelta(seconds=index),
+        }
+        for index in range(args.donations)
+    ])
+    await fund_summary_crud.recount(session)
+    await session.commit()
+
+
+async def run(args: argparse.Namespace) -> dict:
+    engine = create_async_engine(args.database_url)
+    session_factory = sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+    async with session_factory() as session:
+        await seed(session, args)
+        users = (await session.execute(select(User))).scalars().all()
+
+    counter = QueryCounter(engine)
+    operations = {
+        name: Operation(counter)
+        for name in ("bulk_allocation", "create_donation", "create_project")
+    }
+    rng = random.Random(args.seed)
+
+    for batch in range(args.bulk_rounds):
+        async with session_factory() as session:
+            await seed_donations(session, args, batch)
+            if settings.allocation_cache:
+                await allocation_cache.rebuild(session)
+            with operations["bulk_allocation"].measure():
+                await invest_donations_in_projects(session, bulk=True)
+
+    for index in range(args.samples):
+        donation = DonationCreate(full_amount=rng.randint(100, 10_000))
+        async with session_factory() as session:
+            with operations["create_donation"].measure():
+                async with unit_of_work():
+                    await create_donation(
+                        donation, Response(), session,
+                        users[index % len(users)],
+                    )
+
+    for index in range(args.samples):
+        project = CharityProjectCreate(
+            name=f"Новый проект {index}",
+            description="Проект, созданный в бенчмарке",
+            full_amount=rng.randint(1_000, 100_000),
+        )
+        async with session_factory() as session:
+            with operations["create_project"].measure():
+                async with unit_of_work():
+                    await create_charity_project(project, Response(), session)
+
+    await engine.dispose()
+    allocation_cache.clear()
+    return {
+        "config": {
+            "dialect": engine.dialect.name,
+            "projects": args.projects,
+            "donations": args.donations,
+            "users": args.users,
+            "samples": args.samples,
+            "bulk_rounds": args.bulk_rounds,
+            "allocation_cache": settings.allocation_cache,
+        },
+        "results": {
+            name: operation.summary()
+            for name, operation in operations.items()
+        },
+    }
+
+
+def compare(report: dict, baseline: dict) -> list[str]:
+    """
+    Регрессии относительно baseline: рост числа запросов или
+    коммитов на операцию и рост p50 больше LATENCY_TOLERANCE.
+    """
+    regressions = []
+    for name, current in report["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        for metric in ("queries_per_op", "commits_per_op"):
+            if current[metric] > previous[metric]:
+                regressions.append(
+                    f"{name}.{metric}: {previous[metric]} -> {current[metric]}"
+                )
+        if current["p50_ms"] > previous["p50_ms"] * (1 + LATENCY_TOLERANCE):
+            regressions.append(
+                f"{name}.p50_ms: {previous['p50_ms']} -> {current['p50_ms']}"
+            )
+    return regressions
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.allocation",
+        description="Бенчмарк распределения пожертвований QRKot",
+    )
+    parser.add_argument("--projects", type=int, default=1_000)
+    parser.add_argument(
+        "--donations", type=int, default=10_000,
+        help="число открытых пожертвований в партии",
+    )
+    parser.add_argument("--bulk-rounds", type=int, default=5)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument(
+        "--samples", type=int, default=200,
+        help="число замеров создания проекта и пожертвования",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--database-url",
+        help="URL БД (все таблицы будут пересозданы); "
+             "по умолчанию временный файл SQLite",
+    )
+    parser.add_argument(
+        "--cache", action="store_true",
+        help="распределять по очередям в памяти (ALLOCATION_CACHE)",
+    )
+    parser.add_argument(
+        "--baseline",
+        help="имя baseline в benchmarks/baselines; по умолчанию "
+             "диалект БД и суффикс -cache для --cache",
+    )
+    parser.add_argument(
+        "--save", action="store_true", help="сохранить результат как baseline"
+    )
+    parser.add_argument(
+        "--compare", action="store_true", help="сравнить с baseline"
+    )
+    return parser
+
+
+def main(argv=None) -> None:
+    args = build_parser().parse_args(argv)
+    settings.allocation_cache = args.cache
+    with tempfile.TemporaryDirectory() as directory:
+        if args.database_url is None:
+            args.database_url = (
+                f"sqlite+aiosqlite:///{directory}/benchmark.db"
+            )
+        report = asyncio.run(run(args))
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    baseline = args.baseline or report["config"]["dialect"] + (
+        "-cache" if args.cache else ""
+    )
+    baseline_path = BASELINES_DIR / f"{baseline}.json"
+    if args.save:
+        baseline_path.write_text(
+            json.dumps(report, ensure_ascii=False, indent=2) + "\n",
+            encoding="utf-8",
+        )
+    if args.compare:
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+        if baseline["config"] != report["config"]:
+            sys.exit("Параметры запуска не совпадают с baseline.")
+        regressions = compare(report, baseline)
+        for regression in regressions:
+            print(f"Регрессия: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
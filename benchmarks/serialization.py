@@ -0,0 +1,151 @@
+"""
+Бенчмарк сериализации списков.
+
+Запуск: python -m benchmarks.serialization [параметры]
+
+БД заполняется синтетическими проектами, после чего один и тот же
+список из --rows записей собирается двумя способами:
+- orm: объекты модели, валидация схемой CharityProjectDB
+  (orm_mode), jsonable_encoder и json.dumps - как FastAPI делает
+  для response_model;
+- rows: колонки схемы запросом Core и orjson по словарям строк -
+  быстрый путь списковых эндпоинтов.
+
+Для каждого способа выводятся p50 полного времени (запрос и
+сериализация), p50 сериализации и стоимость одной записи в мкс.
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import parse_obj_as
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.responses import row_dict
+from app.core.db import Base
+from app.models import CharityProject
+from app.schemas.charity_project import CharityProjectDB
+from benchmarks.allocation import percentile, seed_rows
+
+
+def serialize_orm(objs) -> bytes:
+    # Те же параметры, что у JSONResponse
+    return json.dumps(
+        jsonable_encoder(
+            parse_obj_as(list[CharityProjectDB], objs), exclude_none=True
+        ),
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode()
+
+
+def serialize_rows(rows) -> bytes:
+    return orjson.dumps([row_dict(row, exclude_none=True) for row in rows])
+
+
+async def measure(session_factory, query, fetch, serialize, repeat) -> dict:
+    totals, serializations = [], []
+    for _ in range(repeat):
+        async with session_factory() as session:
+            started = time.perf_counter()
+            rows = fetch(await session.execute(query))
+            fetched = time.perf_counter()
+            body = serialize(rows)
+            finished = time.perf_counter()
+        totals.append(finished - started)
+        serializations.append(finished - fetched)
+    count = len(rows)
+    return {
+        "rows": count,
+        "bytes": len(body),
+        "p50_ms": round(percentile(totals, 50) * 1000, 3),
+        "serialize_p50_ms": round(percentile(serializations, 50) * 1000, 3),
+        "per_row_us": round(percentile(totals, 50) / count * 1e6, 3),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    engine = create_async_engine(args.database_url)
+    session_factory = sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+    start = datetime.now(timezone.utc) - timedelta(days=365)
+    async with session_factory() as session:
+        await seed_rows(session, CharityProject, [
+            {
+                "name": f"Проект {index}",
+                "description": "Синтетический проект " * 10,
+                "full_amount": 1_000 + index,
+                "invested_amount": index % 1_000,
+                "fully_invested": False,
+                "create_date": start + timedelta(minutes=index),
+            }
+            for index in range(args.rows)
+        ])
+        await session.commit()
+
+    columns = [
+        getattr(CharityProject, name) for name in CharityProjectDB.__fields__
+    ]
+    results = {
+        "orm": await measure(
+            session_factory,
+            select(CharityProject).order_by(CharityProject.id),
+            lambda result: result.scalars().all(),
+            serialize_orm,
+            args.repeat,
+        ),
+        "rows": await measure(
+            session_factory,
+            select(*columns).order_by(CharityProject.id),
+            lambda result: result.all(),
+            serialize_rows,
+            args.repeat,
+        ),
+    }
+    await engine.dispose()
+    return {
+        "config": {"rows": args.rows, "repeat": args.repeat},
+        "results": results,
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.serialization",
+        description="Бенчмарк сериализации списков QRKot",
+    )
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument(
+        "--database-url",
+        help="URL БД (все таблицы будут пересозданы); "
+             "по умолчанию временный файл SQLite",
+    )
+    return parser
+
+
+def main(argv=None) -> None:
+    args = build_parser().parse_args(argv)
+    with tempfile.TemporaryDirectory() as directory:
+        if args.database_url is None:
+            args.database_url = (
+                f"sqlite+aiosqlite:///{directory}/benchmark.db"
+            )
+        report = asyncio.run(run(args))
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,14 @@
+import os
 from pathlib import Path
 
 import pytest
 import pytest_asyncio
 from mixer.backend.sqlalchemy import Mixer as _mixer
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 try:
     from app.main import app  # noqa
@@ -34,6 +37,7 @@ except (NameError, ImportError) as error:
     )
 
 try:
+    from app.models import User  # noqa
     from app.schemas.user import UserCreate  # noqa
 except (NameError, ImportError) as error:
     raise AssertionError(
@@ -51,11 +55,21 @@ pytest_plugins = [
 ]
 
 TEST_DB = BASE_DIR / 'test.db'
-SQLALCHEMY_DATABASE_URL = f'sqlite+aiosqlite:///{str(TEST_DB)}'
-engine = create_async_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={'check_same_thread': False},
+# Тесты на PostgreSQL: TEST_DATABASE_URL=postgresql+asyncpg://...
+SQLALCHEMY_DATABASE_URL = make_url(os.environ.get(
+    'TEST_DATABASE_URL', f'sqlite+aiosqlite:///{str(TEST_DB)}'
+))
+# Тот же адрес с синхронным драйвером (mixer, потоки в тестах)
+SYNC_DATABASE_URL = SQLALCHEMY_DATABASE_URL.set(
+    drivername=SQLALCHEMY_DATABASE_URL.get_backend_name()
 )
+if SQLALCHEMY_DATABASE_URL.get_backend_name() == 'sqlite':
+    engine_options = {'connect_args': {'check_same_thread': False}}
+else:
+    # Соединение asyncpg привязано к циклу событий, а у каждого теста
+    # и у TestClient свой цикл: соединения не переиспользуются
+    engine_options = {'poolclass': NullPool}
+engine = create_async_engine(SQLALCHEMY_DATABASE_URL, **engine_options)
 TestingSessionLocal = sessionmaker(
     class_=AsyncSession, autocommit=False, autoflush=False, bind=engine,
 )
@@ -66,10 +80,35 @@ async def override_db():
         yield session
 
 
+# Пользователи из fixtures.user: PostgreSQL проверяет внешний ключ
+# donation.user_id, поэтому там их строки создаются в БД
+FIXTURE_USER_IDS = (1, 2, 3)
+
+
+async def seed_fixture_users(conn):
+    table = User.__table__
+    await conn.execute(insert(table), [
+        {
+            'id': user_id,
+            'email': f'user{user_id}@example.com',
+            'hashed_password': '',
+            'is_active': True,
+            'is_superuser': False,
+            'is_verified': True,
+        }
+        for user_id in FIXTURE_USER_IDS
+    ])
+    await conn.execute(text(
+        "SELECT setval(pg_get_serial_sequence('\"user\"', 'id'), :value)"
+    ), {'value': max(FIXTURE_USER_IDS)})
+
+
 @pytest_asyncio.fixture(autouse=True)
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        if SQLALCHEMY_DATABASE_URL.get_backend_name() != 'sqlite':
+            await seed_fixture_users(conn)
     yield
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
@@ -77,6 +116,10 @@ async def init_db():
 
 @pytest.fixture
 def mixer():
-    mixer_engine = create_engine(f'sqlite:///{str(TEST_DB)}')
-    session = sessionmaker(bind=mixer_engine)
-    return _mixer(session=session(), commit=True)
+    mixer_engine = create_engine(SYNC_DATABASE_URL)
+    session = sessionmaker(bind=mixer_engine)()
+    yield _mixer(session=session, commit=True)
+    # Чтение атрибутов созданных объектов открывает транзакцию,
+    # которая на PostgreSQL не даст удалить таблицы после теста
+    session.close()
+    mixer_engine.dispose()
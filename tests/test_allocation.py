@@ -0,0 +1,520 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from conftest import (
+    SYNC_DATABASE_URL, TestingSessionLocal, app, current_superuser,
+    current_user, engine, get_async_session, override_db
+)
+from fastapi.testclient import TestClient
+from fixtures.user import superuser
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app import cli
+from app.core.config import settings
+from app.core.unit_of_work import unit_of_work
+from app.crud.charity_project import project_crud
+from app.crud.donation import donation_crud
+from app.schemas.charity_project import (
+    CharityProjectCreate, CharityProjectUpdate
+)
+from app.schemas.donation import DonationCreate
+from app.services import allocation_replay
+from app.services.allocation_cache import OpenQueue, allocation_cache
+from app.services.allocation_worker import AllocationWorker, allocation_worker
+from app.services.investment import invest_donations_in_projects
+from app.services.locking import allocation_lock
+
+DONATION_URL = '/donation/'
+PROJECTS_URL = '/charity_project/'
+CACHE_VERIFY_URL = '/allocation/cache/verify'
+STATUS_URL = '/allocation/status'
+SIMULATE_URL = '/allocation/simulate'
+FUND_URL = '/allocation/fund'
+STRESS_DONATIONS = 1000
+STRESS_WORKERS = 50
+
+
+@pytest.fixture
+def cached_client(superuser_client, monkeypatch):
+    monkeypatch.setattr(settings, 'allocation_cache', True)
+    app.dependency_overrides[current_user] = lambda: superuser
+    yield superuser_client
+    allocation_cache.clear()
+
+
+def test_cache_verify_disabled(superuser_client):
+    response = superuser_client.post(CACHE_VERIFY_URL)
+    assert response.status_code == 400, (
+        'Сверка кэша распределения при выключенном кэше '
+        'должна возвращать ошибку 400.'
+    )
+
+
+def test_cache_allocation_matches_db(cached_client, charity_project,
+                                     charity_project_nunchaku):
+    response = cached_client.post(CACHE_VERIFY_URL)
+    assert response.json() == {
+        'consistent': False, 'projects': 2, 'donations': 0,
+    }, 'Первая сверка должна построить очереди из БД.'
+
+    for amount in (600000, 500000, 300):
+        cached_client.post(DONATION_URL, json={'full_amount': amount})
+    cached_client.post(PROJECTS_URL, json={
+        'name': 'Корм для котиков',
+        'description': 'Корм на целый год',
+        'full_amount': 100,
+    })
+
+    assert charity_project.fully_invested
+    assert charity_project_nunchaku.invested_amount == 100300
+    response = cached_client.post(CACHE_VERIFY_URL)
+    assert response.json() == {
+        'consistent': True, 'projects': 2, 'donations': 0,
+    }, (
+        'После распределения по очередям в памяти их состояние '
+        'должно совпадать с БД.'
+    )
+
+
+def test_cache_accepts_bulk_donations(cached_client):
+    cached_client.post(CACHE_VERIFY_URL)
+    cached_client.post(DONATION_URL, json={'full_amount': 100})
+    response = cached_client.post(
+        DONATION_URL + 'bulk', json=[{'full_amount': 200}] * 2
+    )
+    assert response.status_code == 200, (
+        'Пакет пожертвований должен вставать в очередь кэша '
+        'после прочитанных из БД.'
+    )
+    assert cached_client.post(CACHE_VERIFY_URL).json()['consistent']
+
+
+def test_simulate_allocation(superuser_client, charity_project,
+                             charity_project_nunchaku):
+    response = superuser_client.post(SIMULATE_URL, json={
+        'projects': [100],
+        'donations': [600000, 500000],
+    })
+    assert response.status_code == 200
+    assert response.json() == {
+        'allocated': 1100000,
+        'projects': [
+            {'id': 1, 'amount': 1000000, 'fully_invested': True},
+            {'id': 2, 'amount': 100000, 'fully_invested': False},
+        ],
+        'donations': [
+            {'request_index': 0, 'amount': 600000, 'fully_invested': True},
+            {'request_index': 1, 'amount': 500000, 'fully_invested': True},
+        ],
+    }, (
+        'Пробное распределение должно показывать, какие проекты закроются '
+        'и какие пожертвования будут израсходованы.'
+    )
+    projects = superuser_client.get(PROJECTS_URL).json()
+    assert all(project['invested_amount'] == 0 for project in projects), (
+        'Пробное распределение не должно ничего записывать в БД.'
+    )
+
+
+def test_simulate_allocation_superuser_only(user_client):
+    response = user_client.post(SIMULATE_URL, json={'donations': [100]})
+    assert response.status_code == 403, (
+        'Пробное распределение доступно только суперюзеру.'
+    )
+
+
+def balances():
+    engine = create_engine(SYNC_DATABASE_URL)
+    with engine.connect() as connection:
+        return {
+            table: connection.execute(text(
+                f'SELECT full_amount, invested_amount, fully_invested '
+                f'FROM {table} ORDER BY create_date, id'
+            )).all()
+            for table in ('charityproject', 'donation')
+        }, connection.execute(
+            text('SELECT COALESCE(SUM(amount), 0) FROM investment')
+        ).scalar()
+
+
+def ledger_transfers():
+    engine = create_engine(SYNC_DATABASE_URL)
+    with engine.connect() as connection:
+        return connection.execute(text(
+            'SELECT donation_id, project_id, amount FROM investment '
+            'ORDER BY donation_id, project_id'
+        )).all()
+
+
+def fund_counters():
+    engine = create_engine(SYNC_DATABASE_URL)
+    with engine.connect() as connection:
+        return tuple(connection.execute(text(
+            'SELECT open_project_deficit, unspent_donation_balance '
+            'FROM fundsummary'
+        )).one())
+
+
+def open_remaining(rows):
+    return sum(
+        row.full_amount - row.invested_amount
+        for row in rows if not row.fully_invested
+    )
+
+
+@pytest.mark.parametrize('cache', [False, True], ids=['db', 'cache'])
+def test_concurrent_donations_keep_balances(
+        user_client, charity_project, charity_project_nunchaku,
+        monkeypatch, cache
+):
+    if cache:
+        monkeypatch.setattr(settings, 'allocation_cache', True)
+        app.dependency_overrides[current_user] = lambda: superuser
+        user_client.post(CACHE_VERIFY_URL)
+    amounts = [1000 + index * 7 for index in range(STRESS_DONATIONS)]
+    try:
+        with ThreadPoolExecutor(max_workers=STRESS_WORKERS) as executor:
+            responses = list(executor.map(
+                lambda amount: user_client.post(
+                    DONATION_URL, json={'full_amount': amount}
+                ),
+                amounts,
+            ))
+    finally:
+        allocation_cache.clear()
+
+    assert all(response.status_code == 200 for response in responses), (
+        'Все параллельные запросы на создание пожертвования '
+        'должны завершаться успешно.'
+    )
+    tables, ledger_total = balances()
+    project_total = sum(row.invested_amount for row in tables['charityproject'])
+    donation_total = sum(row.invested_amount for row in tables['donation'])
+    expected = min(sum(amounts), 1000000 + 5000000)
+    assert project_total == donation_total == ledger_total == expected, (
+        'Сумма, распределённая в проекты, должна совпадать с суммой, '
+        'списанной с пожертвований, и с журналом распределений.'
+    )
+    for rows in tables.values():
+        for row in rows:
+            assert row.invested_amount <= row.full_amount, (
+                'Распределённая сумма не может превышать полную.'
+            )
+            assert bool(row.fully_invested) == (
+                row.invested_amount == row.full_amount
+            ), 'Закрыты должны быть ровно полностью распределённые записи.'
+    open_donations = [
+        row for row in tables['donation'] if not row.fully_invested
+    ]
+    assert len(open_donations) <= 1 or all(
+        row.fully_invested for row in tables['charityproject']
+    ), 'Свободные средства не должны оставаться при открытых проектах.'
+    assert fund_counters() == (
+        open_remaining(tables['charityproject']),
+        open_remaining(tables['donation']),
+    ), 'Сводные счётчики фонда должны совпадать с данными таблиц.'
+
+
+def test_fund_status(superuser_client, charity_project):
+    app.dependency_overrides[current_user] = lambda: superuser
+    superuser_client.post(DONATION_URL, json={'full_amount': 300})
+    superuser_client.post(DONATION_URL, json={'full_amount': 200})
+    response = superuser_client.get(FUND_URL)
+    assert response.status_code == 200
+    assert response.json() == {
+        'open_project_deficit': 999500,
+        'unspent_donation_balance': 0,
+    }, 'Сводные счётчики должны учитывать все распределения.'
+
+    superuser_client.patch(
+        f'{PROJECTS_URL}{charity_project.id}', json={'full_amount': 1000}
+    )
+    superuser_client.post(PROJECTS_URL, json={
+        'name': 'Корм для котиков',
+        'description': 'Корм на целый год',
+        'full_amount': 100,
+    })
+    project_id = superuser_client.post(PROJECTS_URL, json={
+        'name': 'Домик для котиков',
+        'description': 'Домик на дереве',
+        'full_amount': 400,
+    }).json()['id']
+    superuser_client.delete(f'{PROJECTS_URL}{project_id}')
+    assert superuser_client.get(FUND_URL).json() == {
+        'open_project_deficit': 600,
+        'unspent_donation_balance': 0,
+    }, (
+        'Сводные счётчики должны меняться при изменении '
+        'и удалении проектов.'
+    )
+
+
+def test_allocation_skipped_without_open_projects(
+        superuser_client, monkeypatch
+):
+    async def fail(*args, **kwargs):
+        raise AssertionError('Открытые записи не должны читаться.')
+
+    app.dependency_overrides[current_user] = lambda: superuser
+    monkeypatch.setattr(project_crud, 'get_opened', fail)
+    response = superuser_client.post(DONATION_URL, json={'full_amount': 300})
+    assert response.status_code == 200, (
+        'Без открытых проектов распределение должно пропускаться '
+        'по сводным счётчикам.'
+    )
+    assert fund_counters() == (0, 300)
+
+
+@pytest.fixture
+def background_client(monkeypatch):
+    monkeypatch.setattr(settings, 'allocation_background', True)
+    monkeypatch.setattr(
+        allocation_worker, 'session_factory', TestingSessionLocal
+    )
+    app.dependency_overrides = {}
+    app.dependency_overrides[get_async_session] = override_db
+    app.dependency_overrides[current_user] = lambda: superuser
+    app.dependency_overrides[current_superuser] = lambda: superuser
+    with TestClient(app) as client:
+        yield client
+
+
+def wait_applied(client, ticket):
+    for _ in range(100):
+        status = client.get(STATUS_URL, params={'ticket': ticket}).json()
+        if status['status'] == 'applied':
+            return status
+        time.sleep(0.02)
+    raise AssertionError(f'Заявка на распределение {ticket} не выполнена.')
+
+
+def test_background_allocation(background_client, charity_project):
+    response = background_client.post(
+        DONATION_URL, json={'full_amount': 1000000}
+    )
+    assert response.status_code == 200
+    assert response.headers['X-Allocation-Status'] == 'pending', (
+        'В фоновом режиме ответ должен сообщать, что распределение '
+        'ещё ожидает выполнения.'
+    )
+    wait_applied(background_client, response.headers['X-Allocation-Ticket'])
+    assert charity_project.fully_invested, (
+        'После выполнения заявки пожертвование должно быть распределено.'
+    )
+
+
+async def test_worker_coalesces_triggers():
+    worker = AllocationWorker(session_factory=TestingSessionLocal)
+    worker.start()
+    tickets = [worker.trigger() for _ in range(5)]
+    while not worker.is_applied(tickets[-1]):
+        await asyncio.sleep(0.01)
+    await worker.stop()
+    assert worker.passes == 1, (
+        'Заявки, поставленные до начала прохода, должны обрабатываться '
+        'одним проходом распределения.'
+    )
+
+
+def run_replay(command, capsys):
+    cli.main([command])
+    return json.loads(capsys.readouterr().out)
+
+
+def test_rebuild_allocation_fixes_drift(superuser_client, monkeypatch, capsys):
+    monkeypatch.setattr(cli, 'AsyncSessionLocal', TestingSessionLocal)
+    monkeypatch.setattr(allocation_replay, 'REPLAY_CHUNK_SIZE', 2)
+    app.dependency_overrides[current_user] = lambda: superuser
+    for amount in (300, 500, 100, 800):
+        superuser_client.post(DONATION_URL, json={'full_amount': amount})
+    for index, amount in enumerate((400, 200, 1000)):
+        superuser_client.post(PROJECTS_URL, json={
+            'name': f'Проект {index}',
+            'description': 'Описание проекта',
+            'full_amount': amount,
+        })
+    expected = balances()
+
+    report = run_replay('verify-allocation', capsys)
+    assert (report['projects'], report['donations'], report['drifted']) == (
+        3, 4, 0
+    ), 'Распределение через API не должно расходиться с пересчётом.'
+    assert report['ledger_drifted'] == 0, (
+        'Распределение через API не должно расходиться с журналом.'
+    )
+
+    engine = create_engine(SYNC_DATABASE_URL)
+    with engine.begin() as connection:
+        connection.execute(text(
+            'UPDATE charityproject SET invested_amount = 0, '
+            'fully_invested = false, close_date = NULL WHERE id = 1'
+        ))
+        connection.execute(text(
+            'UPDATE donation SET invested_amount = 50 WHERE id = 4'
+        ))
+    report = run_replay('verify-allocation', capsys)
+    assert report['drifted'] == 2 and report['corrected'] == 0, (
+        'verify-allocation должна находить расхождения, не исправляя их.'
+    )
+    assert {(row['table'], row['id']) for row in report['drift']} == {
+        ('charityproject', 1), ('donation', 4),
+    }
+    assert {
+        (row['table'], row['id'], row['invested_amount'], row['ledger'])
+        for row in report['ledger_drift']
+    } == {('charityproject', 1, 0, 400), ('donation', 4, 50, 700)}, (
+        'verify-allocation должна сверять invested_amount с журналом.'
+    )
+
+    report = run_replay('rebuild-allocation', capsys)
+    assert report['corrected'] == 2, (
+        'rebuild-allocation должна исправлять найденные расхождения.'
+    )
+    assert balances() == expected, (
+        'После исправления состояние должно совпадать с исходным.'
+    )
+    tables, _ = balances()
+    assert fund_counters() == (
+        open_remaining(tables['charityproject']),
+        open_remaining(tables['donation']),
+    ), 'rebuild-allocation должна пересчитывать сводные счётчики.'
+    report = run_replay('verify-allocation', capsys)
+    assert (report['drifted'], report['ledger_drifted']) == (0, 0)
+
+    ledger = ledger_transfers()
+    with engine.begin() as connection:
+        connection.execute(text('DELETE FROM investment WHERE id = 1'))
+    report = run_replay('rebuild-allocation', capsys)
+    assert (report['drifted'], report['ledger_drifted']) == (0, 2)
+    assert report['ledger_rebuilt'] == len(ledger), (
+        'rebuild-allocation должна пересобирать журнал, '
+        'расходящийся с распределёнными суммами.'
+    )
+    assert ledger_transfers() == ledger, (
+        'Пересобранный журнал должен совпадать с переводами, '
+        'выполненными через API.'
+    )
+    assert run_replay('verify-allocation', capsys)['ledger_drifted'] == 0
+
+
+async def test_verify_allocation_sees_one_state(monkeypatch):
+    # Проект создаётся без фикстуры: её freezer останавливает asyncio.sleep
+    async with TestingSessionLocal() as session:
+        await project_crud.create(CharityProjectCreate(
+            name='Корм для котиков', description='Корм на целый год',
+            full_amount=1000,
+        ), session)
+    between_reads = asyncio.Event()
+    partitions = allocation_replay._partitions
+
+    async def partitions_with_pause(session, model):
+        if model is allocation_replay.Donation:
+            between_reads.set()
+            # Даём распределению другого запроса шанс закоммититься
+            await asyncio.sleep(0.2)
+        async for partition in partitions(session, model):
+            yield partition
+
+    async def allocate():
+        await between_reads.wait()
+        async with TestingSessionLocal() as session:
+            async with allocation_lock(session):
+                await donation_crud.create(
+                    DonationCreate(full_amount=100), session, superuser
+                )
+                await invest_donations_in_projects(session)
+
+    monkeypatch.setattr(
+        allocation_replay, '_partitions', partitions_with_pause
+    )
+    # Задача создаётся до сверки, чтобы не унаследовать её блокировку
+    task = asyncio.create_task(allocate())
+    async with TestingSessionLocal() as session:
+        report = await allocation_replay.AllocationReplay(session).run()
+    await task
+    assert (report.drifted, report.ledger_drifted) == (0, 0), (
+        'Распределение, закоммиченное во время сверки, не должно '
+        'выглядеть как расхождение.'
+    )
+
+
+async def test_update_many_shifts_fund_counters(
+        charity_project, charity_project_nunchaku
+):
+    ids = [charity_project.id, charity_project_nunchaku.id]
+    async with TestingSessionLocal() as session:
+        projects = [await project_crud.get(id_, session) for id_ in ids]
+        await project_crud.update_many(
+            projects, CharityProjectUpdate(full_amount=5000), session
+        )
+
+    tables, _ = balances()
+    assert {row.full_amount for row in tables['charityproject']} == {5000}, (
+        'update_many должен обновлять все переданные записи.'
+    )
+    assert fund_counters()[0] == open_remaining(tables['charityproject']), (
+        'update_many должен сдвигать сводные счётчики фонда.'
+    )
+
+
+async def test_created_project_queued_after_loaded(charity_project):
+    # Как в приложении: объекты не сбрасываются после commit
+    # и не перечитываются из БД
+    session_factory = sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+    queue = OpenQueue()
+    async with session_factory() as session:
+        queue.load([await project_crud.get(charity_project.id, session)])
+        created = await project_crud.create(CharityProjectCreate(
+            name='Новый проект',
+            description='Описание проекта',
+            full_amount=100,
+        ), session)
+        queue.put(created)
+    assert [entry.id for entry in queue.entries] == [
+        charity_project.id, created.id,
+    ], 'Созданный проект должен вставать в очередь после прочитанных из БД.'
+
+
+async def test_cache_reset_on_rollback(charity_project, monkeypatch):
+    monkeypatch.setattr(settings, 'allocation_cache', True)
+    try:
+        async with TestingSessionLocal() as session:
+            await allocation_cache.rebuild(session)
+        async with TestingSessionLocal() as session:
+            with pytest.raises(RuntimeError):
+                async with unit_of_work():
+                    donation = await donation_crud.create(
+                        DonationCreate(full_amount=300), session, superuser
+                    )
+                    allocation_cache.put(donation)
+                    await invest_donations_in_projects(session)
+                    raise RuntimeError
+        assert not allocation_cache.ready, (
+            'Откат запроса должен сбрасывать очереди, изменённые '
+            'его незакоммиченной транзакцией.'
+        )
+
+        async with TestingSessionLocal() as session:
+            async with unit_of_work():
+                donation = await donation_crud.create(
+                    DonationCreate(full_amount=200), session, superuser
+                )
+                allocation_cache.put(donation)
+                await invest_donations_in_projects(session)
+        assert allocation_cache.projects.snapshot() == [
+            (charity_project.id, 1000000 - 200),
+        ], (
+            'Следующий проход должен перестроить очереди из БД '
+            'без откаченного пожертвования.'
+        )
+        async with TestingSessionLocal() as session:
+            assert await allocation_cache.verify(session)
+    finally:
+        allocation_cache.clear()
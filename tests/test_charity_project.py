@@ -1,10 +1,35 @@
+import json
 import time
 from datetime import datetime
 
 import pytest
+from conftest import TestingSessionLocal, engine
+from pydantic import parse_obj_as
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app import cli
+from app.core.sql import days_between
+from app.crud.charity_project import project_crud
+from app.models import CharityProject
+from app.schemas.charity_project import CharityProjectDB
+from app.services import project_import
 
 PROJECTS_URL = '/charity_project/'
 PROJECT_DETAILS_URL = PROJECTS_URL + '{project_id}'
+PROJECTS_IMPORT_URL = PROJECTS_URL + 'import'
+PROJECTS_NDJSON = (
+    '{"name": "Корм на зиму", "description": "Корм для приюта", '
+    '"full_amount": 50}\n'
+    '{"name": "chimichangas4life", "description": "Уже есть в БД", '
+    '"full_amount": 10}\n'
+    '\n'
+    '{"name": "Лечение котят", "description": "Ветеринарная клиника"}\n'
+    '{"name": "Корм на зиму", "description": "Дубликат в файле", '
+    '"full_amount": 10}\n'
+    '{"name": "Новые домики", "description": "Домики для котиков", '
+    '"full_amount": 1000}'
+)
 
 
 @pytest.mark.parametrize(
@@ -728,3 +753,203 @@ def test_get_all_charity_project_not_auth_user(test_client):
         f'пользователя к эндпоинту `{PROJECTS_URL}` возвращается список '
         'существующих проектов.'
     )
+
+
+
+@pytest.mark.usefixtures('charity_project', 'donation')
+def test_import_projects_ndjson(superuser_client):
+    response = superuser_client.post(
+        PROJECTS_IMPORT_URL,
+        data=PROJECTS_NDJSON.encode(),
+        headers={'Content-Type': 'application/x-ndjson'},
+    )
+    assert response.status_code == 200, (
+        f'POST-запрос суперпользователя к `{PROJECTS_IMPORT_URL}` '
+        'должен возвращать статус-код 200.'
+    )
+    data = response.json()
+    assert (data['created'], data['skipped']) == (2, 3), (
+        'Импорт должен создать корректные проекты и пропустить строки '
+        'с ошибками и с уже занятыми именами.'
+    )
+    assert [error['line'] for error in data['errors']] == [2, 4, 5], (
+        'Ошибки импорта должны содержать номера строк.'
+    )
+    projects = superuser_client.get(PROJECTS_URL).json()
+    assert [
+        (project['name'], project['invested_amount']) for project in projects
+    ] == [
+        ('chimichangas4life', 100),
+        ('Корм на зиму', 0),
+        ('Новые домики', 0),
+    ], (
+        'Импортированные проекты должны участвовать в распределении '
+        'после открытых проектов, созданных раньше.'
+    )
+
+
+def test_import_projects_forbidden_for_user(user_client):
+    response = user_client.post(
+        PROJECTS_IMPORT_URL,
+        data=PROJECTS_NDJSON.encode(),
+        headers={'Content-Type': 'application/x-ndjson'},
+    )
+    assert response.status_code == 403, (
+        'Импорт проектов доступен только суперпользователю.'
+    )
+
+
+async def test_import_spools_body_before_reading(monkeypatch):
+    monkeypatch.setattr(project_import, 'SPOOL_MAX_SIZE', 8)
+    monkeypatch.setattr(project_import, 'SPOOL_CHUNK_SIZE', 5)
+    received = []
+
+    async def body():
+        for chunk in (b'{"a": 1}\n', b'{"b"', b': 2}\n'):
+            received.append(chunk)
+            yield chunk
+
+    async with project_import.spool(body()) as chunks:
+        assert len(received) == 3, (
+            'Тело запроса должно быть принято целиком до начала импорта: '
+            'иначе транзакция ждёт, пока клиент передаёт данные.'
+        )
+        lines = [
+            line async for line in project_import.iter_lines(chunks)
+        ]
+    assert lines == [(1, b'{"a": 1}'), (2, b'{"b": 2}')], (
+        'Строки из временного файла должны совпадать с телом запроса.'
+    )
+
+
+def test_import_projects_cli(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(cli, 'AsyncSessionLocal', TestingSessionLocal)
+    path = tmp_path / 'projects.ndjson'
+    path.write_text(PROJECTS_NDJSON, encoding='utf-8')
+    cli.main(['import-projects', str(path)])
+    summary = json.loads(capsys.readouterr().out)
+    assert (summary['created'], summary['skipped']) == (3, 2), (
+        'Команда import-projects должна импортировать проекты из файла.'
+    )
+
+
+def test_get_charity_projects_pages(user_client, charity_project,
+                                    charity_project_nunchaku,
+                                    small_fully_charity_project):
+    response = user_client.get(PROJECTS_URL, params={'limit': 2})
+    assert [project['name'] for project in response.json()] == [
+        'chimichangas4life', 'nunchaku',
+    ]
+    cursor = response.headers.get('X-Next-Cursor')
+    assert cursor, (
+        'Если записей больше, чем limit, ответ должен содержать '
+        'курсор следующей страницы в заголовке X-Next-Cursor.'
+    )
+    response = user_client.get(
+        PROJECTS_URL, params={'limit': 2, 'cursor': cursor}
+    )
+    assert [project['id'] for project in response.json()] == [
+        small_fully_charity_project.id,
+    ], 'Следующая страница должна начинаться после последней записи.'
+    assert 'X-Next-Cursor' not in response.headers
+
+
+def test_get_charity_projects_fields(user_client, charity_project,
+                                     charity_project_nunchaku):
+    response = user_client.get(
+        PROJECTS_URL,
+        params={'fields': 'name,invested_amount', 'limit': 1},
+    )
+    assert response.status_code == 200
+    assert response.json() == [{
+        'id': charity_project.id,
+        'name': charity_project.name,
+        'invested_amount': charity_project.invested_amount,
+    }], 'С параметром fields ответ должен содержать только эти поля и id.'
+    assert 'X-Next-Cursor' in response.headers, (
+        'Ответ с fields должен содержать курсор следующей страницы.'
+    )
+
+
+def test_get_charity_projects_fields_select_columns(user_client,
+                                                    charity_project):
+    statements = []
+
+    def capture(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, 'before_cursor_execute', capture)
+    try:
+        user_client.get(PROJECTS_URL, params={'fields': 'name'})
+    finally:
+        event.remove(engine.sync_engine, 'before_cursor_execute', capture)
+    assert statements and not any(
+        'description' in statement for statement in statements
+    ), (
+        'С параметром fields описание проекта не должно читаться из БД.'
+    )
+
+
+@pytest.mark.parametrize('fields', ['name,unknown', 'user_id'])
+def test_get_charity_projects_unknown_fields(user_client, fields):
+    response = user_client.get(PROJECTS_URL, params={'fields': fields})
+    assert response.status_code == 400, (
+        'Неизвестные поля в параметре fields должны отклоняться.'
+    )
+
+
+def test_get_charity_projects_match_schema(user_client, charity_project,
+                                           small_fully_charity_project):
+    response = user_client.get(PROJECTS_URL)
+    projects = parse_obj_as(list[CharityProjectDB], response.json())
+    assert [
+        json.loads(project.json(exclude_none=True)) for project in projects
+    ] == response.json(), (
+        'Список проектов отдаётся без валидации pydantic, поэтому '
+        'каждая запись должна совпадать со схемой CharityProjectDB.'
+    )
+
+
+async def test_projects_by_completion_rate_days(mixer):
+    for name, create_date, close_date in (
+        ('Зимний сбор', datetime(2023, 12, 31, 12), datetime(2024, 1, 2)),
+        ('Весенний сбор', datetime(2024, 1, 1), datetime(2024, 3, 1)),
+    ):
+        mixer.blend(
+            'app.models.charity_project.CharityProject',
+            name=name,
+            full_amount=100,
+            invested_amount=100,
+            fully_invested=True,
+            create_date=create_date,
+            close_date=close_date,
+        )
+    async with TestingSessionLocal() as session:
+        projects = await project_crud.get_projects_by_completion_rate(session)
+    assert [(project['name'], project['days']) for project in projects] == [
+        ('Зимний сбор', 1), ('Весенний сбор', 60),
+    ], (
+        'Длительность сбора должна считаться в полных сутках '
+        'между созданием и закрытием проекта.'
+    )
+
+
+@pytest.mark.parametrize('dialect, expected', [
+    (
+        postgresql.dialect(),
+        'CAST(EXTRACT(DAY FROM (charityproject.close_date) - '
+        '(charityproject.create_date)) AS INTEGER)',
+    ),
+    (
+        sqlite.dialect(),
+        'CAST(julianday(charityproject.close_date) - '
+        'julianday(charityproject.create_date) AS INTEGER)',
+    ),
+])
+def test_days_between_compiles_per_dialect(dialect, expected):
+    expression = days_between(
+        CharityProject.create_date, CharityProject.close_date
+    )
+    assert str(expression.compile(dialect=dialect)) == expected, (
+        'days_between должна собираться под диалект СУБД.'
+    )
@@ -1,11 +1,17 @@
+import json
 import time
 from datetime import datetime
 
 import pytest
+from pydantic import parse_obj_as
+
+from app.crud import donation as crud_donation
+from app.schemas.donation import DonationDB
 
 DONATIONS_URL = '/donation/'
 DONATON_DETAILS_URL = DONATIONS_URL + '{donation_id}'
 MY_DONATIONS_URL = DONATIONS_URL + 'my'
+BULK_DONATIONS_URL = DONATIONS_URL + 'bulk'
 
 
 @pytest.mark.parametrize('json_data, expected_keys, expected_data', [
@@ -221,3 +227,184 @@ def test_create_donation_check_create_date(user_client):
         'Убедитесь, что при неодновременном создании двух пожертвований '
         'у них отличаются значения в поле `create_date`.'
     )
+
+
+@pytest.mark.parametrize('content_type, body', [
+    (
+        'application/json',
+        '[{"full_amount": 600000}, {"full_amount": 500000, "comment": "x"}]',
+    ),
+    (
+        'application/x-ndjson',
+        '{"full_amount": 600000}\n{"full_amount": 500000, "comment": "x"}\n',
+    ),
+], ids=['json', 'ndjson'])
+def test_create_donations_bulk(user_client, charity_project, content_type,
+                               body):
+    response = user_client.post(
+        BULK_DONATIONS_URL, data=body, headers={'Content-Type': content_type}
+    )
+    assert response.status_code == 200, (
+        f'Корректный POST-запрос к `{BULK_DONATIONS_URL}` должен '
+        'возвращать статус-код 200.'
+    )
+    data = response.json()
+    assert data == {
+        'ids': [1, 2],
+        'count': 2,
+        'full_amount': 1100000,
+        'invested_amount': 1000000,
+    }, (
+        'Ответ на пакетное создание должен содержать id пожертвований '
+        'и сводку по пакету после распределения.'
+    )
+    assert charity_project.fully_invested, (
+        'Пакет пожертвований должен распределяться по открытым проектам.'
+    )
+    my_donations = user_client.get(MY_DONATIONS_URL).json()
+    assert [item['full_amount'] for item in my_donations] == [
+        600000, 500000,
+    ]
+
+
+def test_create_donations_bulk_chunked_total(user_client, charity_project,
+                                             monkeypatch):
+    monkeypatch.setattr(crud_donation, 'IN_CHUNK_SIZE', 2)
+    response = user_client.post(
+        BULK_DONATIONS_URL, json=[{'full_amount': 300000}] * 5
+    )
+    assert response.json()['invested_amount'] == 1000000, (
+        'Распределённая сумма пакета должна собираться по всем частям '
+        'списка id.'
+    )
+
+
+@pytest.mark.parametrize('body', [
+    '[{"full_amount": 10}, {"full_amount": -1}]',
+    '[{"full_amount": 10, "invested_amount": 10}]',
+])
+def test_create_donations_bulk_invalid_item(user_client, body):
+    response = user_client.post(
+        BULK_DONATIONS_URL, data=body,
+        headers={'Content-Type': 'application/json'},
+    )
+    assert response.status_code == 422, (
+        'Если хотя бы один элемент пакета некорректен, '
+        'должен вернуться статус-код 422.'
+    )
+    assert user_client.get(MY_DONATIONS_URL).json() == [], (
+        'Некорректный пакет не должен создавать пожертвований.'
+    )
+
+
+@pytest.mark.parametrize('body', ['{"full_amount": 10}', '[]', '[{'])
+def test_create_donations_bulk_bad_body(user_client, body):
+    response = user_client.post(
+        BULK_DONATIONS_URL, data=body,
+        headers={'Content-Type': 'application/json'},
+    )
+    assert response.status_code == 400, (
+        'Тело пакетного запроса должно быть непустым JSON-массивом.'
+    )
+
+
+def read_pages(client, url, limit):
+    items, pages, params = [], 0, {'limit': limit}
+    while True:
+        response = client.get(url, params=params)
+        assert response.status_code == 200
+        items.extend(response.json())
+        pages += 1
+        cursor = response.headers.get('X-Next-Cursor')
+        if cursor is None:
+            return items, pages
+        params = {'limit': limit, 'cursor': cursor}
+
+
+def test_user_donations_pages(user_client):
+    for amount in range(1, 6):
+        user_client.post(DONATIONS_URL, json={'full_amount': amount})
+
+    donations, pages = read_pages(user_client, MY_DONATIONS_URL, 2)
+    assert [item['full_amount'] for item in donations] == [1, 2, 3, 4, 5], (
+        'Страницы пожертвований пользователя должны вместе содержать '
+        'все его пожертвования по одному разу.'
+    )
+    assert pages == 3, (
+        'Последняя страница не должна отдавать курсор следующей.'
+    )
+
+
+def test_all_donations_pages(superuser_client, donation, another_donation):
+    donations, pages = read_pages(superuser_client, DONATIONS_URL, 1)
+    assert [item['id'] for item in donations] == [
+        donation.id, another_donation.id,
+    ] and pages == 2, 'Список всех пожертвований должен отдаваться страницами.'
+
+
+def test_all_donations_ndjson(superuser_client, donation, another_donation):
+    response = superuser_client.get(
+        DONATIONS_URL, headers={'Accept': 'application/x-ndjson'}
+    )
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith(
+        'application/x-ndjson'
+    ), 'Выгрузка должна отдаваться в формате NDJSON.'
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert rows == superuser_client.get(DONATIONS_URL).json(), (
+        'Строки выгрузки должны совпадать со списком пожертвований.'
+    )
+
+    cursor = superuser_client.get(
+        DONATIONS_URL, params={'limit': 1}
+    ).headers['X-Next-Cursor']
+    response = superuser_client.get(
+        DONATIONS_URL,
+        params={'cursor': cursor},
+        headers={'Accept': 'application/x-ndjson'},
+    )
+    assert [
+        json.loads(line)['id'] for line in response.text.splitlines()
+    ] == [another_donation.id], 'Выгрузка должна продолжаться после курсора.'
+
+
+def test_all_donations_fields(superuser_client, donation):
+    params = {'fields': 'full_amount'}
+    expected = [{'id': donation.id, 'full_amount': donation.full_amount}]
+    response = superuser_client.get(DONATIONS_URL, params=params)
+    assert response.json() == expected, (
+        'С параметром fields ответ должен содержать только эти поля и id.'
+    )
+    response = superuser_client.get(
+        DONATIONS_URL,
+        params=params,
+        headers={'Accept': 'application/x-ndjson'},
+    )
+    assert [
+        json.loads(line) for line in response.text.splitlines()
+    ] == expected, 'Параметр fields должен работать и для выгрузки NDJSON.'
+
+
+def test_donations_match_schema(superuser_client, donation,
+                                another_donation):
+    response = superuser_client.get(DONATIONS_URL)
+    donations = parse_obj_as(list[DonationDB], response.json())
+    assert [
+        json.loads(donation.json(exclude_none=True)) for donation in donations
+    ] == response.json(), (
+        'Список пожертвований отдаётся без валидации pydantic, поэтому '
+        'каждая запись должна совпадать со схемой DonationDB.'
+    )
+
+
+@pytest.mark.parametrize('params, status', [
+    ({'cursor': 'not-a-cursor'}, 400),
+    ({'cursor': 'eyJpZCI6ICJ4In0'}, 400),
+    ({'limit': 0}, 422),
+    ({'limit': 1001}, 422),
+])
+def test_user_donations_invalid_page(user_client, params, status):
+    response = user_client.get(MY_DONATIONS_URL, params=params)
+    assert response.status_code == status, (
+        'Некорректные параметры страницы должны отклоняться.'
+    )
@@ -0,0 +1,118 @@
+import pytest
+from conftest import TestingSessionLocal, engine
+from sqlalchemy import event
+
+from app.core.unit_of_work import unit_of_work
+from app.crud.charity_project import project_crud
+from app.crud.table_version import table_version_crud
+from app.models import CharityProject
+from app.schemas.charity_project import (
+    CharityProjectCreate, CharityProjectUpdate
+)
+
+PROJECTS_URL = '/charity_project/'
+MY_DONATIONS_URL = '/donation/my'
+
+
+def new_project(name):
+    return CharityProjectCreate(
+        name=name, description='Описание проекта', full_amount=1000
+    )
+
+
+async def projects_version():
+    async with TestingSessionLocal() as session:
+        return await table_version_crud.get(CharityProject, session)
+
+
+def test_projects_not_modified(superuser_client, charity_project):
+    etag = superuser_client.get(PROJECTS_URL).headers['ETag']
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, 'before_cursor_execute', capture)
+    try:
+        response = superuser_client.get(
+            PROJECTS_URL, headers={'If-None-Match': etag}
+        )
+    finally:
+        event.remove(engine.sync_engine, 'before_cursor_execute', capture)
+    assert (response.status_code, response.content) == (304, b''), (
+        'Если проекты не менялись, на If-None-Match с текущим ETag '
+        'нужно отвечать 304 без тела.'
+    )
+    assert response.headers['ETag'] == etag
+    assert not [
+        statement for statement in statements if 'charityproject' in statement
+    ], 'Ответ 304 должен отдаваться без чтения списка проектов.'
+
+    superuser_client.patch(
+        f'{PROJECTS_URL}{charity_project.id}', json={'name': 'Новое имя'}
+    )
+    response = superuser_client.get(
+        PROJECTS_URL, headers={'If-None-Match': etag}
+    )
+    assert response.status_code == 200, (
+        'После изменения проекта список нужно отдавать полностью.'
+    )
+    assert response.headers['ETag'] != etag
+
+
+def test_etag_depends_on_page_params(superuser_client, charity_project,
+                                     small_fully_charity_project):
+    etag = superuser_client.get(PROJECTS_URL).headers['ETag']
+    for params in (
+        {'limit': 1},
+        {'fields': 'name'},
+        {'limit': 1, 'cursor': superuser_client.get(
+            PROJECTS_URL, params={'limit': 1}
+        ).headers['X-Next-Cursor']},
+    ):
+        response = superuser_client.get(
+            PROJECTS_URL, params=params, headers={'If-None-Match': etag}
+        )
+        assert response.status_code == 200, (
+            'ETag другой страницы или другого набора полей '
+            'не должен давать 304.'
+        )
+        assert response.headers['ETag'] != etag
+
+
+def test_my_donations_not_modified(user_client, donation):
+    etag = user_client.get(MY_DONATIONS_URL).headers['ETag']
+    assert user_client.get(
+        MY_DONATIONS_URL, headers={'If-None-Match': f'"x", W/{etag}'}
+    ).status_code == 304, (
+        'ETag должен находиться среди нескольких значений If-None-Match.'
+    )
+    user_client.post('/donation/', json={'full_amount': 100})
+    response = user_client.get(
+        MY_DONATIONS_URL, headers={'If-None-Match': etag}
+    )
+    assert response.status_code == 200, (
+        'После нового пожертвования список нужно отдавать полностью.'
+    )
+
+
+async def test_version_bumped_once_per_transaction():
+    start = await projects_version()
+    async with TestingSessionLocal() as session:
+        async with unit_of_work():
+            project = await project_crud.create(new_project('Первый'), session)
+            await project_crud.update_many(
+                [project], CharityProjectUpdate(full_amount=2000), session
+            )
+    assert await projects_version() == start + 1, (
+        'Транзакция, изменившая проекты, увеличивает версию один раз.'
+    )
+
+    async with TestingSessionLocal() as session:
+        with pytest.raises(RuntimeError):
+            async with unit_of_work():
+                await project_crud.create(new_project('Второй'), session)
+                raise RuntimeError
+    assert await projects_version() == start + 1, (
+        'Откаченные изменения не должны менять версию.'
+    )
@@ -1,5 +1,9 @@
+import numpy as np
 import pytest
 
+from app.services import allocation_numpy
+from app.services.investment import distribute
+
 DONATION_URL = '/donation/'
 PROJECTS_URL = '/charity_project/'
 
@@ -60,3 +64,110 @@ def test_donation_to_little_invest_project(
     )
     assert not charity_project_nunchaku.fully_invested, common_asser_msg
     assert charity_project_nunchaku.invested_amount == 0, common_asser_msg
+
+
+def test_distribute_fifo_order():
+    transfers = distribute([100, 50, 300], [30, 100, 500])
+    assert transfers == [
+        (0, 0, 30), (0, 1, 70), (1, 1, 30), (1, 2, 20), (2, 2, 300),
+    ], (
+        'Распределение должно идти в порядке создания: каждый проект '
+        'забирает средства из самых ранних незакрытых пожертвований.'
+    )
+
+
+def test_distribute_skips_negative_remains():
+    projects, donations = [100, -20, 50], [-10, 120, 40]
+    transfers = [(0, 1, 100), (2, 1, 20), (2, 2, 30)]
+    assert distribute(projects, donations) == transfers, (
+        'Отрицательный остаток нужно пропускать, а не зацикливаться на нём.'
+    )
+    assert allocation_numpy.distribute(projects, donations) == transfers, (
+        'Векторное ядро должно пропускать отрицательные остатки так же.'
+    )
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_numpy_kernel_matches_distribute(seed):
+    rng = np.random.default_rng(seed)
+    projects = rng.integers(0, 1000, 100_000).tolist()
+    donations = rng.integers(0, 1000, 120_000).tolist()
+    transfers = distribute(projects, donations)
+    assert allocation_numpy.distribute(projects, donations) == transfers, (
+        'Векторное ядро должно возвращать те же переводы, что и distribute.'
+    )
+
+    project_amounts = [0] * len(projects)
+    donation_amounts = [0] * len(donations)
+    for project_index, donation_index, amount in transfers:
+        project_amounts[project_index] += amount
+        donation_amounts[donation_index] += amount
+    (project_invested, project_closed,
+     donation_invested, donation_closed) = allocation_numpy.allocate_arrays(
+        projects, donations
+    )
+    assert project_invested.tolist() == project_amounts, (
+        'Суммы по проектам должны совпадать с переводами distribute.'
+    )
+    assert donation_invested.tolist() == donation_amounts, (
+        'Суммы по пожертвованиям должны совпадать с переводами distribute.'
+    )
+    assert project_closed.tolist() == [
+        amount == remains
+        for amount, remains in zip(project_amounts, projects)
+    ], 'Флаги закрытия проектов рассчитаны неверно.'
+    assert donation_closed.tolist() == [
+        amount == remains
+        for amount, remains in zip(donation_amounts, donations)
+    ], 'Флаги закрытия пожертвований рассчитаны неверно.'
+
+
+def test_numpy_kernel_empty_queues():
+    assert allocation_numpy.distribute([], [100]) == []
+    assert allocation_numpy.distribute([100], []) == []
+    assert allocation_numpy.allocate_arrays([100], [])[0].tolist() == [0]
+
+
+@pytest.mark.usefixtures('donation', 'another_donation')
+def test_new_project_takes_all_open_donations(superuser_client):
+    response = superuser_client.post(PROJECTS_URL, json={
+        'name': 'Корм для котиков',
+        'description': 'Корм на целый год',
+        'full_amount': 1500,
+    })
+    data = response.json()
+    assert data['invested_amount'] == 1500, (
+        'Новый проект должен забрать средства из всех свободных '
+        'пожертвований в порядке их создания.'
+    )
+    assert data['fully_invested'], (
+        'Проект, получивший полную сумму, должен быть закрыт.'
+    )
+    donations = superuser_client.get(DONATION_URL).json()
+    assert [d['invested_amount'] for d in donations] == [100, 1400], (
+        'Первое пожертвование должно быть израсходовано полностью, '
+        'второе - частично.'
+    )
+    assert [d['fully_invested'] for d in donations] == [True, False], (
+        'Закрываться должны только полностью распределённые пожертвования.'
+    )
+
+
+def test_investment_ledger_for_user(user_client, charity_project_little_invested,
+                                    charity_project_nunchaku):
+    user_client.post(DONATION_URL, json={'full_amount': 1000100})
+    response = user_client.get(DONATION_URL + 'my/investments')
+    assert response.status_code == 200, (
+        'GET-запрос пользователя к `/donation/my/investments` '
+        'должен возвращать статус 200.'
+    )
+    data = response.json()
+    assert [
+        (item['project_id'], item['amount']) for item in data
+    ] == [
+        (charity_project_little_invested.id, 999900),
+        (charity_project_nunchaku.id, 200),
+    ], (
+        'Журнал распределений должен содержать по записи на каждую сумму, '
+        'переведённую из пожертвования пользователя в проект.'
+    )
@@ -0,0 +1,53 @@
+import pytest
+from conftest import TEST_DB
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.pool import InstrumentedPool
+
+POOL_URL = '/diagnostics/pool'
+
+
+def test_pool_status(superuser_client):
+    response = superuser_client.get(POOL_URL)
+    assert response.status_code == 200
+    pools = response.json()
+    assert [pool['name'] for pool in pools] == ['primary'], (
+        'Без реплики отчёт должен содержать только основной пул.'
+    )
+    assert {
+        'size', 'checked_out', 'idle', 'overflow', 'waits', 'timeouts',
+    } <= set(pools[0]), 'В отчёте о пуле не хватает счётчиков.'
+
+
+def test_pool_status_superuser_only(user_client):
+    response = user_client.get(POOL_URL)
+    assert response.status_code == 403, (
+        'Состояние пула доступно только суперюзеру.'
+    )
+
+
+async def test_pool_counts_checkouts_and_timeouts():
+    engine = create_async_engine(
+        f'sqlite+aiosqlite:///{TEST_DB}',
+        poolclass=InstrumentedPool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1,
+    )
+    try:
+        async with engine.connect():
+            snapshot = engine.pool.snapshot()
+            assert (snapshot['checked_out'], snapshot['idle']) == (1, 0)
+            with pytest.raises(PoolTimeoutError):
+                async with engine.connect():
+                    pass
+        snapshot = engine.pool.snapshot()
+    finally:
+        await engine.dispose()
+    assert (snapshot['checked_out'], snapshot['idle']) == (0, 1), (
+        'Соединение должно возвращаться в пул.'
+    )
+    assert (snapshot['waits'], snapshot['timeouts']) == (1, 1), (
+        'Пул должен считать выдачи соединений и отказы по таймауту.'
+    )
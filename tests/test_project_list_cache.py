@@ -0,0 +1,115 @@
+import pytest
+from conftest import app, current_user, engine
+from fixtures.user import superuser
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.services.project_list_cache import (
+    CacheBackend, CacheStats, LocalBackend, ProjectListCache,
+    project_list_cache
+)
+
+PROJECTS_URL = '/charity_project/'
+CACHE_URL = '/diagnostics/cache'
+
+
+@pytest.fixture
+def projects_cache(monkeypatch):
+    monkeypatch.setattr(settings, 'projects_cache', True)
+    monkeypatch.setattr(project_list_cache, 'backend', LocalBackend(100))
+    monkeypatch.setattr(project_list_cache, 'stats', CacheStats())
+    return project_list_cache
+
+
+def test_projects_page_served_from_cache(user_client, charity_project,
+                                         small_fully_charity_project,
+                                         projects_cache):
+    first = user_client.get(PROJECTS_URL, params={'limit': 1})
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, 'before_cursor_execute', capture)
+    try:
+        second = user_client.get(PROJECTS_URL, params={'limit': 1})
+    finally:
+        event.remove(engine.sync_engine, 'before_cursor_execute', capture)
+    assert not statements, (
+        'Повторный запрос той же страницы должен отдаваться из кэша '
+        'без обращений к БД, в том числе за версией таблицы.'
+    )
+    assert (
+        second.json(), second.headers['X-Next-Cursor'], second.headers['ETag']
+    ) == (
+        first.json(), first.headers['X-Next-Cursor'], first.headers['ETag']
+    ), 'Ответ из кэша должен совпадать с ответом из БД.'
+    assert user_client.get(PROJECTS_URL).json() != first.json(), (
+        'Страницы с разными параметрами кэшируются отдельно.'
+    )
+    assert (projects_cache.stats.hits, projects_cache.stats.misses) == (
+        1, 2
+    )
+
+
+def test_projects_cache_not_modified(user_client, charity_project,
+                                     projects_cache):
+    etag = user_client.get(PROJECTS_URL).headers['ETag']
+    response = user_client.get(
+        PROJECTS_URL, headers={'If-None-Match': etag}
+    )
+    assert response.status_code == 304, (
+        'ETag страницы из кэша должен давать ответ 304.'
+    )
+    assert projects_cache.stats.hits == 1
+
+
+def test_projects_cache_reset_by_writes(superuser_client, charity_project,
+                                        projects_cache):
+    superuser_client.get(PROJECTS_URL)
+    superuser_client.patch(
+        f'{PROJECTS_URL}{charity_project.id}', json={'name': 'Новое имя'}
+    )
+    assert superuser_client.get(PROJECTS_URL).json()[0]['name'] == (
+        'Новое имя'
+    ), 'Изменение проекта должно сбрасывать кэш списка.'
+
+    app.dependency_overrides[current_user] = lambda: superuser
+    superuser_client.post('/donation/', json={'full_amount': 100})
+    assert superuser_client.get(PROJECTS_URL).json()[0][
+        'invested_amount'
+    ] == 100, 'Распределение средств должно сбрасывать кэш списка.'
+
+    status = superuser_client.get(CACHE_URL).json()
+    assert (status['hits'], status['misses'], status['invalidations']) == (
+        0, 3, 2
+    ), 'Каждая запись должна сбрасывать кэш один раз после коммита.'
+
+
+async def test_projects_cache_generations():
+    backend = LocalBackend(100)
+    first = ProjectListCache(backend, ttl=60)
+    second = ProjectListCache(backend, ttl=60)
+
+    _, generation = await first.get('page')
+    # Запись закоммичена, пока страница читалась из БД
+    await second.invalidate()
+    await first.put('page', generation, b'\n[]')
+    assert (await first.get('page'))[0] is None, (
+        'Страница, прочитанная до сброса кэша, не должна сохраняться.'
+    )
+
+    _, generation = await first.get('page')
+    await first.put('page', generation, b'\n[]')
+    assert (await second.get('page'))[0] == b'\n[]', (
+        'Кэши с общим хранилищем должны видеть страницы друг друга.'
+    )
+
+
+def test_cache_backend_requires_methods():
+    class Broken(CacheBackend):
+        async def get(self, name):
+            return None
+
+    with pytest.raises(TypeError):
+        Broken()
@@ -0,0 +1,193 @@
+import inspect
+import re
+import sqlite3
+from contextlib import contextmanager
+
+import pytest
+from conftest import TEST_DB, TestingSessionLocal, engine
+from fixtures.user import user
+from sqlalchemy import event
+
+from app.crud.base import BaseCRUD
+from app.crud.charity_project import ProjectCRUD, project_crud
+from app.crud.donation import DonationCRUD, donation_crud
+from app.models import Donation
+from app.schemas.charity_project import (
+    CharityProjectCreate, CharityProjectUpdate
+)
+from app.schemas.donation import DonationCreate
+
+# Запросы, которым полный просмотр таблицы нужен по смыслу:
+# списки всех записей и отчёт по всем закрытым проектам
+FULL_SCAN_ALLOWED = {
+    'get_all', 'get_names', 'get_projects_by_completion_rate',
+}
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?\w+$')
+EXPLAINED = ('SELECT', 'UPDATE', 'DELETE')
+# Планы запросов читаются через EXPLAIN QUERY PLAN SQLite
+sqlite_only = pytest.mark.skipif(
+    engine.dialect.name != 'sqlite',
+    reason='планы запросов проверяются на SQLite',
+)
+
+
+def new_project(index=0):
+    return CharityProjectCreate(
+        name=f'Проект {index}',
+        description='Описание проекта',
+        full_amount=1000,
+    )
+
+
+async def update_project(session):
+    project = await project_crud.get(1, session)
+    return await project_crud.update(
+        project, CharityProjectUpdate(full_amount=2000), session
+    )
+
+
+async def save_donation(session):
+    donation = await donation_crud.get(1, session)
+    donation.invested_amount = 10
+    return await donation_crud.save(donation, session)
+
+
+async def save_many(session):
+    project = await project_crud.get(1, session)
+    donation = await donation_crud.get(1, session)
+    project.invested_amount = donation.invested_amount = 10
+    return await project_crud.save_many(session, project, donation)
+
+
+async def update_many(session):
+    project = await project_crud.get(1, session)
+    return await project_crud.update_many(
+        [project], CharityProjectUpdate(full_amount=2000), session
+    )
+
+
+async def delete_project(session):
+    project = await project_crud.get(1, session)
+    return await project_crud.delete(project, session)
+
+
+async def stream_all(session):
+    return [
+        row
+        async for partition in donation_crud.stream_all(session, after_id=1)
+        for row in partition
+    ]
+
+
+CASES = {
+    'get': lambda session: donation_crud.get(1, session),
+    'get_all': lambda session: project_crud.get_all(session),
+    'get_opened': lambda session: donation_crud.get_opened(session),
+    'get_page': lambda session: donation_crud.get_page(
+        session, 10, after_id=1, filters=[Donation.user_id == user.id]
+    ),
+    'stream_all': stream_all,
+    'create': lambda session: project_crud.create(new_project(1), session),
+    'create_many': lambda session: donation_crud.create_many(
+        [DonationCreate(full_amount=100)] * 2, session, user
+    ),
+    'update': update_project,
+    'update_many': update_many,
+    'save': save_donation,
+    'save_many': save_many,
+    'delete': delete_project,
+    'get_by_name': lambda session: project_crud.get_by_name(
+        'Проект 0', session
+    ),
+    'get_names': lambda session: project_crud.get_names(session),
+    'get_projects_by_completion_rate': (
+        lambda session: project_crud.get_projects_by_completion_rate(session)
+    ),
+    'get_by_user': lambda session: donation_crud.get_by_user(session, user),
+    'get_invested_total': lambda session: donation_crud.get_invested_total(
+        [1, 2], session
+    ),
+}
+
+
+@contextmanager
+def captured_statements():
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(
+            (statement, parameters[0] if executemany else parameters)
+        )
+
+    event.listen(engine.sync_engine, 'before_cursor_execute', capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, 'before_cursor_execute', capture)
+
+
+def query_plan(statement, parameters):
+    with sqlite3.connect(TEST_DB) as connection:
+        return [
+            row[3] for row in connection.execute(
+                f'EXPLAIN QUERY PLAN {statement}', parameters
+            )
+        ]
+
+
+def test_all_crud_queries_covered():
+    methods = {
+        name
+        for crud_class in (BaseCRUD, ProjectCRUD, DonationCRUD)
+        for name, method in vars(crud_class).items()
+        if (
+            inspect.iscoroutinefunction(method)
+            or inspect.isasyncgenfunction(method)
+        ) and not name.startswith('_')
+    }
+    assert methods <= set(CASES), (
+        'Для каждого метода CRUD нужен сценарий в CASES, чтобы проверить '
+        f'план его запросов. Нет сценариев: {sorted(methods - set(CASES))}'
+    )
+
+
+@sqlite_only
+@pytest.mark.parametrize('name', CASES)
+async def test_crud_query_plans(name):
+    async with TestingSessionLocal() as session:
+        await project_crud.create(new_project(), session)
+        await donation_crud.create(DonationCreate(full_amount=100), session)
+
+    async with TestingSessionLocal() as session:
+        with captured_statements() as statements:
+            await CASES[name](session)
+
+    assert statements, f'Метод {name} не выполнил ни одного запроса.'
+    if name in FULL_SCAN_ALLOWED:
+        return
+    for statement, parameters in statements:
+        if not statement.lstrip().upper().startswith(EXPLAINED):
+            continue
+        plan = query_plan(statement, parameters)
+        assert not [step for step in plan if FULL_SCAN.match(step)], (
+            f'Запрос метода {name} читает всю таблицу, '
+            f'нужен индекс:\n{statement}\n{plan}'
+        )
+
+
+@sqlite_only
+async def test_open_queue_ordered_by_index():
+    async with TestingSessionLocal() as session:
+        with captured_statements() as statements:
+            await project_crud.get_opened(session)
+            await donation_crud.get_opened(session)
+
+    for statement, parameters in statements:
+        plan = query_plan(statement, parameters)
+        assert any('_open' in step for step in plan), (
+            'Открытые записи должны читаться по частичному индексу.'
+        )
+        assert not any('TEMP B-TREE' in step for step in plan), (
+            'Порядок открытых записей должен браться из индекса, '
+            'без сортировки.'
+        )
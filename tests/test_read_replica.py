@@ -0,0 +1,52 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core import db
+from app.core.db import Base, recent_writers
+
+PROJECTS_URL = '/charity_project/'
+DONATIONS_URL = '/donation/'
+MY_DONATIONS_URL = DONATIONS_URL + 'my'
+WRITER = {'Authorization': 'Bearer writer'}
+READER = {'Authorization': 'Bearer reader'}
+
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch):
+    # Отстающая реплика: вторая БД SQLite без данных основной
+    path = tmp_path / 'replica.db'
+    Base.metadata.create_all(create_engine(f'sqlite:///{path}'))
+    monkeypatch.setattr(db, 'ReplicaSessionLocal', sessionmaker(
+        create_async_engine(f'sqlite+aiosqlite:///{path}'),
+        class_=AsyncSession,
+        expire_on_commit=False,
+    ))
+    yield
+    recent_writers.clear()
+
+
+def test_reads_go_to_replica(user_client, charity_project, replica):
+    response = user_client.get(PROJECTS_URL)
+    assert response.status_code == 200
+    assert response.json() == [], (
+        'При заданной реплике списки должны читаться из неё.'
+    )
+
+
+def test_read_your_writes(user_client, charity_project, replica):
+    response = user_client.post(
+        DONATIONS_URL, json={'full_amount': 100}, headers=WRITER
+    )
+    assert response.status_code == 200
+
+    response = user_client.get(MY_DONATIONS_URL, headers=WRITER)
+    assert [item['full_amount'] for item in response.json()] == [100], (
+        'После записи клиент должен читать из основной БД '
+        'и видеть свои изменения.'
+    )
+    response = user_client.get(MY_DONATIONS_URL, headers=READER)
+    assert response.json() == [], (
+        'Клиенты без недавних записей должны читать из реплики.'
+    )
@@ -0,0 +1,160 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from conftest import app, current_superuser, current_user
+from fastapi.testclient import TestClient
+from fixtures.user import superuser
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core import db
+from app.core.config import settings
+from app.core.db import Base
+from app.core.pool import pool_options
+from app.core.sqlite import apply_pragmas, writer_options
+from app.services.allocation_worker import allocation_worker
+
+
+def wal_engines(tmp_path):
+    url = f'sqlite+aiosqlite:///{tmp_path / "wal.db"}'
+    reader = create_async_engine(url, **pool_options())
+    writer = create_async_engine(url, **writer_options())
+    apply_pragmas(reader)
+    apply_pragmas(writer)
+    return reader, writer
+
+
+async def test_pragmas_applied_on_connect(tmp_path):
+    reader, writer = wal_engines(tmp_path)
+    try:
+        async with reader.connect() as connection:
+            values = [
+                (await connection.exec_driver_sql(f'PRAGMA {name}')).scalar()
+                for name in (
+                    'journal_mode', 'synchronous', 'busy_timeout',
+                    'cache_size',
+                )
+            ]
+    finally:
+        await reader.dispose()
+        await writer.dispose()
+    assert values == [
+        'wal', 1, settings.sqlite_busy_timeout, settings.sqlite_cache_size,
+    ], 'Соединение должно открываться в режиме WAL с настройками SQLite.'
+
+
+async def test_single_writer_serializes_writes(tmp_path):
+    reader, writer = wal_engines(tmp_path)
+    async with writer.begin() as connection:
+        await connection.exec_driver_sql(
+            'CREATE TABLE item (id INTEGER PRIMARY KEY, seen INTEGER)'
+        )
+    writing = asyncio.Event()
+
+    async def write():
+        # Чтение, затем запись в одной транзакции: при двух
+        # соединениях записи вторая падала бы с database is locked
+        async with writer.begin() as connection:
+            seen = (await connection.exec_driver_sql(
+                'SELECT count(*) FROM item'
+            )).scalar()
+            await connection.execute(
+                text('INSERT INTO item (seen) VALUES (:seen)'),
+                {'seen': seen},
+            )
+            writing.set()
+            await asyncio.sleep(0.1)
+
+    async def read():
+        await writing.wait()
+        async with reader.connect() as connection:
+            return (await connection.exec_driver_sql(
+                'SELECT count(*) FROM item'
+            )).scalar()
+
+    try:
+        *_, read_count = await asyncio.wait_for(
+            asyncio.gather(write(), write(), read()), timeout=5
+        )
+        async with reader.connect() as connection:
+            seen = (await connection.exec_driver_sql(
+                'SELECT seen FROM item ORDER BY id'
+            )).scalars().all()
+    finally:
+        await reader.dispose()
+        await writer.dispose()
+    assert seen == [0, 1], (
+        'Транзакции записи должны выполняться по очереди и видеть '
+        'результат предыдущей.'
+    )
+    assert read_count == 0, (
+        'Чтение не должно ждать незавершённую запись.'
+    )
+
+
+def test_background_allocation_with_single_writer(tmp_path, monkeypatch):
+    # SQLITE_WAL и ALLOCATION_BACKGROUND вместе: запрос получает
+    # единственное соединение записи при проверке имени проекта,
+    # до allocation_lock, а фоновый проход ждёт то же соединение
+    monkeypatch.setattr(settings, 'pool_timeout', 3)
+    monkeypatch.setattr(settings, 'allocation_background', True)
+    reader, writer = wal_engines(tmp_path)
+    Base.metadata.create_all(create_engine(writer.url.set(
+        drivername='sqlite'
+    )))
+    writer_sessions = sessionmaker(
+        writer, class_=AsyncSession, expire_on_commit=False
+    )
+    monkeypatch.setattr(db, 'AsyncSessionLocal', writer_sessions)
+    monkeypatch.setattr(db, 'ReadSessionLocal', sessionmaker(
+        reader, class_=AsyncSession, expire_on_commit=False
+    ))
+    monkeypatch.setattr(allocation_worker, 'session_factory', writer_sessions)
+    app.dependency_overrides = {
+        current_user: lambda: superuser,
+        current_superuser: lambda: superuser,
+    }
+
+    def post(index):
+        if index % 2:
+            return client.post('/donation/', json={'full_amount': 100})
+        return client.post('/charity_project/', json={
+            'name': f'Проект {index}',
+            'description': 'Описание проекта',
+            'full_amount': 100,
+        })
+
+    with TestClient(app) as client:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            responses = list(executor.map(post, range(40)))
+        assert [response.status_code for response in responses] == (
+            [200] * 40
+        ), (
+            'Запросы с записью не должны упираться в POOL_TIMEOUT, '
+            'ожидая соединение, занятое фоновым распределением.'
+        )
+        last_ticket = max(
+            int(response.headers['X-Allocation-Ticket'])
+            for response in responses
+        )
+        for _ in range(200):
+            if allocation_worker.is_applied(last_ticket):
+                break
+            time.sleep(0.02)
+    asyncio.run(reader.dispose())
+    asyncio.run(writer.dispose())
+    assert allocation_worker.is_applied(last_ticket), (
+        'Фоновое распределение должно выполнить все заявки.'
+    )
+    with create_engine(reader.url.set(drivername='sqlite')).connect() as (
+        connection
+    ):
+        invested = connection.execute(text(
+            'SELECT (SELECT sum(invested_amount) FROM charityproject), '
+            '(SELECT sum(invested_amount) FROM donation)'
+        )).one()
+    assert tuple(invested) == (2000, 2000), (
+        'Все пожертвования должны распределиться по проектам.'
+    )
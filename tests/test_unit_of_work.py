@@ -0,0 +1,92 @@
+import pytest
+from conftest import TestingSessionLocal, engine
+from sqlalchemy import event, func, select
+
+from app.core.unit_of_work import commit_now, on_commit, unit_of_work
+from app.crud.charity_project import project_crud
+from app.models import CharityProject
+from app.schemas.charity_project import CharityProjectCreate
+
+DONATION_URL = '/donation/'
+
+
+def new_project(name):
+    return CharityProjectCreate(
+        name=name, description='Описание проекта', full_amount=1000
+    )
+
+
+async def projects_count():
+    async with TestingSessionLocal() as session:
+        return await session.scalar(
+            select(func.count()).select_from(CharityProject)
+        )
+
+
+def test_create_donation_single_commit(user_client, charity_project):
+    commits = []
+
+    def count(connection):
+        commits.append(connection)
+
+    event.listen(engine.sync_engine, 'commit', count)
+    try:
+        response = user_client.post(DONATION_URL, json={'full_amount': 100})
+    finally:
+        event.remove(engine.sync_engine, 'commit', count)
+    assert response.status_code == 200
+    assert len(commits) == 1, (
+        'Создание пожертвования вместе с распределением должно '
+        'сохраняться одним коммитом в конце запроса.'
+    )
+
+
+async def test_unit_of_work_rolls_back_on_error():
+    async with TestingSessionLocal() as session:
+        with pytest.raises(RuntimeError):
+            async with unit_of_work():
+                await project_crud.create(new_project('Проект 1'), session)
+                await project_crud.create(new_project('Проект 2'), session)
+                raise RuntimeError
+    assert await projects_count() == 0, (
+        'При ошибке внутри единицы работы изменения '
+        'не должны сохраняться частично.'
+    )
+
+
+async def test_commit_now_inside_unit_of_work():
+    async with TestingSessionLocal() as session:
+        async with unit_of_work():
+            await project_crud.create(new_project('Проект 1'), session)
+            assert await projects_count() == 0, (
+                'Внутри единицы работы изменения коммитятся в её конце.'
+            )
+            await commit_now(session)
+            assert await projects_count() == 1, (
+                'commit_now должен коммитить изменения сразу.'
+            )
+        assert await projects_count() == 1
+
+
+async def test_commit_now_runs_commit_callbacks():
+    calls = []
+
+    async def callback():
+        calls.append(await projects_count())
+
+    async with TestingSessionLocal() as session:
+        with pytest.raises(RuntimeError):
+            async with unit_of_work():
+                await project_crud.create(new_project('Проект 1'), session)
+                await on_commit(callback)
+                await commit_now(session)
+                assert calls == [1], (
+                    'commit_now должен сразу выполнять callback из '
+                    'on_commit: изменения уже видны другим соединениям.'
+                )
+                await project_crud.create(new_project('Проект 2'), session)
+                raise RuntimeError
+    assert (calls, await projects_count()) == ([1], 1), (
+        'Откат единицы работы отменяет только изменения после '
+        'commit_now, а callback не выполняется повторно.'
+    )